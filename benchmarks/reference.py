@@ -0,0 +1,91 @@
+"""
+reference.py - Implémentations de référence (version initiale du parser)
+Conservées pour vérifier que les versions optimisées de src/ produisent
+exactement les mêmes sorties, et pour mesurer le gain.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+
+def reference_character_name(line: str) -> Optional[str]:
+    """
+    Extrait le nom du personnage d'une ligne de script.
+    Format typique: "PERSONNAGE: dialogue" ou "PERSONNAGE dialogue"
+    
+    Args:
+        line: Ligne de script
+        
+    Returns:
+        Nom du personnage ou None si non trouvé
+    """
+    # Pattern pour détecter un nom de personnage (tout en majuscules suivi de : ou espace)
+    pattern = r'^([A-Z\s]{2,30})(?:\:|$)'
+    match = re.match(pattern, line.strip())
+    
+    if match:
+        return match.group(1).strip()
+    return None
+
+
+def reference_dialogues(script_text: str) -> List[Dict[str, str]]:
+    """
+    Extrait les dialogues d'un script avec les noms des personnages.
+    
+    Args:
+        script_text: Texte complet du script
+        
+    Returns:
+        Liste de dictionnaires {'character': nom, 'dialogue': texte}
+    """
+    dialogues = []
+    lines = script_text.split('\n')
+    
+    current_character = None
+    current_dialogue = []
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            # Ligne vide: sauvegarder le dialogue en cours si existant
+            if current_character and current_dialogue:
+                dialogues.append({
+                    'character': current_character,
+                    'dialogue': ' '.join(current_dialogue)
+                })
+                current_character = None
+                current_dialogue = []
+            continue
+        
+        # Vérifier si c'est un nom de personnage
+        character_name = reference_character_name(line)
+        
+        if character_name:
+            # Nouveau personnage: sauvegarder le dialogue précédent
+            if current_character and current_dialogue:
+                dialogues.append({
+                    'character': current_character,
+                    'dialogue': ' '.join(current_dialogue)
+                })
+            
+            current_character = character_name
+            current_dialogue = []
+            
+            # Si le dialogue commence sur la même ligne (après le :)
+            if ':' in line:
+                dialogue_part = line.split(':', 1)[1].strip()
+                if dialogue_part:
+                    current_dialogue.append(dialogue_part)
+        else:
+            # C'est une ligne de dialogue (continuation)
+            if current_character:
+                current_dialogue.append(line)
+    
+    # Sauvegarder le dernier dialogue
+    if current_character and current_dialogue:
+        dialogues.append({
+            'character': current_character,
+            'dialogue': ' '.join(current_dialogue)
+        })
+    
+    return dialogues
@@ -0,0 +1,196 @@
+"""
+run_benchmarks.py - Mesure du temps et de la mémoire des étapes critiques
+Chronomètre le parser et les analyses de stats_analysis sur des corpus
+synthétiques de tailles croissantes, et sauvegarde les résultats en JSON
+pour comparer deux versions du code.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 10 100 500
+    python benchmarks/run_benchmarks.py --compare results/old.json results/new.json
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BENCH_DIR, '..', 'src'))
+
+from synthetic import generate_corpus
+from reference import reference_dialogues
+
+from dictionaries import GENDER_WORDS, ETHNICITY_WORDS, RACIAL_STEREOTYPES, get_all_bias_words
+from parser import clean_script_text, extract_dialogues, scan_script
+from stats_analysis import (
+    calculate_word_frequency,
+    analyze_corpus_by_decade,
+    analyze_gender_bias_by_decade,
+    analyze_racial_bias_by_decade
+)
+from counts import SCRIPT_COUNTS
+
+
+def _measure(func: Callable, repeats: int) -> Dict:
+    """
+    Temps (meilleur et moyen sur `repeats` exécutions) puis pic mémoire (une exécution).
+    """
+    times = []
+    for _ in range(repeats):
+        SCRIPT_COUNTS.clear()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    SCRIPT_COUNTS.clear()
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'best_s': min(times),
+        'mean_s': sum(times) / len(times),
+        'peak_mb': peak / 1e6
+    }
+
+
+def benchmark_size(num_scripts: int, words_per_script: int, repeats: int) -> List[Dict]:
+    """
+    Exécute tous les benchmarks pour une taille de corpus.
+    """
+    import graph_utils
+
+    corpus = generate_corpus(num_scripts, words_per_script)
+    corpus['clean_text'] = [clean_script_text(t) for t in corpus['raw_text']]
+    total_words = int(sum(len(t.split()) for t in corpus['clean_text']))
+    raw_bytes = int(sum(len(t.encode('utf-8')) for t in corpus['raw_text']))
+    lexicon = sorted(get_all_bias_words())
+
+    # Le scanner doit reproduire exactement l'extracteur de référence
+    for text in corpus['clean_text']:
+        if extract_dialogues(text) != reference_dialogues(text):
+            raise AssertionError("extract_dialogues diffère de l'implémentation de référence")
+
+    cases = {
+        'clean_script_text': lambda: [clean_script_text(t) for t in corpus['raw_text']],
+        'extract_dialogues': lambda: [extract_dialogues(t) for t in corpus['clean_text']],
+        'reference_dialogues': lambda: [reference_dialogues(t) for t in corpus['clean_text']],
+        'scan_script': lambda: [scan_script(t) for t in corpus['clean_text']],
+        'calculate_word_frequency': lambda: [calculate_word_frequency(t, lexicon)
+                                             for t in corpus['clean_text']],
+        'analyze_corpus_by_decade': lambda: analyze_corpus_by_decade(
+            corpus, 'clean_text', 'release_year', {**GENDER_WORDS, **ETHNICITY_WORDS}),
+        'analyze_gender_bias_by_decade': lambda: analyze_gender_bias_by_decade(
+            corpus, 'clean_text', 'release_year'),
+        'analyze_racial_bias_by_decade': lambda: analyze_racial_bias_by_decade(
+            corpus, 'clean_text', 'release_year'),
+        'build_bipartite_graph': lambda: graph_utils.build_bipartite_graph(
+            corpus, RACIAL_STEREOTYPES),
+    }
+
+    results = []
+    for name, func in cases.items():
+        measure = _measure(func, repeats)
+        measure.update({
+            'benchmark': name,
+            'num_scripts': num_scripts,
+            'total_words': total_words,
+            'raw_bytes': raw_bytes,
+            'words_per_s': total_words / measure['best_s'] if measure['best_s'] > 0 else None
+        })
+        results.append(measure)
+        print(f"  {name:32s} {num_scripts:6d} scripts  {measure['best_s']:8.3f} s  "
+              f"{measure['peak_mb']:8.1f} MB")
+    return results
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=BENCH_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(sizes: List[int], words_per_script: int, repeats: int, output_dir: str) -> str:
+    """
+    Lance les benchmarks et écrit le fichier de résultats.
+
+    Returns:
+        Chemin du fichier JSON
+    """
+    revision = _git_revision()
+    results = []
+    for size in sizes:
+        print(f"Corpus de {size} scripts ({words_per_script} mots/script)...")
+        results.extend(benchmark_size(size, words_per_script, repeats))
+
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    path = os.path.join(output_dir, f"{timestamp}_{revision}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'revision': revision,
+            'timestamp': timestamp,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'words_per_script': words_per_script,
+            'repeats': repeats,
+            'results': results
+        }, f, indent=2)
+
+    print(f"✓ Résultats sauvegardés : {path}")
+    return path
+
+
+def compare(old_path: str, new_path: str) -> None:
+    """
+    Affiche le rapport temps/mémoire entre deux fichiers de résultats.
+    """
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+
+    old_results = {(r['benchmark'], r['num_scripts']): r for r in old['results']}
+    print(f"{old['revision']} → {new['revision']}")
+    for r in new['results']:
+        key = (r['benchmark'], r['num_scripts'])
+        if key not in old_results:
+            continue
+        o = old_results[key]
+        time_ratio = r['best_s'] / o['best_s'] if o['best_s'] else float('nan')
+        mem_ratio = r['peak_mb'] / o['peak_mb'] if o['peak_mb'] else float('nan')
+        flag = '  ⚠ régression' if time_ratio > 1.2 or mem_ratio > 1.2 else ''
+        print(f"  {key[0]:32s} {key[1]:6d}  temps x{time_ratio:5.2f}  mémoire x{mem_ratio:5.2f}{flag}")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Benchmarks du parser et de stats_analysis")
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 200],
+                            help="Nombres de scripts des corpus synthétiques")
+    arg_parser.add_argument('--words', type=int, default=20000, help="Mots par script")
+    arg_parser.add_argument('--repeats', type=int, default=3, help="Répétitions par mesure")
+    arg_parser.add_argument('--output-dir', default=os.path.join(BENCH_DIR, 'results'))
+    arg_parser.add_argument('--compare', nargs=2, metavar=('ANCIEN', 'NOUVEAU'),
+                            help="Compare deux fichiers de résultats")
+    args = arg_parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        run(args.sizes, args.words, args.repeats, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
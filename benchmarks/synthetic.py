@@ -0,0 +1,137 @@
+"""
+synthetic.py - Générateur de scripts de films synthétiques
+Produit des scénarios au format du corpus Kaggle (en-têtes de scène,
+noms de personnages, didascalies, répliques) avec une densité contrôlée de
+mots des lexiques, sans téléchargement.
+"""
+
+import os
+import random
+import sys
+from typing import List, Optional
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from dictionaries import get_all_bias_words
+
+
+FILLER_WORDS = (
+    "the a an and but or so then now here there this that what where when why how "
+    "is was are were be been have has had do does did will would can could should "
+    "go come look take give make know think want need tell ask call keep leave "
+    "time day night room door car house street city money job phone gun table "
+    "good right okay yeah no yes just really maybe never always again away back"
+).split()
+
+CHARACTER_NAMES = [
+    'JOHN', 'MARY', 'DETECTIVE HARRIS', 'SARAH', 'MIKE', 'DOCTOR LEE',
+    'ANNA', 'FRANK', 'OFFICER COLE', 'LUCY', 'TOM', 'MRS PARKER'
+]
+
+SCENE_PLACES = ['KITCHEN', 'STREET', 'OFFICE', 'CAR', 'BAR', 'HOSPITAL', 'APARTMENT']
+
+DIRECTIONS = ['(smiles)', '(beat)', '(whispering)', '[pause]', '(to Mary)', '[laughs]']
+
+
+def _sentence(rng: random.Random, lexicon: List[str], density: float, length: int) -> str:
+    words = [rng.choice(lexicon) if rng.random() < density else rng.choice(FILLER_WORDS)
+             for _ in range(length)]
+    words[0] = words[0].capitalize()
+    return ' '.join(words) + rng.choice(['.', '.', '?', '!'])
+
+
+def generate_script(num_words: int = 20000,
+                    lexicon_density: float = 0.02,
+                    seed: Optional[int] = None) -> str:
+    """
+    Génère un script synthétique d'environ `num_words` mots.
+
+    Args:
+        num_words: Nombre approximatif de mots de dialogue
+        lexicon_density: Proportion de mots tirés des lexiques de dictionaries.py
+        seed: Graine aléatoire
+
+    Returns:
+        Texte brut du script
+    """
+    rng = random.Random(seed)
+    lexicon = sorted(get_all_bias_words())
+    lines = []
+    words = 0
+    scene = 1
+
+    while words < num_words:
+        # En-tête de scène
+        if rng.random() < 0.1:
+            lines.append(f"SCENE {scene}")
+            lines.append(f"{rng.choice(['INT.', 'EXT.'])} {rng.choice(SCENE_PLACES)} - "
+                         f"{rng.choice(['DAY', 'NIGHT'])}")
+            lines.append("")
+            scene += 1
+
+        name = rng.choice(CHARACTER_NAMES)
+        length = rng.randint(4, 25)
+        text = _sentence(rng, lexicon, lexicon_density, length)
+        if rng.random() < 0.2:
+            text = f"{rng.choice(DIRECTIONS)} {text}"
+
+        # Réplique sur la même ligne ("NOM: texte") ou sous le nom
+        if rng.random() < 0.5:
+            lines.append(f"{name}: {text}")
+        else:
+            lines.append(name)
+            lines.append(text)
+        if rng.random() < 0.3:
+            extra = rng.randint(4, 15)
+            lines.append(_sentence(rng, lexicon, lexicon_density, extra))
+            length += extra
+        lines.append("")
+        words += length
+
+    return '\n'.join(lines)
+
+
+def generate_corpus(num_scripts: int = 100,
+                    words_per_script: int = 20000,
+                    lexicon_density: float = 0.02,
+                    seed: int = 0) -> pd.DataFrame:
+    """
+    Génère un corpus synthétique au format de scripts_clean.pkl.
+
+    Args:
+        num_scripts: Nombre de scripts
+        words_per_script: Nombre approximatif de mots par script
+        lexicon_density: Proportion de mots des lexiques
+        seed: Graine aléatoire
+
+    Returns:
+        DataFrame (title, release_year, decade, filename, raw_text)
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(num_scripts):
+        year = rng.randint(1960, 2019)
+        rows.append({
+            'title': f"Synthetic Film {i}",
+            'release_year': year,
+            'decade': (year // 10) * 10,
+            'filename': f"Synthetic Film {i}_{i:07d}_anno.txt",
+            'raw_text': generate_script(words_per_script, lexicon_density, seed=seed * 100003 + i)
+        })
+    return pd.DataFrame(rows)
+
+
+def write_corpus(df: pd.DataFrame, directory: str) -> None:
+    """
+    Écrit un corpus synthétique en fichiers .txt (pour tester le chargement).
+    """
+    os.makedirs(directory, exist_ok=True)
+    for row in df.itertuples():
+        with open(os.path.join(directory, row.filename), 'w', encoding='utf-8') as f:
+            f.write(row.raw_text)
+
+
+if __name__ == "__main__":
+    print(generate_script(200, seed=1))
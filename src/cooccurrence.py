@@ -0,0 +1,441 @@
+"""
+cooccurrence.py - Co-occurrences termes × termes en matrices creuses
+Remplace calculate_cooccurrence_matrix (notebook 4) : chaque document est
+parcouru une fois, les paires de termes dans une fenêtre (±k tokens, phrase,
+réplique, ou fenêtre asymétrique autour de chaque token comme le notebook)
+sont comptées de façon vectorisée dans une matrice creuse du vocabulaire
+complet ou d'une liste de termes, par tranche (décennie...). Les résultats
+partiels de plusieurs processus se fusionnent, et PMI/PPMI se calculent sur
+la matrice.
+"""
+
+import re
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+# Nombre d'entrées en attente avant consolidation dans la matrice creuse
+_FLUSH_THRESHOLD = 5_000_000
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+
+def sentence_segments(text: str, tokenizer: Callable[[str], List[str]]) -> List[List[str]]:
+    """
+    Découpe un texte en phrases tokenisées.
+    """
+    if not isinstance(text, str):
+        return []
+    return [tokens for tokens in (tokenizer(s) for s in _SENTENCE_SPLIT.split(text)) if tokens]
+
+
+def turn_segments(text: str, tokenizer: Callable[[str], List[str]]) -> List[List[str]]:
+    """
+    Découpe un script en répliques tokenisées (extract_dialogues).
+    """
+    from parser import extract_dialogues
+
+    if not isinstance(text, str):
+        return []
+    return [tokens for tokens in (tokenizer(d['dialogue']) for d in extract_dialogues(text)) if tokens]
+
+
+class CooccurrenceCounter:
+    """
+    Compteur de co-occurrences par tranche (clé).
+
+    window:
+        entier k          -> paires de tokens distants d'au plus k dans un segment
+        'segment'         -> toutes les paires d'un même segment (phrase, réplique)
+        (avant, après)    -> pour chaque token i, les tokens de segment[i-avant:i+après]
+                             (le token lui-même compris ; (10, 10) : fenêtre du notebook 4)
+
+    Avec k ou 'segment', une paire (i, j) de positions distinctes est comptée dans
+    C[a, b] et C[b, a] (a, b termes des positions) : la matrice est symétrique.
+    Avec (avant, après), C[a, b] compte les b de la fenêtre de chaque occurrence de a.
+
+    terms:
+        None         -> vocabulaire complet, étendu au fil des documents
+        liste        -> seuls ces termes sont comptés (les autres tokens occupent
+                        leur position dans la fenêtre sans être comptés)
+    """
+
+    def __init__(self, window: Union[int, str, Tuple[int, int]] = 5,
+                 terms: Optional[Iterable[str]] = None):
+        if isinstance(window, list):
+            window = tuple(window)
+        if not (window == 'segment' or
+                (isinstance(window, int) and window > 0) or
+                (isinstance(window, tuple) and len(window) == 2 and
+                 all(isinstance(w, int) for w in window) and window[0] >= 0 and window[1] >= 1)):
+            raise ValueError("window doit être un entier > 0, 'segment' ou (avant >= 0, après >= 1)")
+
+        self.window = window
+        self.vocabulary: List[str] = []
+        self.term_ids: Dict[str, int] = {}
+        self.fixed_vocabulary = terms is not None
+        if terms is not None:
+            self.vocabulary = list(dict.fromkeys(terms))
+            self.term_ids = {t: i for i, t in enumerate(self.vocabulary)}
+        self._matrices: Dict[Hashable, sparse.csr_matrix] = {}
+        self._term_counts: Dict[Hashable, np.ndarray] = {}
+        self._pending: Dict[Hashable, List[tuple]] = {}
+        self._pending_size = 0
+
+    # ----- Vocabulaire -----
+
+    def encode(self, tokens: Sequence[str]) -> np.ndarray:
+        """
+        Identifiants des tokens (le vocabulaire est complété au besoin ;
+        -1 pour un token hors d'un vocabulaire fixé).
+        """
+        term_ids = self.term_ids
+        if self.fixed_vocabulary:
+            return np.fromiter((term_ids.get(token, -1) for token in tokens),
+                               dtype=np.int64, count=len(tokens))
+
+        ids = np.empty(len(tokens), dtype=np.int64)
+        for i, token in enumerate(tokens):
+            token_id = term_ids.get(token)
+            if token_id is None:
+                token_id = len(self.vocabulary)
+                term_ids[token] = token_id
+                self.vocabulary.append(token)
+            ids[i] = token_id
+        return ids
+
+    # ----- Comptage -----
+
+    def _pairs(self, ids: np.ndarray):
+        """
+        Paires (lignes, colonnes) d'un segment : dans les deux sens pour une fenêtre
+        symétrique, (token central, token de sa fenêtre) pour (avant, après).
+        """
+        n = len(ids)
+        if isinstance(self.window, tuple):
+            before, after = self.window
+            centers = np.flatnonzero(ids >= 0)
+            if not len(centers):
+                return None
+            rows, cols = [], []
+            for d in range(-before, after):
+                positions = centers + d
+                valid = (positions >= 0) & (positions < n)
+                positions = positions[valid]
+                context = ids[positions]
+                known = context >= 0
+                rows.append(ids[centers[valid][known]])
+                cols.append(context[known])
+            return np.concatenate(rows), np.concatenate(cols)
+
+        if n < 2:
+            return None
+
+        k = min(self.window, n - 1)
+        a = np.concatenate([ids[:-d] for d in range(1, k + 1)])
+        b = np.concatenate([ids[d:] for d in range(1, k + 1)])
+        if self.fixed_vocabulary:
+            known = (a >= 0) & (b >= 0)
+            a, b = a[known], b[known]
+        return np.concatenate([a, b]), np.concatenate([b, a])
+
+    def _bag(self, ids: np.ndarray):
+        """
+        Sac de mots (termes, occurrences) d'un segment, pour window='segment' : les
+        paires du segment valent c cᵀ - diag(c), calculé au flush pour tous les
+        segments à la fois (pas d'énumération des paires de positions).
+        """
+        known = ids[ids >= 0] if self.fixed_vocabulary else ids
+        if len(known) < 2:
+            return None
+        return np.unique(known, return_counts=True)
+
+    def add_document(self, segments: Union[Sequence[str], Sequence[Sequence[str]]],
+                     key: Hashable = None) -> None:
+        """
+        Ajoute un document (liste de tokens, ou liste de segments tokenisés).
+
+        Args:
+            segments: Tokens du document, ou segments (phrases/répliques)
+            key: Tranche du document (ex: décennie)
+        """
+        if segments and isinstance(segments[0], str):
+            segments = [segments]
+
+        for segment in segments:
+            ids = self.encode(segment)
+            known = ids[ids >= 0] if self.fixed_vocabulary else ids
+            counts = self._term_counts.get(key)
+            new_counts = np.bincount(known, minlength=len(self.vocabulary)) if len(known) else None
+            if new_counts is not None:
+                if counts is None:
+                    counts = np.zeros(0, dtype=np.int64)
+                if len(counts) < len(new_counts):
+                    counts = np.pad(counts, (0, len(new_counts) - len(counts)))
+                counts[:len(new_counts)] += new_counts
+                self._term_counts[key] = counts
+
+            pairs = self._bag(ids) if self.window == 'segment' else self._pairs(ids)
+            if pairs is not None:
+                self._pending.setdefault(key, []).append(pairs)
+                self._pending_size += len(pairs[0])
+
+        if self._pending_size > _FLUSH_THRESHOLD:
+            self._flush()
+
+    def _resize(self, matrix: sparse.csr_matrix, size: int) -> sparse.csr_matrix:
+        if matrix.shape[0] == size:
+            return matrix
+        matrix = matrix.tocoo()
+        return sparse.csr_matrix((matrix.data, (matrix.row, matrix.col)), shape=(size, size))
+
+    def _flush(self) -> None:
+        """
+        Consolide les paires en attente dans les matrices creuses.
+        """
+        size = len(self.vocabulary)
+        for key, parts in self._pending.items():
+            if self.window == 'segment':
+                # Segments × termes : C = XᵀX - diag(occurrences)
+                segments = np.repeat(np.arange(len(parts)), [len(p[0]) for p in parts])
+                terms = np.concatenate([p[0] for p in parts])
+                counts = np.concatenate([p[1] for p in parts]).astype(np.int64)
+                bags = sparse.csr_matrix((counts, (segments, terms)), shape=(len(parts), size))
+                new = (bags.T @ bags).tocsr() - sparse.diags(
+                    np.asarray(bags.sum(axis=0)).ravel(), format='csr', dtype=np.int64)
+                new.eliminate_zeros()
+            else:
+                rows = np.concatenate([p[0] for p in parts])
+                cols = np.concatenate([p[1] for p in parts])
+                data = np.ones(len(rows), dtype=np.int64)
+                new = sparse.csr_matrix((data, (rows, cols)), shape=(size, size))
+                new.sum_duplicates()
+            current = self._matrices.get(key)
+            self._matrices[key] = new if current is None else self._resize(current, size) + new
+        self._pending = {}
+        self._pending_size = 0
+
+    def merge(self, other: 'CooccurrenceCounter') -> 'CooccurrenceCounter':
+        """
+        Ajoute les comptes d'un autre compteur (ex: résultat d'un worker).
+        Les vocabulaires sont alignés sur celui de ce compteur.
+        """
+        if other.window != self.window:
+            raise ValueError("Fenêtres différentes : fusion impossible")
+
+        other._flush()
+        self._flush()
+        mapping = self.encode(other.vocabulary)
+        if (mapping < 0).any():
+            raise ValueError("Termes hors du vocabulaire fixé : fusion impossible")
+        size = len(self.vocabulary)
+
+        for key, matrix in other._matrices.items():
+            coo = matrix.tocoo()
+            remapped = sparse.csr_matrix((coo.data, (mapping[coo.row], mapping[coo.col])),
+                                         shape=(size, size))
+            current = self._matrices.get(key)
+            self._matrices[key] = remapped if current is None else self._resize(current, size) + remapped
+
+        for key, counts in other._term_counts.items():
+            current = np.zeros(size, dtype=np.int64)
+            own = self._term_counts.get(key)
+            if own is not None:
+                current[:len(own)] = own
+            np.add.at(current, mapping[:len(counts)], counts)
+            self._term_counts[key] = current
+
+        return self
+
+    # ----- Résultats -----
+
+    def keys(self) -> List[Hashable]:
+        """
+        Tranches présentes (triées si possible).
+        """
+        keys = set(self._matrices) | set(self._term_counts) | set(self._pending)
+        try:
+            return sorted(keys)
+        except TypeError:
+            return list(keys)
+
+    def matrix(self, key: Hashable = None, all_keys: bool = False) -> sparse.csr_matrix:
+        """
+        Matrice termes × termes d'une tranche (ou de toutes si all_keys=True).
+        """
+        self._flush()
+        size = len(self.vocabulary)
+        keys = self.keys() if all_keys else [key]
+        result = sparse.csr_matrix((size, size), dtype=np.int64)
+        for k in keys:
+            if k in self._matrices:
+                result = result + self._resize(self._matrices[k], size)
+        return result
+
+    def term_counts(self, key: Hashable = None, all_keys: bool = False) -> np.ndarray:
+        """
+        Nombre d'occurrences de chaque terme (aligné sur le vocabulaire).
+        """
+        result = np.zeros(len(self.vocabulary), dtype=np.int64)
+        for k in (self.keys() if all_keys else [key]):
+            counts = self._term_counts.get(k)
+            if counts is not None:
+                result[:len(counts)] += counts
+        return result
+
+    def to_frame(self, terms: Sequence[str], key: Hashable = None,
+                 all_keys: bool = False) -> pd.DataFrame:
+        """
+        Sous-matrice dense pour une liste de termes (table d'association lisible).
+        """
+        ids = [self.term_ids[t] for t in terms if t in self.term_ids]
+        kept = [t for t in terms if t in self.term_ids]
+        sub = self.matrix(key, all_keys)[ids][:, ids].toarray()
+        return pd.DataFrame(sub, index=kept, columns=kept)
+
+
+def pmi(matrix: sparse.spmatrix, positive: bool = True) -> sparse.csr_matrix:
+    """
+    PMI (ou PPMI si positive=True) d'une matrice de co-occurrences.
+
+    PMI(a, b) = log( C[a, b] * N / (C[a, .] * C[., b]) ), N = somme de C.
+    Seules les cases non nulles sont calculées (la matrice reste creuse).
+    """
+    coo = sparse.coo_matrix(matrix, dtype=float)
+    total = coo.sum()
+    if total == 0:
+        return sparse.csr_matrix(coo.shape)
+
+    row_sums = np.asarray(coo.sum(axis=1)).ravel()
+    col_sums = np.asarray(coo.sum(axis=0)).ravel()
+    values = np.log(coo.data * total / (row_sums[coo.row] * col_sums[coo.col]))
+
+    if positive:
+        keep = values > 0
+        return sparse.csr_matrix((values[keep], (coo.row[keep], coo.col[keep])), shape=coo.shape)
+    return sparse.csr_matrix((values, (coo.row, coo.col)), shape=coo.shape)
+
+
+def category_cooccurrence(counter: CooccurrenceCounter,
+                          row_categories: Dict[str, List[str]],
+                          col_categories: Dict[str, List[str]],
+                          key: Hashable = None,
+                          all_keys: bool = False,
+                          per_mentions: bool = True) -> pd.DataFrame:
+    """
+    Matrice catégories × catégories (ex: groupes sociaux × comportements).
+    Avec une fenêtre (avant, après), les lignes sont les catégories des tokens
+    centraux : C[groupe, comportement] compte les termes de comportement dans la
+    fenêtre de chaque mention du groupe (tableau du notebook 4).
+
+    Args:
+        counter: Compteur rempli
+        row_categories: Dict {label: termes} des lignes
+        col_categories: Dict {label: termes} des colonnes
+        key: Tranche
+        all_keys: Toutes les tranches
+        per_mentions: Si True, exprime en % des mentions de la catégorie ligne
+                      (normalisation du notebook 4)
+
+    Returns:
+        DataFrame lignes × colonnes
+    """
+    from dictionaries import LexiconRegistry
+
+    size = len(counter.vocabulary)
+
+    def indicator(categories):
+        # Termes -> catégories par le registre (mots présents dans plusieurs catégories inclus)
+        table = LexiconRegistry(categories).token_matrix(counter.term_ids, size)
+        return sparse.csr_matrix(table, dtype=float)
+
+    left, right = indicator(row_categories), indicator(col_categories)
+    values = (left.T @ counter.matrix(key, all_keys) @ right).toarray()
+
+    if per_mentions:
+        mentions = left.T @ counter.term_counts(key, all_keys)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = np.where(mentions[:, None] > 0, values / mentions[:, None] * 100, 0.0)
+
+    return pd.DataFrame(values, index=list(row_categories), columns=list(col_categories))
+
+
+def _count_chunk(texts: List[str], keys: List[Hashable], window: Union[int, str, Tuple[int, int]],
+                 segmentation: str, tokenizer: str,
+                 terms: Optional[List[str]] = None) -> CooccurrenceCounter:
+    """
+    Compte un lot de documents (exécuté dans un processus worker).
+    """
+    from token_cache import TOKENIZERS
+
+    tokenize = TOKENIZERS[tokenizer]
+    counter = CooccurrenceCounter(window, terms)
+    for text, key in zip(texts, keys):
+        if segmentation == 'sentence':
+            segments = sentence_segments(text, tokenize)
+        elif segmentation == 'turn':
+            segments = turn_segments(text, tokenize)
+        else:
+            segments = [tokenize(text)] if isinstance(text, str) else []
+        counter.add_document(segments, key)
+    counter._flush()
+    return counter
+
+
+def count_cooccurrences(texts: Iterable[str],
+                        keys: Optional[Iterable[Hashable]] = None,
+                        window: Union[int, str, Tuple[int, int]] = 10,
+                        segmentation: str = 'document',
+                        tokenizer: str = 'regex',
+                        n_workers: int = 1,
+                        chunksize: int = 50,
+                        terms: Optional[Iterable[str]] = None) -> CooccurrenceCounter:
+    """
+    Compte les co-occurrences d'un corpus, éventuellement en parallèle.
+
+    Args:
+        texts: Textes des documents (ex: df['clean_text'])
+        keys: Tranche de chaque document (ex: df['decade']) ; None pour une seule tranche
+        window: ±k tokens, 'segment' pour toutes les paires d'un segment, ou
+                (avant, après) autour de chaque token
+        segmentation: 'document', 'sentence' ou 'turn' (répliques)
+        tokenizer: Nom d'un tokeniseur de token_cache.TOKENIZERS
+        n_workers: Nombre de processus
+        chunksize: Nombre de documents par lot
+        terms: Termes comptés (None pour le vocabulaire complet)
+
+    Returns:
+        CooccurrenceCounter fusionné
+    """
+    texts = list(texts)
+    keys = [None] * len(texts) if keys is None else list(keys)
+    chunks = [(texts[i:i + chunksize], keys[i:i + chunksize])
+              for i in range(0, len(texts), chunksize)]
+
+    terms = None if terms is None else list(dict.fromkeys(terms))
+    result = CooccurrenceCounter(window, terms)
+    if n_workers > 1 and len(chunks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [executor.submit(_count_chunk, t, k, window, segmentation, tokenizer, terms)
+                       for t, k in chunks]
+            for future in futures:
+                result.merge(future.result())
+    else:
+        for t, k in chunks:
+            result.merge(_count_chunk(t, k, window, segmentation, tokenizer, terms))
+
+    return result
+
+
+if __name__ == "__main__":
+    from dictionaries import GENDER_WORDS, ACTION_VERBS
+
+    texts = ["The woman will fight. She does not obey.", "The man wants to control and command."]
+    counter = count_cooccurrences(texts, keys=[1960, 2000], window=5)
+    print(category_cooccurrence(counter, GENDER_WORDS, ACTION_VERBS, all_keys=True).round(1))
+    print(pmi(counter.matrix(all_keys=True)).nnz)
@@ -0,0 +1,328 @@
+"""
+corpus_store.py - Stockage colonnaire du corpus (remplace scripts_clean.pkl)
+Les métadonnées sont lues sans toucher aux textes, les colonnes de texte et
+de tokens sont lues en memory-map, et de nouveaux films peuvent être ajoutés
+sans réécrire les fichiers existants.
+"""
+
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# Colonnes de scripts parsés qui ne sont pas des métadonnées
+_NON_METADATA_COLUMNS = {'raw_text', 'clean_text', 'dialogues', 'characters'}
+
+
+class CorpusStore:
+    """
+    Corpus stocké dans un dossier :
+
+        schema.json           colonnes de métadonnées et de texte
+        metadata.csv          une ligne par film (lecture sans les textes)
+        <colonne>.bin         textes UTF-8 concaténés
+        <colonne>.ends        offsets de fin (int64) de chaque film dans <colonne>.bin
+        tokens.bin / .ends    identifiants de tokens (int32) et offsets (optionnel)
+        vocab.txt             vocabulaire des tokens (id = numéro de ligne)
+
+    Tous les fichiers sont en ajout seul. Les données binaires sont écrites
+    avant metadata.csv : un ajout interrompu n'expose pas de ligne incomplète.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Dossier du corpus (créé s'il n'existe pas)
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+        self._schema_path = os.path.join(path, 'schema.json')
+        self._metadata_path = os.path.join(path, 'metadata.csv')
+        self._vocab_path = os.path.join(path, 'vocab.txt')
+
+        self.schema: Optional[Dict] = None
+        if os.path.exists(self._schema_path):
+            with open(self._schema_path, 'r', encoding='utf-8') as f:
+                self.schema = json.load(f)
+
+        self.vocabulary: List[str] = []
+        self._token_ids: Dict[str, int] = {}
+        if os.path.exists(self._vocab_path):
+            with open(self._vocab_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self._token_ids[line.rstrip('\n')] = len(self.vocabulary)
+                    self.vocabulary.append(line.rstrip('\n'))
+
+        self._metadata: Optional[pd.DataFrame] = None
+        self._maps: Dict[str, np.ndarray] = {}
+
+    # ----- Lecture -----
+
+    def __len__(self) -> int:
+        return len(self.metadata())
+
+    @property
+    def text_columns(self) -> List[str]:
+        return self.schema['text_columns'] if self.schema else []
+
+    @property
+    def has_tokens(self) -> bool:
+        return bool(self.schema and self.schema['has_tokens'])
+
+    def metadata(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Métadonnées du corpus (aucun texte n'est lu).
+
+        Args:
+            columns: Colonnes à retourner (None pour toutes)
+
+        Returns:
+            DataFrame indexé par numéro de film
+        """
+        if self._metadata is None:
+            if os.path.exists(self._metadata_path):
+                self._metadata = pd.read_csv(self._metadata_path)
+            else:
+                self._metadata = pd.DataFrame()
+        return self._metadata if columns is None else self._metadata[list(columns)]
+
+    def _map(self, name: str, dtype) -> np.ndarray:
+        """
+        Memory-map (mis en cache) d'un fichier binaire du corpus.
+        """
+        if name not in self._maps:
+            path = os.path.join(self.path, name)
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                self._maps[name] = np.empty(0, dtype=dtype)
+            else:
+                self._maps[name] = np.memmap(path, dtype=dtype, mode='r')
+        return self._maps[name]
+
+    def _span(self, column: str, i: int):
+        ends = self._map(f'{column}.ends', np.int64)
+        start = int(ends[i - 1]) if i > 0 else 0
+        return start, int(ends[i])
+
+    def text(self, i: int, column: str = 'clean_text') -> str:
+        """
+        Texte d'un film (seuls ses octets sont lus).
+
+        Args:
+            i: Numéro du film (index de metadata())
+            column: Colonne de texte
+
+        Returns:
+            Texte décodé
+        """
+        if column not in self.text_columns:
+            raise KeyError(f"Colonne de texte inconnue : {column}")
+        start, end = self._span(column, i)
+        return self._map(f'{column}.bin', np.uint8)[start:end].tobytes().decode('utf-8')
+
+    def token_ids(self, i: int) -> np.ndarray:
+        """
+        Identifiants des tokens d'un film (vue memory-map, sans copie).
+        """
+        if not self.has_tokens:
+            raise KeyError("Ce corpus ne contient pas de tokens")
+        start, end = self._span('tokens', i)
+        return self._map('tokens.bin', np.int32)[start:end]
+
+    def tokens(self, i: int) -> List[str]:
+        """
+        Tokens d'un film.
+        """
+        vocabulary = self.vocabulary
+        return [vocabulary[t] for t in self.token_ids(i).tolist()]
+
+    def iter_texts(self, column: str = 'clean_text',
+                   rows: Optional[Iterable[int]] = None) -> Iterator[str]:
+        """
+        Parcourt les textes d'une colonne un par un.
+
+        Args:
+            column: Colonne de texte
+            rows: Numéros des films (None pour tous)
+
+        Yields:
+            Textes décodés
+        """
+        if rows is None:
+            rows = range(len(self))
+        for i in rows:
+            yield self.text(i, column)
+
+    def select(self, title: Optional[str] = None,
+               decade: Optional[int] = None,
+               text_columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Sélectionne des films par titre et/ou décennie sans charger le corpus.
+
+        Args:
+            title: Titre exact du film
+            decade: Décennie (ex: 1980)
+            text_columns: Colonnes de texte à charger pour les films retenus
+                          (None pour toutes, [] pour les métadonnées seules)
+
+        Returns:
+            DataFrame des films sélectionnés
+        """
+        meta = self.metadata()
+        mask = pd.Series(True, index=meta.index)
+        if title is not None:
+            mask &= meta['title'] == title
+        if decade is not None:
+            mask &= meta['decade'] == decade
+
+        selected = meta[mask].copy()
+        for column in (self.text_columns if text_columns is None else text_columns):
+            selected[column] = [self.text(i, column) for i in selected.index]
+        return selected
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Charge tout le corpus (équivalent de pd.read_pickle sur scripts_clean.pkl).
+        """
+        return self.select()
+
+    # ----- Écriture -----
+
+    def _truncate_to_metadata(self) -> None:
+        """
+        Supprime les données binaires d'un ajout interrompu (au-delà de metadata.csv).
+        """
+        n = len(self)
+        columns = list(self.text_columns) + (['tokens'] if self.has_tokens else [])
+        for column in columns:
+            ends_path = os.path.join(self.path, f'{column}.ends')
+            bin_path = os.path.join(self.path, f'{column}.bin')
+            if not os.path.exists(ends_path):
+                continue
+            end = int(self._map(f'{column}.ends', np.int64)[n - 1]) if n else 0
+            itemsize = 4 if column == 'tokens' else 1
+            self._maps.clear()
+            for path, size in ((ends_path, n * 8), (bin_path, end * itemsize)):
+                if os.path.exists(path) and os.path.getsize(path) > size:
+                    with open(path, 'r+b') as f:
+                        f.truncate(size)
+
+    def _append_bytes(self, name: str, data: bytes) -> None:
+        with open(os.path.join(self.path, name), 'ab') as f:
+            f.write(data)
+
+    def _encode_tokens(self, tokens: List[str]) -> np.ndarray:
+        ids = np.empty(len(tokens), dtype=np.int32)
+        new_tokens = []
+        for j, token in enumerate(tokens):
+            token_id = self._token_ids.get(token)
+            if token_id is None:
+                token_id = len(self.vocabulary)
+                self._token_ids[token] = token_id
+                self.vocabulary.append(token)
+                new_tokens.append(token)
+            ids[j] = token_id
+        if new_tokens:
+            with open(self._vocab_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(t + '\n' for t in new_tokens))
+        return ids
+
+    def append(self, df: pd.DataFrame,
+               text_columns: Sequence[str] = ('clean_text',),
+               tokens: Optional[Iterable[List[str]]] = None,
+               metadata_columns: Optional[Sequence[str]] = None) -> None:
+        """
+        Ajoute des films au corpus sans réécrire l'existant.
+
+        Args:
+            df: DataFrame des films (ex: sortie de load_scripts_from_directory)
+            text_columns: Colonnes de texte à stocker (fixées au premier ajout)
+            tokens: Listes de tokens de chaque film (optionnel, fixé au premier ajout)
+            metadata_columns: Colonnes de métadonnées (par défaut toutes les autres
+                              colonnes sauf raw_text, dialogues et characters)
+        """
+        if metadata_columns is None:
+            metadata_columns = [c for c in df.columns
+                                if c not in text_columns and c not in _NON_METADATA_COLUMNS]
+
+        if self.schema is None:
+            self.schema = {
+                'metadata_columns': list(metadata_columns),
+                'text_columns': list(text_columns),
+                'has_tokens': tokens is not None
+            }
+            with open(self._schema_path, 'w', encoding='utf-8') as f:
+                json.dump(self.schema, f, indent=2)
+        elif list(metadata_columns) != self.schema['metadata_columns'] or \
+                list(text_columns) != self.schema['text_columns'] or \
+                (tokens is not None) != self.schema['has_tokens']:
+            raise ValueError(f"Colonnes incompatibles avec le corpus existant : {self.schema}")
+
+        self._truncate_to_metadata()
+        
+        # Textes : octets concaténés + offsets de fin cumulés
+        for column in self.text_columns:
+            offset = int(self._map(f'{column}.ends', np.int64)[-1]) if len(self) else 0
+            chunks = [('' if not isinstance(t, str) else t).encode('utf-8') for t in df[column]]
+            ends = offset + np.cumsum([len(c) for c in chunks], dtype=np.int64)
+            self._append_bytes(f'{column}.bin', b''.join(chunks))
+            self._append_bytes(f'{column}.ends', ends.astype(np.int64).tobytes())
+
+        if self.has_tokens:
+            offset = int(self._map('tokens.ends', np.int64)[-1]) if len(self) else 0
+            id_arrays = [self._encode_tokens(list(t)) for t in tokens]
+            if len(id_arrays) != len(df):
+                raise ValueError("Le nombre de listes de tokens ne correspond pas au nombre de films")
+            ends = offset + np.cumsum([len(a) for a in id_arrays], dtype=np.int64)
+            self._append_bytes('tokens.bin',
+                               np.concatenate(id_arrays).astype(np.int32).tobytes() if id_arrays else b'')
+            self._append_bytes('tokens.ends', ends.astype(np.int64).tobytes())
+
+        # Métadonnées en dernier
+        df[self.schema['metadata_columns']].to_csv(
+            self._metadata_path, mode='a', index=False,
+            header=not os.path.exists(self._metadata_path)
+        )
+
+        # Invalider les vues en mémoire
+        self._metadata = None
+        self._maps.clear()
+
+
+def convert_pickle(pickle_path: str, store_path: str,
+                   text_columns: Sequence[str] = ('clean_text',)) -> CorpusStore:
+    """
+    Convertit un scripts_clean.pkl existant en CorpusStore.
+
+    Args:
+        pickle_path: Chemin du pickle (sortie du notebook 0)
+        store_path: Dossier du corpus à créer
+        text_columns: Colonnes de texte à conserver
+
+    Returns:
+        CorpusStore créé
+    """
+    store = CorpusStore(store_path)
+    store.append(pd.read_pickle(pickle_path), text_columns=text_columns)
+    return store
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    store = CorpusStore(tempfile.mkdtemp())
+    store.append(pd.DataFrame({
+        'title': ['Film A', 'Film B'],
+        'release_year': [1965, 1992],
+        'decade': [1960, 1990],
+        'clean_text': ['She is strong.', 'He is brave.']
+    }))
+    store.append(pd.DataFrame({
+        'title': ['Film C'], 'release_year': [1998], 'decade': [1990],
+        'clean_text': ['Une femme forte.']
+    }))
+    print(store.metadata())
+    print(store.select(decade=1990))
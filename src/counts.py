@@ -0,0 +1,184 @@
+"""
+counts.py - Vecteurs de comptes par script, calculés une fois et mis en cache
+Chaque script est compté une seule fois sur le vocabulaire des lexiques ;
+les résultats par décennie (ou par année, par tranche de 5 ans...) sont
+ensuite obtenus en sommant ces vecteurs, sans concaténer les textes.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from matcher import LexiconMatcher
+
+
+class ScriptCountCache:
+    """
+    Cache {script: vecteur de comptes} sur un vocabulaire extensible.
+
+    Les scripts sont identifiés par un condensé blake2b du texte : un même texte
+    n'est parcouru qu'une fois, quelles que soient les analyses qui le lisent.
+    Si le vocabulaire est étendu, seuls les nouveaux mots sont comptés.
+    Avec max_scripts, les scripts les moins récemment utilisés sont évincés.
+    """
+
+    def __init__(self, vocabulary: Optional[List[str]] = None,
+                 max_scripts: Optional[int] = None):
+        """
+        Args:
+            vocabulary: Mots initiaux (par défaut tous les mots de dictionaries.py)
+            max_scripts: Nombre maximal de scripts conservés (None = sans limite)
+        """
+        if vocabulary is None:
+            from dictionaries import get_all_bias_words
+            vocabulary = sorted(get_all_bias_words())
+
+        self.vocabulary: List[str] = []
+        self.word_index: Dict[str, int] = {}
+        self.max_scripts = max_scripts
+        self._rows: 'OrderedDict[bytes, np.ndarray]' = OrderedDict()
+        self._totals: Dict[bytes, int] = {}
+        self._matchers: Dict[Tuple[int, int], LexiconMatcher] = {}
+        self.add_words(vocabulary)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add_words(self, words: Iterable[str]) -> None:
+        """
+        Ajoute des mots au vocabulaire (les scripts déjà comptés seront complétés à la demande).
+        """
+        for word in words:
+            word = word.lower()
+            if word not in self.word_index:
+                self.word_index[word] = len(self.vocabulary)
+                self.vocabulary.append(word)
+
+    def clear(self) -> None:
+        """
+        Vide le cache des scripts (le vocabulaire est conservé).
+        """
+        self._rows.clear()
+        self._totals.clear()
+
+    def _matcher_for(self, start: int) -> LexiconMatcher:
+        """
+        Matcher des mots du vocabulaire à partir de l'index `start`.
+        """
+        key = (start, len(self.vocabulary))
+        if key not in self._matchers:
+            self._matchers[key] = LexiconMatcher({'words': self.vocabulary[start:]})
+        return self._matchers[key]
+
+    def script_vector(self, text: str) -> Tuple[np.ndarray, int]:
+        """
+        Vecteur de comptes (aligné sur self.vocabulary) et nombre de mots d'un script.
+
+        Args:
+            text: Texte du script
+
+        Returns:
+            (vecteur de comptes, nombre total de mots)
+        """
+        key = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        row = self._rows.get(key)
+        start = 0 if row is None else len(row)
+        if row is not None:
+            self._rows.move_to_end(key)
+
+        if start < len(self.vocabulary):
+            missing = self.vocabulary[start:]
+            word_counts = self._matcher_for(start).count_words(text)
+            new_counts = np.fromiter((word_counts[w] for w in missing),
+                                     dtype=np.int64, count=len(missing))
+            row = new_counts if row is None else np.concatenate([row, new_counts])
+            self._rows[key] = row
+
+        total = self._totals.get(key)
+        if total is None:
+            total = self._totals[key] = len(text.split())
+
+        if self.max_scripts is not None:
+            while len(self._rows) > self.max_scripts:
+                evicted, _ = self._rows.popitem(last=False)
+                self._totals.pop(evicted, None)
+
+        return row, total
+
+    def count_matrix(self, texts: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Matrice scripts × vocabulaire et vecteur des nombres de mots.
+        Les textes manquants (NaN/None) donnent une ligne de zéros.
+
+        Args:
+            texts: Textes des scripts (ex: df['clean_text'])
+
+        Returns:
+            (matrice de comptes, nombre de mots par script)
+        """
+        texts = list(texts)
+        matrix = np.zeros((len(texts), len(self.vocabulary)), dtype=np.int64)
+        totals = np.zeros(len(texts), dtype=np.int64)
+
+        for i, text in enumerate(texts):
+            if text is None or (not isinstance(text, str) and pd.isna(text)):
+                continue
+            row, total = self.script_vector(str(text))
+            matrix[i] = row
+            totals[i] = total
+
+        return matrix, totals
+
+    def category_indices(self, word_categories: Dict[str, List[str]]) -> Dict[str, np.ndarray]:
+        """
+        Index (dans le vocabulaire) des mots uniques de chaque catégorie.
+        Les mots absents du vocabulaire y sont ajoutés.
+
+        Args:
+            word_categories: Dict {nom_catégorie: liste_de_mots}
+
+        Returns:
+            Dict {nom_catégorie: tableau d'index}
+        """
+        for words in word_categories.values():
+            self.add_words(words)
+
+        return {
+            name: np.array([self.word_index[w] for w in dict.fromkeys(x.lower() for x in words)],
+                           dtype=np.int64)
+            for name, words in word_categories.items()
+        }
+
+
+def group_count_vectors(matrix: np.ndarray,
+                        totals: np.ndarray,
+                        groups: pd.Series) -> Tuple[list, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Somme les vecteurs de comptes par groupe (décennie, année, tranche de 5 ans...).
+
+    Args:
+        matrix: Matrice scripts × vocabulaire (count_matrix)
+        totals: Nombre de mots par script
+        groups: Clé de groupe de chaque script (même longueur que matrix)
+
+    Returns:
+        (clés triées, matrice groupes × vocabulaire, mots par groupe, scripts par groupe)
+    """
+    codes, keys = pd.factorize(pd.Series(groups).reset_index(drop=True), sort=True)
+    valid = codes >= 0
+    n_groups = len(keys)
+
+    group_matrix = np.zeros((n_groups, matrix.shape[1]), dtype=np.int64)
+    np.add.at(group_matrix, codes[valid], matrix[valid])
+    group_totals = np.bincount(codes[valid], weights=totals[valid], minlength=n_groups).astype(np.int64)
+    num_scripts = np.bincount(codes[valid], minlength=n_groups)
+
+    return list(keys), group_matrix, group_totals, num_scripts
+
+
+# Cache partagé par les analyses de stats_analysis (borné : il vit autant que
+# le processus ; SCRIPT_COUNTS.clear() le vide entre deux corpus)
+SCRIPT_COUNTS = ScriptCountCache(max_scripts=10000)
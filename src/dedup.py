@@ -0,0 +1,320 @@
+"""
+dedup.py - Détection des quasi-doublons (brouillons, réimports) par MinHash LSH
+Chaque script est résumé par une signature MinHash de ses n-grammes de mots
+(shingles) ; la proportion de valeurs égales entre deux signatures estime la
+similarité de Jaccard des deux scripts. Le découpage des signatures en bandes
+(LSH) ne compare que les scripts qui partagent au moins une bande : le coût
+reste quasi linéaire en nombre de scripts, sans comparaison de toutes les paires.
+
+Usage:
+    from dedup import deduplicate
+    df_kept, clusters = deduplicate(df_scripts, threshold=0.8, keep='longest')
+"""
+
+import re
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrumented
+
+
+_WORD_PATTERN = re.compile(r"[a-z0-9']+")
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+# Multiplicateurs (impairs) du hachage des shingles à partir des hachages des mots
+_SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_MIX_MULTIPLIER = np.uint64(0xBF58476D1CE4E5B9)
+KEEP_POLICIES = ('longest', 'shortest', 'first', 'last')
+
+
+class MinHasher:
+    """
+    Signatures MinHash des textes (n-grammes de mots hachés sur 32 bits).
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5,
+                 seed: int = 1, chunk_size: int = 8192):
+        """
+        Args:
+            num_perm: Nombre de permutations (longueur de la signature)
+            shingle_size: Nombre de mots par shingle
+            seed: Graine des permutations (à garder fixe pour comparer des signatures)
+            chunk_size: Shingles traités à la fois (borne la mémoire : num_perm × chunk_size)
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+        rng = np.random.default_rng(seed)
+        # Permutations par multiplication-décalage : ((a * x + b) mod 2^64) >> 32, a impair
+        self._a = rng.integers(0, 1 << 64, size=num_perm, dtype=np.uint64)[:, None] | np.uint64(1)
+        self._b = rng.integers(0, 1 << 64, size=num_perm, dtype=np.uint64)[:, None]
+
+    def shingles(self, text: str) -> np.ndarray:
+        """
+        Hachages 32 bits distincts des n-grammes de mots d'un texte.
+
+        Args:
+            text: Texte du script
+
+        Returns:
+            Tableau uint64 (vide si le texte n'a aucun mot)
+        """
+        if not isinstance(text, str):
+            return np.zeros(0, dtype=np.uint64)
+        words = _WORD_PATTERN.findall(text.lower())
+        if not words:
+            return np.zeros(0, dtype=np.uint64)
+
+        # crc32 plutôt que hash() : identique d'un processus à l'autre ; une fois par mot distinct
+        codes, uniques = pd.factorize(pd.Series(words, dtype=object))
+        hashes = np.array([zlib.crc32(word.encode('utf-8')) for word in uniques],
+                          dtype=np.uint64)[codes]
+
+        k = min(self.shingle_size, len(words))
+        n = len(words) - k + 1
+        shingles = np.zeros(n, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for j in range(k):
+                shingles = shingles * _SHINGLE_MULTIPLIER + hashes[j:j + n]
+            shingles = shingles * _MIX_MULTIPLIER
+            shingles ^= shingles >> np.uint64(32)
+        return np.unique(shingles & _MAX_HASH)
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Signature MinHash d'un texte.
+
+        Args:
+            text: Texte du script
+
+        Returns:
+            Tableau uint32 de num_perm valeurs (toutes à 2^32 - 1 pour un texte vide)
+        """
+        shingles = self.shingles(text)
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(shingles), self.chunk_size):
+            chunk = shingles[start:start + self.chunk_size][None, :]
+            with np.errstate(over='ignore'):
+                values = (self._a * chunk + self._b) >> np.uint64(32)
+            np.minimum(signature, values.min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+    def signatures(self, texts: Sequence[str], n_workers: int = 1) -> np.ndarray:
+        """
+        Signatures de plusieurs textes.
+
+        Args:
+            texts: Textes des scripts
+            n_workers: Processus (les textes sont répartis en lots contigus)
+
+        Returns:
+            Tableau uint32 textes × num_perm
+        """
+        texts = list(texts)
+        if n_workers > 1 and len(texts) > 1:
+            size = -(-len(texts) // n_workers)
+            chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                parts = list(executor.map(self.signatures, chunks))
+            return np.concatenate(parts, axis=0)
+        result = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        for i, text in enumerate(texts):
+            result[i] = self.signature(text)
+        return result
+
+
+def lsh_parameters(num_perm: int, threshold: float,
+                   false_negative_weight: float = 0.95) -> Tuple[int, int]:
+    """
+    Nombre de bandes b et de lignes par bande r (b × r <= num_perm) minimisant
+    la somme pondérée des faux positifs (probabilité d'être candidats sous le
+    seuil, intégrée sur [0, seuil]) et des faux négatifs (probabilité de ne pas
+    l'être au-dessus, intégrée sur [seuil, 1]).
+
+    Les candidats étant vérifiés ensuite, un faux positif ne coûte qu'une
+    comparaison : les faux négatifs pèsent plus lourd, ce qui place le point
+    d'inflexion (1/b)^(1/r) nettement sous le seuil.
+
+    Args:
+        num_perm: Longueur des signatures
+        threshold: Similarité de Jaccard à partir de laquelle deux scripts sont des doublons
+        false_negative_weight: Poids des faux négatifs (celui des faux positifs est le complément)
+
+    Returns:
+        (bandes, lignes par bande)
+    """
+    # Intégration par la méthode du point milieu
+    steps = 200
+    below = (np.arange(steps) + 0.5) / steps * threshold
+    above = threshold + (np.arange(steps) + 0.5) / steps * (1 - threshold)
+
+    best = None
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positives = (1 - (1 - below ** rows) ** bands).mean() * threshold
+            false_negatives = ((1 - above ** rows) ** bands).mean() * (1 - threshold)
+            error = (1 - false_negative_weight) * false_positives + false_negative_weight * false_negatives
+            if best is None or error < best[0]:
+                best = (error, bands, rows)
+    return best[1], best[2]
+
+
+def _find(parent: np.ndarray, i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def lsh_clusters(signatures: np.ndarray, threshold: float = 0.8,
+                 bands: Optional[int] = None,
+                 valid: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Regroupe les signatures proches : candidats par bandes LSH, puis vérification
+    de la similarité estimée (fraction de valeurs égales) avant de fusionner.
+
+    Args:
+        signatures: Tableau textes × num_perm (MinHasher.signatures)
+        threshold: Similarité de Jaccard minimale
+        bands: Nombre de bandes (par défaut lsh_parameters)
+        valid: Masque des textes à regrouper (les autres restent seuls)
+
+    Returns:
+        Identifiant de groupe de chaque texte (plus petit indice du groupe)
+    """
+    n, num_perm = signatures.shape
+    if bands is None:
+        bands, rows = lsh_parameters(num_perm, threshold)
+    else:
+        rows = num_perm // bands
+    candidates = np.flatnonzero(valid) if valid is not None else np.arange(n)
+
+    multipliers = np.random.default_rng(0).integers(1, 1 << 63, size=rows, dtype=np.uint64) | np.uint64(1)
+    parent = np.arange(n)
+    for band in range(bands):
+        block = signatures[candidates, band * rows:(band + 1) * rows].astype(np.uint64)
+        # Textes de même bande : même hachage de la bande (tri, pas de comparaison par paires ;
+        # les collisions éventuelles sont écartées par la vérification)
+        with np.errstate(over='ignore'):
+            buckets = (block * multipliers[:rows]).sum(axis=1)
+        order = np.argsort(buckets, kind='stable')
+        boundaries = np.flatnonzero(np.diff(buckets[order])) + 1
+        for members in np.split(candidates[order], boundaries):
+            if len(members) < 2:
+                continue
+            for position, i in enumerate(members[:-1]):
+                for j in members[position + 1:]:
+                    root_i, root_j = _find(parent, i), _find(parent, j)
+                    if root_i == root_j:
+                        continue
+                    if np.mean(signatures[i] == signatures[j]) >= threshold:
+                        parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    return np.array([_find(parent, i) for i in range(n)])
+
+
+@instrumented('dedup.deduplicate', items=lambda args, kwargs, result: len(result[1]))
+def deduplicate(df: pd.DataFrame, text_column: str = 'clean_text',
+                threshold: float = 0.8,
+                keep: str = 'longest',
+                hasher: Optional[MinHasher] = None,
+                n_workers: int = 1) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Retire les quasi-doublons d'un corpus en gardant une version canonique par groupe.
+
+    Args:
+        df: DataFrame des scripts
+        text_column: Colonne du texte
+        threshold: Similarité de Jaccard (estimée) minimale entre deux versions
+        keep: Version gardée : 'longest' (plus de mots, par défaut), 'shortest',
+              'first' ou 'last' (ordre de df)
+        hasher: MinHasher (par défaut 128 permutations, shingles de 5 mots)
+        n_workers: Processus pour le calcul des signatures
+
+    Returns:
+        (df sans les doublons, DataFrame par script : cluster, cluster_size,
+         canonical, similarity avec la version canonique)
+    """
+    if keep not in KEEP_POLICIES:
+        raise ValueError(f"keep doit être parmi {KEEP_POLICIES} : {keep!r}")
+    if hasher is None:
+        hasher = MinHasher()
+
+    texts = df[text_column].tolist()
+    signatures = hasher.signatures(texts, n_workers)
+    lengths = np.array([len(t.split()) if isinstance(t, str) else 0 for t in texts])
+    labels = lsh_clusters(signatures, threshold, valid=lengths > 0)
+
+    clusters = pd.DataFrame({'position': np.arange(len(df)), 'cluster': labels, 'length': lengths})
+    if keep in ('longest', 'shortest'):
+        # Égalité de longueur : la première version
+        ordered = clusters.sort_values(['length', 'position'], ascending=[keep == 'shortest', True],
+                                       kind='stable')
+    else:
+        ordered = clusters.sort_values('position', ascending=keep == 'first', kind='stable')
+    canonical = ordered.groupby('cluster')['position'].first()
+
+    clusters['cluster_size'] = clusters.groupby('cluster')['cluster'].transform('size')
+    clusters['canonical'] = clusters['position'] == clusters['cluster'].map(canonical)
+    reference = signatures[clusters['cluster'].map(canonical).to_numpy()]
+    clusters['similarity'] = (signatures == reference).mean(axis=1)
+    # Identifiant de groupe = version canonique (ligne de df)
+    clusters['cluster'] = clusters['cluster'].map(canonical)
+
+    report = clusters.drop(columns=['length']).set_index(df.index)
+    kept = df[clusters['canonical'].to_numpy()]
+    return kept, report
+
+
+def duplicates_report(df: pd.DataFrame, clusters: pd.DataFrame,
+                      columns: Sequence[str] = ('title', 'filename', 'word_count')) -> pd.DataFrame:
+    """
+    Scripts des groupes de plus d'une version, avec la version canonique de leur groupe.
+
+    Args:
+        df: DataFrame des scripts avant déduplication
+        clusters: Second résultat de deduplicate
+        columns: Colonnes de df à reprendre (si présentes)
+
+    Returns:
+        DataFrame trié par groupe (canonique en tête), colonne canonical_<colonne>
+        pour la première colonne disponible
+    """
+    columns = [c for c in columns if c in df.columns]
+    report = df[columns].join(clusters)
+    report = report[report['cluster_size'] > 1]
+    if columns:
+        reference = df[columns[0]].to_numpy()
+        report.insert(len(columns), f'canonical_{columns[0]}', reference[report['cluster'].to_numpy()])
+    return report.sort_values(['cluster', 'canonical', 'position'], ascending=[True, False, True],
+                              kind='stable')
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import time
+
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+    from synthetic import generate_corpus
+
+    df = generate_corpus(num_scripts=2000, words_per_script=3000, seed=1)
+    rng = np.random.default_rng(0)
+    # Brouillons : copies de 200 scripts avec 1 % de mots remplacés
+    drafts = df.sample(200, random_state=0).copy()
+    for i, text in zip(drafts.index, drafts['raw_text']):
+        words = text.split()
+        for j in rng.choice(len(words), len(words) // 100, replace=False):
+            words[j] = 'draft'
+        drafts.loc[i, 'raw_text'] = ' '.join(words)
+    corpus = pd.concat([df, drafts], ignore_index=True)
+
+    start = time.perf_counter()
+    kept, report = deduplicate(corpus, text_column='raw_text')
+    print(f"{len(corpus)} scripts -> {len(kept)} gardés en {time.perf_counter() - start:.1f} s")
+    print(duplicates_report(corpus, report, ['title']).head())
@@ -1,8 +1,18 @@
 """
 dictionaries.py - Dictionnaires de mots pour l'analyse des biais
 Contient les listes de mots-clés pour détecter le sexisme, racisme, homophobie
+
+Les listes sont compilées une fois, à l'import, dans un registre figé
+(LEXICON) : token ou expression -> catégories, avec une empreinte de version
+utilisable comme clé de cache.
 """
 
+import hashlib
+import json
+import re
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, Optional, Sequence, Set, Tuple
+
 # ===== DICTIONNAIRE GENRE / SEXISME =====
 
 GENDER_WORDS = {
@@ -154,19 +164,18 @@ def get_all_bias_words() -> set:
     Retourne l'ensemble de tous les mots liés aux biais.
     Utile pour filtrer les scripts.
     """
-    all_words = set()
-    
-    # Parcourir tous les dictionnaires
-    for category_dict in [GENDER_WORDS, GENDER_STEREOTYPES, GENDERED_ROLES,
-                          ETHNICITY_WORDS, RACIAL_STEREOTYPES, LGBTQ_WORDS,
-                          ACTION_VERBS, ADJECTIVES]:
-        for word_list in category_dict.values():
-            all_words.update(word_list)
-    
-    # Ajouter les mots isolés
-    all_words.update(HOMOPHOBIC_CONTEXT)
-    
-    return all_words
+    # Copie : l'appelant peut modifier l'ensemble sans toucher au registre
+    return set(LEXICON.terms)
+
+
+# Catégories de get_category_words (préfixes des catégories du registre)
+_CATEGORY_GROUPS = {
+    'gender': ('gender', 'gender_stereotypes', 'gendered_roles'),
+    'race': ('ethnicity', 'racial_stereotypes'),
+    'lgbtq': ('lgbtq',),
+    'violence': ('action_verbs.violence',),
+    'power': ('action_verbs.power',)
+}
 
 
 def get_category_words(category: str) -> list:
@@ -179,24 +188,261 @@ def get_category_words(category: str) -> list:
     Returns:
         Liste des mots de cette catégorie
     """
-    category_map = {
-        'gender': [GENDER_WORDS, GENDER_STEREOTYPES, GENDERED_ROLES],
-        'race': [ETHNICITY_WORDS, RACIAL_STEREOTYPES],
-        'lgbtq': [LGBTQ_WORDS],
-        'violence': [ACTION_VERBS['violence']],
-        'power': [ACTION_VERBS['power']]
-    }
-    
-    words = []
-    if category in category_map:
-        for dict_or_list in category_map[category]:
-            if isinstance(dict_or_list, dict):
-                for word_list in dict_or_list.values():
-                    words.extend(word_list)
+    if category not in _CATEGORY_GROUPS:
+        return []
+    return list(LEXICON.word_set(*_CATEGORY_GROUPS[category]))
+
+
+# ===== REGISTRE DES LEXIQUES =====
+
+# Dictionnaires sources du registre : préfixe des identifiants de catégorie
+LEXICON_SOURCES = {
+    'gender': GENDER_WORDS,
+    'gender_stereotypes': GENDER_STEREOTYPES,
+    'gendered_roles': GENDERED_ROLES,
+    'ethnicity': ETHNICITY_WORDS,
+    'racial_stereotypes': RACIAL_STEREOTYPES,
+    'lgbtq': LGBTQ_WORDS,
+    'homophobic_context': HOMOPHOBIC_CONTEXT,
+    'action_verbs': ACTION_VERBS,
+    'adjectives': ADJECTIVES
+}
+
+# Séparateurs des expressions (ex: 'puerto rican', 'same-sex')
+_PHRASE_SEPARATOR = re.compile(r'[\s\-]+')
+_VOWELS = set('aeiou')
+
+
+def inflections(word: str) -> Set[str]:
+    """
+    Formes fléchies régulières d'un mot anglais (pluriel / 3e personne, -ing, -ed).
+    Règles simples, sans dictionnaire : quelques formes inexistantes sont
+    produites, elles ne correspondent simplement à aucun token.
+
+    Args:
+        word: Mot en minuscules
+
+    Returns:
+        Ensemble des formes (sans le mot lui-même)
+    """
+    if not word.isalpha() or len(word) < 3:
+        return set()
+
+    forms = set()
+    if word.endswith(('s', 'x', 'z', 'ch', 'sh')):
+        forms.add(word + 'es')
+    elif word.endswith('y') and word[-2] not in _VOWELS:
+        forms.add(word[:-1] + 'ies')
+    else:
+        forms.add(word + 's')
+
+    if word.endswith('e') and not word.endswith('ee'):
+        stem = word[:-1]
+        forms.update({stem + 'ing', word + 'd'})
+    elif word.endswith('y') and word[-2] not in _VOWELS:
+        forms.update({word + 'ing', word[:-1] + 'ied'})
+    else:
+        forms.update({word + 'ing', word + 'ed'})
+        # Consonne finale doublée (stab -> stabbed, sob -> sobbing)
+        if (len(word) <= 4 and word[-1] not in _VOWELS | set('wxy') and
+                word[-2] in _VOWELS and word[-3] not in _VOWELS):
+            forms.update({word + word[-1] + 'ing', word + word[-1] + 'ed'})
+
+    forms.discard(word)
+    return forms
+
+
+class LexiconRegistry:
+    """
+    Registre figé des lexiques : chaque terme (mot ou expression, en minuscules)
+    est associé à l'ensemble des catégories qui le contiennent.
+
+    Les mots présents dans plusieurs listes ('indian' : asian et native, 'queer' :
+    orientation et slurs) appartiennent à toutes leurs catégories ; un comptage par
+    catégorie compte le mot dans chacune, un comptage global une seule fois.
+    """
+
+    def __init__(self, categories: Mapping[str, Sequence[str]], inflected: bool = False):
+        """
+        Args:
+            categories: Dict {identifiant_catégorie: liste_de_mots}
+            inflected: Ajouter les formes fléchies des mots simples (voir inflections)
+        """
+        names = tuple(categories)
+        words = {name: tuple(dict.fromkeys(w.lower() for w in categories[name])) for name in names}
+
+        terms: Dict[str, Set[int]] = {}
+        for category_id, name in enumerate(names):
+            for word in words[name]:
+                terms.setdefault(word, set()).add(category_id)
+
+        # Formes fléchies : catégories du mot de base, sauf si la forme est elle-même un terme
+        expanded: Dict[str, Set[int]] = {}
+        if inflected:
+            for word, ids in terms.items():
+                for form in inflections(word):
+                    if form not in terms:
+                        expanded.setdefault(form, set()).update(ids)
+
+        phrases: Dict[Tuple[str, ...], Set[int]] = {}
+        for word, ids in terms.items():
+            parts = tuple(p for p in _PHRASE_SEPARATOR.split(word) if p)
+            if len(parts) > 1:
+                phrases.setdefault(parts, set()).update(ids)
+
+        object.__setattr__(self, 'categories', names)
+        object.__setattr__(self, 'category_index', MappingProxyType({n: i for i, n in enumerate(names)}))
+        object.__setattr__(self, 'words', MappingProxyType(words))
+        object.__setattr__(self, 'terms', MappingProxyType(
+            {w: frozenset(ids) for w, ids in terms.items()}))
+        object.__setattr__(self, 'tokens', MappingProxyType(
+            {**{w: frozenset(ids) for w, ids in terms.items() if len(_PHRASE_SEPARATOR.split(w)) == 1},
+             **{w: frozenset(ids) for w, ids in expanded.items()}}))
+        object.__setattr__(self, 'phrases', MappingProxyType(
+            {p: frozenset(ids) for p, ids in phrases.items()}))
+        object.__setattr__(self, 'max_phrase_length', max((len(p) for p in phrases), default=1))
+        object.__setattr__(self, 'inflected', inflected)
+        object.__setattr__(self, 'version', hashlib.sha256(json.dumps(
+            {'categories': [[n, list(words[n])] for n in names], 'inflected': inflected}
+        ).encode('utf-8')).hexdigest()[:16])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("LexiconRegistry est en lecture seule")
+
+    @classmethod
+    def from_dictionaries(cls, inflected: bool = False) -> 'LexiconRegistry':
+        """
+        Registre de tous les lexiques de ce module (catégories 'source.clé',
+        ex: 'gender.female', 'ethnicity.asian', 'homophobic_context').
+        """
+        categories = {}
+        for source, lexicon in LEXICON_SOURCES.items():
+            if isinstance(lexicon, dict):
+                for key, words in lexicon.items():
+                    categories[f'{source}.{key}'] = words
             else:
-                words.extend(dict_or_list)
-    
-    return list(set(words))
+                categories[source] = lexicon
+        return cls(categories, inflected)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self.tokens
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def lookup(self, token: str) -> FrozenSet[int]:
+        """
+        Identifiants des catégories d'un token (ensemble vide s'il n'est dans aucune).
+        """
+        return self.tokens.get(token, frozenset())
+
+    def categories_of(self, term: str) -> List[str]:
+        """
+        Noms des catégories d'un terme (mot, forme fléchie ou expression).
+        """
+        ids = self.terms.get(term) or self.tokens.get(term) or frozenset()
+        return [self.categories[i] for i in sorted(ids)]
+
+    def category_ids(self, *prefixes: str) -> List[int]:
+        """
+        Identifiants des catégories désignées par nom exact ou par préfixe de source
+        (ex: 'ethnicity' -> toutes les catégories 'ethnicity.*').
+        """
+        return [i for i, name in enumerate(self.categories)
+                if any(name == p or name.startswith(p + '.') for p in prefixes)]
+
+    def word_set(self, *prefixes: str) -> FrozenSet[str]:
+        """
+        Termes des catégories désignées (nom exact ou préfixe de source).
+        """
+        return frozenset(w for i in self.category_ids(*prefixes) for w in self.words[self.categories[i]])
+
+    def token_matrix(self, token_ids: Mapping[str, int], size: Optional[int] = None,
+                     categories: Optional[Sequence[str]] = None):
+        """
+        Table vocabulaire × catégories pour les boucles sur des identifiants de tokens
+        (ex: TokenCache.token_ids) : matrix[ids] donne les catégories de chaque token.
+
+        Args:
+            token_ids: Dict {token: identifiant}
+            size: Taille du vocabulaire (par défaut max(identifiants) + 1)
+            categories: Catégories des colonnes (par défaut toutes)
+
+        Returns:
+            Tableau numpy booléen (size × catégories)
+        """
+        import numpy as np
+
+        columns = list(categories) if categories is not None else list(self.categories)
+        column_of = {self.category_index[name]: j for j, name in enumerate(columns)}
+        if size is None:
+            size = max(token_ids.values(), default=-1) + 1
+
+        matrix = np.zeros((size, len(columns)), dtype=bool)
+        for token, ids in self.tokens.items():
+            row = token_ids.get(token)
+            if row is None or row >= size:
+                continue
+            for category_id in ids:
+                if category_id in column_of:
+                    matrix[row, column_of[category_id]] = True
+        return matrix
+
+    def match_tokens(self, tokens: Sequence[str]) -> List[Tuple[int, int, FrozenSet[int]]]:
+        """
+        Termes trouvés dans une suite de tokens, expressions comprises
+        (['puerto', 'rican'] -> 'puerto rican'). L'expression la plus longue l'emporte.
+
+        Args:
+            tokens: Tokens en minuscules
+
+        Returns:
+            Liste de (position, nombre_de_tokens, identifiants_de_catégories)
+        """
+        matches = []
+        phrases = self.phrases
+        longest = self.max_phrase_length
+        i, n = 0, len(tokens)
+        while i < n:
+            for length in range(min(longest, n - i), 1, -1):
+                ids = phrases.get(tuple(tokens[i:i + length]))
+                if ids is not None:
+                    matches.append((i, length, ids))
+                    i += length
+                    break
+            else:
+                ids = self.tokens.get(tokens[i])
+                if ids is not None:
+                    matches.append((i, 1, ids))
+                i += 1
+        return matches
+
+    def with_categories(self, extra: Mapping[str, Sequence[str]]) -> 'LexiconRegistry':
+        """
+        Nouveau registre avec des catégories ajoutées (ou remplacées).
+        """
+        categories = {name: self.words[name] for name in self.categories}
+        categories.update(extra)
+        return LexiconRegistry(categories, self.inflected)
+
+
+# Registre construit une fois à l'import ; LEXICON.version sert de clé de cache
+LEXICON = LexiconRegistry.from_dictionaries()
+LEXICON_VERSION = LEXICON.version
+
+_INFLECTED_LEXICON: Optional[LexiconRegistry] = None
+
+
+def get_lexicon(inflected: bool = False) -> LexiconRegistry:
+    """
+    Registre des lexiques (avec ou sans formes fléchies, construit au premier appel).
+    """
+    global _INFLECTED_LEXICON
+    if not inflected:
+        return LEXICON
+    if _INFLECTED_LEXICON is None:
+        _INFLECTED_LEXICON = LexiconRegistry.from_dictionaries(inflected=True)
+    return _INFLECTED_LEXICON
 
 
 if __name__ == "__main__":
@@ -205,3 +451,6 @@ if __name__ == "__main__":
     print(f"\nMots liés au genre: {len(get_category_words('gender'))}")
     print(f"Mots liés à la race: {len(get_category_words('race'))}")
     print(f"Mots liés à LGBTQ: {len(get_category_words('lgbtq'))}")
+    print(f"\nRegistre : {len(LEXICON.categories)} catégories, version {LEXICON_VERSION}")
+    print(f"'indian' -> {LEXICON.categories_of('indian')}")
+    print(f"'queer' -> {LEXICON.categories_of('queer')}")
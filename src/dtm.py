@@ -0,0 +1,252 @@
+"""
+dtm.py - Matrice documents × termes du lexique (films × mots-clés)
+Construit une fois une matrice creuse des comptes des mots de dictionaries.py,
+puis calcule densités, ratios et scores par film par opérations matricielles.
+
+Définition commune aux notebooks 1 à 3 : un terme est compté avec des
+limites de mots (\\b...\\b, comme calculate_word_frequency) et la densité est
+exprimée pour 1000 mots (mots séparés par des espaces).
+
+Les densités de biais du notebook 4 (sexism_density, racism_density,
+homophobia_density, total_bias_density) ont leur propre définition,
+bias_densities : lexiques evolution_lexicons, pour 1000 tokens alphabétiques.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from counts import SCRIPT_COUNTS, ScriptCountCache
+
+
+def stereotype_categories() -> Dict[str, List[str]]:
+    """
+    Lexiques des scores de stéréotypes (notebook 3).
+    """
+    from dictionaries import GENDER_STEREOTYPES, RACIAL_STEREOTYPES, LGBTQ_WORDS, HOMOPHOBIC_CONTEXT
+
+    return {
+        'sexism': GENDER_STEREOTYPES['female_negative'] + GENDER_STEREOTYPES['female_objectification'],
+        'racism': (RACIAL_STEREOTYPES['criminal'] + RACIAL_STEREOTYPES['exotic'] +
+                   RACIAL_STEREOTYPES['poverty']),
+        'homophobia': LGBTQ_WORDS['slurs'] + HOMOPHOBIC_CONTEXT
+    }
+
+
+def evolution_lexicons() -> Dict[str, List[str]]:
+    """
+    Lexiques de densité du notebook 4 (sexisme, racisme, homophobie).
+    """
+    from dictionaries import (GENDER_STEREOTYPES, GENDERED_ROLES, RACIAL_STEREOTYPES,
+                              LGBTQ_WORDS, HOMOPHOBIC_CONTEXT)
+
+    domestic_roles = GENDERED_ROLES['female_domestic'] if 'female_domestic' in GENDERED_ROLES else \
+        ['housewife', 'mother', 'nurse', 'secretary', 'maid', 'cook', 'babysitter']
+    return {
+        'sexism': (GENDER_STEREOTYPES['female_objectification'] +
+                   GENDER_STEREOTYPES['female_negative'] + domestic_roles),
+        'racism': (RACIAL_STEREOTYPES['criminal'] + RACIAL_STEREOTYPES['poverty'] +
+                   RACIAL_STEREOTYPES['exotic'] +
+                   ['savage', 'primitive', 'inferior', 'slave', 'servant', 'subordinate']),
+        'homophobia': ((LGBTQ_WORDS['slurs'] if 'slurs' in LGBTQ_WORDS else []) +
+                       HOMOPHOBIC_CONTEXT + ['deviant', 'abnormal', 'unnatural', 'pervert', 'sick'])
+    }
+
+
+def bias_densities(corpus_ids: Iterable, token_ids: Dict[str, int],
+                   vocabulary_size: Optional[int] = None) -> pd.DataFrame:
+    """
+    Densités de biais par film du notebook 4 (bias_density_by_film.csv) :
+    tokens des lexiques evolution_lexicons pour 1000 tokens alphabétiques.
+
+    Args:
+        corpus_ids: Identifiants des tokens de chaque film (ex: TokenCache.ids, tokeniseur nltk)
+        token_ids: Dict {token: identifiant} (ex: TokenCache.token_ids)
+        vocabulary_size: Taille du vocabulaire (par défaut max(identifiants) + 1)
+
+    Returns:
+        DataFrame (sexism_density, racism_density, homophobia_density, total_bias_density)
+    """
+    from dictionaries import LexiconRegistry
+
+    # Identifiants lus avant la table : un TokenCache étend son vocabulaire à la lecture
+    corpus_ids = [np.asarray(ids, dtype=np.int64) for ids in corpus_ids]
+    registry = LexiconRegistry(evolution_lexicons())
+    token_matrix = registry.token_matrix(token_ids, vocabulary_size)
+    columns = [f'{name}_density' for name in registry.categories]
+
+    rows = []
+    for ids in corpus_ids:
+        if len(ids) == 0:
+            rows.append(np.zeros(len(columns)))
+            continue
+        rows.append(token_matrix[ids].sum(axis=0) / len(ids) * 1000)
+
+    densities = pd.DataFrame(np.array(rows, dtype=float).reshape(-1, len(columns)), columns=columns)
+    densities['total_bias_density'] = densities[columns].sum(axis=1)
+    return densities
+
+
+class LexiconDTM:
+    """
+    Matrice creuse films × termes du lexique, avec le nombre de mots de chaque film.
+    """
+
+    def __init__(self, matrix: sparse.csr_matrix,
+                 vocabulary: List[str],
+                 total_words: np.ndarray,
+                 index: Optional[pd.Index] = None):
+        """
+        Args:
+            matrix: Comptes (films × termes)
+            vocabulary: Terme de chaque colonne
+            total_words: Nombre de mots de chaque film
+            index: Index des films (ex: index du DataFrame source)
+        """
+        self.matrix = sparse.csr_matrix(matrix)
+        self.vocabulary = list(vocabulary)
+        self.word_index = {w: i for i, w in enumerate(self.vocabulary)}
+        self.total_words = np.asarray(total_words, dtype=np.int64)
+        self.index = index if index is not None else pd.RangeIndex(self.matrix.shape[0])
+
+    @classmethod
+    def from_texts(cls, texts: Iterable,
+                   extra_words: Sequence[str] = (),
+                   cache: Optional[ScriptCountCache] = None,
+                   index: Optional[pd.Index] = None) -> 'LexiconDTM':
+        """
+        Construit la matrice à partir des textes (un seul parcours par script, mis en cache).
+
+        Args:
+            texts: Textes des films (ex: df['clean_text'])
+            extra_words: Mots à ajouter au vocabulaire de dictionaries.py
+            cache: Cache des vecteurs de comptes (par défaut le cache partagé)
+            index: Index des films
+
+        Returns:
+            LexiconDTM
+        """
+        if cache is None:
+            cache = SCRIPT_COUNTS
+        if index is None and isinstance(texts, pd.Series):
+            index = texts.index
+
+        cache.add_words(extra_words)
+        dense, totals = cache.count_matrix(texts)
+        return cls(sparse.csr_matrix(dense), cache.vocabulary, totals, index)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, text_column: str = 'clean_text',
+                       extra_words: Sequence[str] = ()) -> 'LexiconDTM':
+        """
+        Construit la matrice à partir d'un DataFrame de scripts.
+        """
+        return cls.from_texts(df[text_column], extra_words=extra_words, index=df.index)
+
+    def _indicator(self, categories: Dict[str, List[str]]) -> sparse.csr_matrix:
+        """
+        Matrice termes × catégories (1 si le terme appartient à la catégorie).
+        Un mot répété dans une liste n'est compté qu'une fois.
+        """
+        from dictionaries import LexiconRegistry
+
+        registry = LexiconRegistry(categories)
+        rows, cols = [], []
+        for j, name in enumerate(registry.categories):
+            for word in registry.words[name]:
+                if word not in self.word_index:
+                    raise KeyError(f"Terme absent du vocabulaire : '{word}' "
+                                   f"(utiliser extra_words à la construction)")
+                rows.append(self.word_index[word])
+                cols.append(j)
+        data = np.ones(len(rows), dtype=np.int64)
+        return sparse.csr_matrix((data, (rows, cols)),
+                                 shape=(len(self.vocabulary), len(categories)))
+
+    def category_counts(self, categories: Dict[str, List[str]]) -> pd.DataFrame:
+        """
+        Occurrences par film et par catégorie (scores du notebook 3).
+
+        Args:
+            categories: Dict {nom_catégorie: liste_de_mots}
+
+        Returns:
+            DataFrame films × catégories
+        """
+        counts = (self.matrix @ self._indicator(categories)).toarray()
+        return pd.DataFrame(counts, index=self.index, columns=list(categories))
+
+    def densities(self, categories: Dict[str, List[str]]) -> pd.DataFrame:
+        """
+        Densités par film (occurrences pour 1000 mots), comme calculate_relative_frequency.
+
+        Args:
+            categories: Dict {nom_catégorie: liste_de_mots}
+
+        Returns:
+            DataFrame films × catégories
+        """
+        counts = self.category_counts(categories).to_numpy(dtype=float)
+        totals = self.total_words[:, None].astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            density = np.where(totals > 0, counts / totals * 1000, 0.0)
+        return pd.DataFrame(density, index=self.index, columns=list(categories))
+
+    def ratio(self, numerator: List[str], denominator: List[str]) -> pd.Series:
+        """
+        Ratio par film de deux catégories (ex: femmes/hommes, minorités/blancs).
+        NaN si le dénominateur est nul.
+        """
+        counts = self.category_counts({'num': numerator, 'den': denominator})
+        return counts['num'] / counts['den'].replace(0, np.nan)
+
+    def film_scores(self) -> pd.DataFrame:
+        """
+        Scores standard par film : densités de genre, groupes ethniques et
+        stéréotypes, ratios femmes/hommes et minorités/blancs, scores du notebook 3.
+        Les densités de stéréotypes (<catégorie>_stereotype_density) reprennent les
+        lexiques du notebook 3 ; les densités du notebook 4 sont données par bias_densities.
+
+        Returns:
+            DataFrame indexé comme les films
+        """
+        from dictionaries import GENDER_WORDS, ETHNICITY_WORDS
+
+        minorities = [w for group, words in ETHNICITY_WORDS.items()
+                      if group != 'white' for w in words]
+
+        stereotypes = stereotype_categories()
+        scores = self.category_counts(stereotypes).add_suffix('_score')
+        scores['total_score'] = scores.sum(axis=1)
+
+        densities = self.densities({
+            'female_freq': GENDER_WORDS['female'],
+            'male_freq': GENDER_WORDS['male'],
+            **{f'{group}_freq': words for group, words in ETHNICITY_WORDS.items()},
+            **{f'{name}_stereotype_density': words for name, words in stereotypes.items()}
+        })
+        densities['total_stereotype_density'] = densities[
+            [f'{name}_stereotype_density' for name in stereotypes]
+        ].sum(axis=1)
+
+        ratios = pd.DataFrame({
+            'gender_ratio_film': self.ratio(GENDER_WORDS['female'], GENDER_WORDS['male']),
+            'minority_white_ratio': self.ratio(minorities, ETHNICITY_WORDS['white'])
+        })
+
+        return pd.concat([densities, ratios, scores], axis=1)
+
+
+if __name__ == "__main__":
+    from dictionaries import GENDER_WORDS
+
+    texts = pd.Series([
+        "The woman was beautiful and emotional.",
+        "The man was strong and brave. The woman cried.",
+        None
+    ])
+    dtm = LexiconDTM.from_texts(texts)
+    print(dtm.densities(GENDER_WORDS))
+    print(dtm.film_scores()[['gender_ratio_film', 'sexism_score', 'sexism_stereotype_density']])
@@ -0,0 +1,342 @@
+"""
+embeddings.py - Word2Vec diachronique (un modèle par décennie)
+Les scripts sont tokenisés une seule fois (TokenCache), les décennies sont
+entraînées en parallèle, et les vecteurs sont sauvegardés sur disque : un
+modèle n'est ré-entraîné que si ses textes ou ses hyperparamètres changent.
+Les espaces des décennies sont ensuite alignés (Procrustes orthogonal) sur un
+vocabulaire commun pour comparer les vecteurs d'une décennie à l'autre.
+
+gensim n'est requis que pour entraîner de nouveaux modèles.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from token_cache import TokenCache
+
+
+# Hyperparamètres du notebook 4. Le cache est indexé sur les tokens et ces
+# paramètres, mais avec workers > 1 l'entraînement gensim n'est pas déterministe
+# malgré le seed : passer params={'workers': 1} (et lancer Python avec
+# PYTHONHASHSEED fixé) pour obtenir des vecteurs reproductibles.
+DEFAULT_PARAMS = {
+    'vector_size': 100,
+    'window': 5,
+    'min_count': 5,
+    'sg': 1,  # Skip-gram
+    'epochs': 10,
+    'seed': 1,
+    'workers': 4
+}
+
+# Pôles sémantiques et groupes sociaux du notebook 4
+POWER_AGENCY_WORDS = ['power', 'strong', 'lead', 'control', 'command', 'independent',
+                      'confident', 'capable', 'authority', 'decision']
+
+SUBMISSION_WORDS = ['weak', 'submissive', 'obedient', 'passive', 'helpless',
+                    'dependent', 'inferior', 'subordinate']
+
+TARGET_GROUPS = {
+    'Femmes': ['woman', 'women', 'female', 'girl'],
+    'Afro-Américains': ['black', 'african'],
+    'LGBTQ+': ['gay', 'lesbian', 'queer']
+}
+
+
+class DiachronicEmbeddings:
+    """
+    Vecteurs de mots par décennie, et leur version alignée sur un vocabulaire commun.
+    """
+
+    def __init__(self, vectors: Dict[int, np.ndarray],
+                 vocabularies: Dict[int, List[str]]):
+        """
+        Args:
+            vectors: Dict {décennie: matrice (mots × dimensions)}
+            vocabularies: Dict {décennie: mot de chaque ligne}
+        """
+        self.decades = sorted(vectors)
+        self.vectors = vectors
+        self.vocabularies = vocabularies
+        self.word_index = {decade: {w: i for i, w in enumerate(vocab)}
+                           for decade, vocab in vocabularies.items()}
+        self.common_vocabulary: List[str] = []
+        self.aligned: Dict[int, np.ndarray] = {}
+
+    def similarity(self, decade: int, word1: str, word2: str) -> float:
+        """
+        Similarité cosinus de deux mots dans une décennie (comme model.wv.similarity).
+        """
+        index = self.word_index[decade]
+        a = self.vectors[decade][index[word1]]
+        b = self.vectors[decade][index[word2]]
+        return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+    def align(self, reference: Optional[int] = None) -> None:
+        """
+        Aligne toutes les décennies sur une décennie de référence (la plus récente par
+        défaut) par Procrustes orthogonal, sur les mots présents dans toutes les décennies.
+        Remplit self.common_vocabulary et self.aligned (vecteurs normalisés, mots communs).
+        """
+        if not self.decades:
+            return
+        if reference is None:
+            reference = self.decades[-1]
+
+        common = set(self.vocabularies[reference])
+        for decade in self.decades:
+            common &= set(self.vocabularies[decade])
+        # Ordre du vocabulaire de référence (mots fréquents en premier)
+        self.common_vocabulary = [w for w in self.vocabularies[reference] if w in common]
+
+        target = self._normalized_rows(reference)
+        self.aligned = {}
+        for decade in self.decades:
+            source = self._normalized_rows(decade)
+            if decade == reference or not len(source):
+                self.aligned[decade] = source
+                continue
+            u, _, vt = np.linalg.svd(source.T @ target)
+            self.aligned[decade] = (source @ (u @ vt)).astype(np.float32)
+
+    def _normalized_rows(self, decade: int) -> np.ndarray:
+        index = self.word_index[decade]
+        rows = self.vectors[decade][[index[w] for w in self.common_vocabulary]]
+        norms = np.linalg.norm(rows, axis=1, keepdims=True)
+        return (rows / np.where(norms > 0, norms, 1)).astype(np.float32)
+
+    def save_aligned(self, path: str) -> None:
+        """
+        Sauvegarde les vecteurs alignés (.npz).
+        """
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, vocabulary=np.array(self.common_vocabulary, dtype=str),
+                 **{str(decade): matrix for decade, matrix in self.aligned.items()})
+        os.replace(tmp_path, path)
+
+    def load_aligned(self, path: str) -> None:
+        """
+        Recharge des vecteurs alignés sauvegardés par save_aligned.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            self.common_vocabulary = data['vocabulary'].tolist()
+            self.aligned = {int(key): data[key] for key in data.files if key != 'vocabulary'}
+
+
+def _train_decade(sentences: List[np.ndarray], vocabulary: List[str],
+                  params: Dict, model_dir: str) -> str:
+    """
+    Entraîne un Word2Vec sur les scripts d'une décennie et sauvegarde ses vecteurs.
+    Exécutée dans un processus séparé : les scripts arrivent en identifiants int32.
+    """
+    try:
+        from gensim.models import Word2Vec
+    except ImportError as e:
+        raise ImportError("gensim est requis pour entraîner les modèles "
+                          "(pip install gensim)") from e
+
+    decoded = [[vocabulary[i] for i in ids.tolist()] for ids in sentences]
+    model = Word2Vec(sentences=decoded, **params)
+
+    tmp_dir = model_dir + '.tmp'
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, 'vectors.npy'), model.wv.vectors.astype(np.float32))
+    with open(os.path.join(tmp_dir, 'vocab.txt'), 'w', encoding='utf-8') as f:
+        f.write(''.join(w + '\n' for w in model.wv.index_to_key))
+    with open(os.path.join(tmp_dir, 'params.json'), 'w', encoding='utf-8') as f:
+        json.dump(params, f, indent=2)
+    os.replace(tmp_dir, model_dir)
+    return model_dir
+
+
+def _load_model(model_dir: str):
+    vectors = np.load(os.path.join(model_dir, 'vectors.npy'))
+    with open(os.path.join(model_dir, 'vocab.txt'), 'r', encoding='utf-8') as f:
+        vocabulary = [line.rstrip('\n') for line in f]
+    return vectors, vocabulary
+
+
+def _decade_fingerprint(sentences: List[np.ndarray], token_cache: TokenCache, params: Dict) -> str:
+    """
+    Empreinte d'un modèle : tokens des scripts de la décennie + hyperparamètres.
+    """
+    h = hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8'))
+    h.update(token_cache.fingerprint.encode('utf-8'))
+    for ids in sentences:
+        h.update(len(ids).to_bytes(8, 'little'))
+        h.update(np.ascontiguousarray(ids, dtype=np.int32).tobytes())
+    return h.hexdigest()[:16]
+
+
+def train_diachronic(df: pd.DataFrame,
+                     cache_dir: str,
+                     text_column: str = 'clean_text',
+                     params: Optional[Dict] = None,
+                     token_cache: Optional[TokenCache] = None,
+                     n_workers: int = 1,
+                     min_tokens: int = 10,
+                     min_scripts: int = 5,
+                     reference: Optional[int] = None) -> DiachronicEmbeddings:
+    """
+    Entraîne (ou recharge du cache) un Word2Vec par décennie, puis aligne les décennies.
+
+    Args:
+        df: DataFrame des scripts (avec 'decade' ou 'release_year')
+        cache_dir: Dossier du cache (tokens, modèles, vecteurs alignés)
+        text_column: Colonne du texte nettoyé
+        params: Hyperparamètres Word2Vec (complètent DEFAULT_PARAMS ;
+            {'workers': 1} avec PYTHONHASHSEED fixé pour un résultat reproductible)
+        token_cache: Cache des tokens (par défaut cache_dir/tokens, tokeniseur nltk)
+        n_workers: Nombre de décennies entraînées en parallèle
+        min_tokens: Un script doit avoir plus de min_tokens tokens
+        min_scripts: Une décennie doit avoir au moins min_scripts scripts
+        reference: Décennie de référence de l'alignement (la plus récente par défaut)
+
+    Returns:
+        DiachronicEmbeddings alignés
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    if token_cache is None:
+        token_cache = TokenCache(os.path.join(cache_dir, 'tokens'))
+    models_dir = os.path.join(cache_dir, 'models')
+    os.makedirs(models_dir, exist_ok=True)
+
+    decades = df['decade'] if 'decade' in df.columns else (df['release_year'] // 10) * 10
+
+    # Corpus tokenisé partagé : identifiants int32 de chaque script, par décennie
+    jobs = {}
+    model_dirs = {}
+    for decade in sorted(decades.dropna().unique()):
+        decade = int(decade)
+        sentences = []
+        for text in df.loc[decades == decade, text_column]:
+            ids = np.asarray(token_cache.ids(text))
+            if len(ids) > min_tokens:
+                sentences.append(ids)
+        if len(sentences) < min_scripts:
+            continue
+
+        fingerprint = _decade_fingerprint(sentences, token_cache, params)
+        model_dir = os.path.join(models_dir, f"{decade}_{fingerprint}")
+        model_dirs[decade] = model_dir
+        if not os.path.exists(model_dir):
+            jobs[decade] = sentences
+
+    if jobs:
+        vocabulary = token_cache.vocabulary
+        if n_workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                futures = [executor.submit(_train_decade, sentences, vocabulary, params,
+                                           model_dirs[decade])
+                           for decade, sentences in jobs.items()]
+                for future in futures:
+                    future.result()
+        else:
+            for decade, sentences in jobs.items():
+                _train_decade(sentences, vocabulary, params, model_dirs[decade])
+
+    vectors, vocabularies = {}, {}
+    for decade, model_dir in model_dirs.items():
+        vectors[decade], vocabularies[decade] = _load_model(model_dir)
+    embeddings = DiachronicEmbeddings(vectors, vocabularies)
+
+    # Alignement calculé une fois pour un jeu de modèles donné
+    key = hashlib.sha256(json.dumps(
+        [os.path.basename(model_dirs[d]) for d in sorted(model_dirs)] + [reference]
+    ).encode('utf-8')).hexdigest()[:16]
+    aligned_path = os.path.join(cache_dir, f"aligned_{key}.npz")
+    if os.path.exists(aligned_path):
+        embeddings.load_aligned(aligned_path)
+    else:
+        embeddings.align(reference)
+        embeddings.save_aligned(aligned_path)
+
+    return embeddings
+
+
+def calculate_semantic_proximity(embeddings: DiachronicEmbeddings, decade: int,
+                                 target_words: List[str], reference_words: List[str]) -> float:
+    """
+    Similarité cosinus moyenne entre deux ensembles de mots dans une décennie
+    (mots absents ignorés, 0.0 si aucune paire), comme dans le notebook 4.
+    """
+    index = embeddings.word_index[decade]
+    targets = [index[w] for w in target_words if w in index]
+    references = [index[w] for w in reference_words if w in index]
+    if not targets or not references:
+        return 0.0
+
+    matrix = embeddings.vectors[decade]
+    a = matrix[targets] / np.linalg.norm(matrix[targets], axis=1, keepdims=True)
+    b = matrix[references] / np.linalg.norm(matrix[references], axis=1, keepdims=True)
+    return float(np.mean(a @ b.T))
+
+
+def semantic_proximity_evolution(embeddings: DiachronicEmbeddings,
+                                 groups: Optional[Dict[str, List[str]]] = None,
+                                 power_words: Optional[List[str]] = None,
+                                 submission_words: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Proximité de chaque groupe social avec les pôles Power/Agency et Submission,
+    par décennie (table semantic_proximity_evolution.csv du notebook 4).
+
+    Returns:
+        DataFrame (decade, group, power_similarity, submission_similarity, empowerment_ratio)
+    """
+    groups = groups or TARGET_GROUPS
+    power_words = power_words or POWER_AGENCY_WORDS
+    submission_words = submission_words or SUBMISSION_WORDS
+
+    from semantic_query import SemanticQueryEngine
+
+    # Tous les groupes × les deux pôles × toutes les décennies en une requête
+    means, _ = SemanticQueryEngine(embeddings).similarity_blocks(
+        groups, {'power': power_words, 'submission': submission_words})
+
+    results = []
+    for d, decade in enumerate(embeddings.decades):
+        for g, group_label in enumerate(groups):
+            power_sim = float(means[d, g, 0])
+            submission_sim = float(means[d, g, 1])
+            results.append({
+                'decade': decade,
+                'group': group_label,
+                'power_similarity': power_sim,
+                'submission_similarity': submission_sim,
+                'empowerment_ratio': power_sim / submission_sim if submission_sim > 0 else power_sim
+            })
+    return pd.DataFrame(results)
+
+
+def write_semantic_proximity(embeddings: DiachronicEmbeddings,
+                             output_path: str = '../results/semantic_proximity_evolution.csv') -> pd.DataFrame:
+    """
+    Calcule et sauvegarde la table de proximité sémantique.
+    """
+    df_proximity = semantic_proximity_evolution(embeddings)
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    df_proximity.to_csv(output_path, index=False)
+    print(f"✓ Proximité sémantique : {output_path}")
+    return df_proximity
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3:
+        print("Usage: python embeddings.py scripts_clean.pkl cache_dir [n_workers]")
+        sys.exit(1)
+
+    df = pd.read_pickle(sys.argv[1])
+    embeddings = train_diachronic(df, sys.argv[2],
+                                  n_workers=int(sys.argv[3]) if len(sys.argv) > 3 else 1)
+    print(write_semantic_proximity(embeddings).round(3))
@@ -0,0 +1,343 @@
+"""
+figures.py - Graphiques des notebooks, générés à partir des tables de résultats
+Chaque fonction reproduit les figures d'un notebook (mêmes tracés, mêmes noms
+de fichiers dans results/figures) sans exécuter le notebook.
+"""
+
+import os
+from typing import List
+
+import pandas as pd
+
+
+def _pyplot():
+    """
+    matplotlib en mode non interactif (exécution sans affichage).
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _save(plt, fig, output_dir: str, filename: str) -> str:
+    path = os.path.join(output_dir, filename)
+    plt.tight_layout()
+    fig.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+    return path
+
+
+def plot_gender_figures(df_gender: pd.DataFrame, df_films: pd.DataFrame,
+                        output_dir: str) -> List[str]:
+    """
+    Figures du notebook 1 (mentions, ratio, stéréotypes, distribution du ratio par film).
+
+    Args:
+        df_gender: Résultats par décennie (gender_bias_by_decade.csv)
+        df_films: Résultats par film (gender_bias_by_film.csv)
+        output_dir: Dossier results/figures
+
+    Returns:
+        Chemins des figures
+    """
+    import seaborn as sns
+
+    plt = _pyplot()
+    sns.set_style('whitegrid')
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+
+    # Mentions de femmes vs hommes
+    fig, ax = plt.subplots(figsize=(14, 6))
+    x = df_gender['decade']
+    width = 3.5
+    ax.bar(x - width/2, df_gender['female_mentions_freq'], width, label='Femmes', alpha=0.8, color='coral')
+    ax.bar(x + width/2, df_gender['male_mentions_freq'], width, label='Hommes', alpha=0.8, color='steelblue')
+    ax.set_xlabel('Décennie', fontsize=12)
+    ax.set_ylabel('Fréquence (pour 1000 mots)', fontsize=12)
+    ax.set_title('Mentions de Femmes vs Hommes dans les Scripts de Films (1960-2020)', fontsize=14, fontweight='bold')
+    ax.legend()
+    ax.grid(axis='y', alpha=0.3)
+    paths.append(_save(plt, fig, output_dir, 'gender_mentions_by_decade.png'))
+
+    # Ratio Femmes/Hommes
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.plot(df_gender['decade'], df_gender['gender_ratio'], marker='o', linewidth=2.5,
+            markersize=8, color='purple')
+    ax.axhline(y=1.0, color='red', linestyle='--', linewidth=1.5, label='Parité (ratio = 1.0)')
+    ax.set_xlabel('Décennie', fontsize=12)
+    ax.set_ylabel('Ratio Femmes/Hommes', fontsize=12)
+    ax.set_title('Évolution du Ratio Mentions Femmes/Hommes', fontsize=14, fontweight='bold')
+    ax.legend()
+    ax.grid(alpha=0.3)
+    for _, row in df_gender.iterrows():
+        ax.annotate(f"{row['gender_ratio']:.2f}",
+                    xy=(row['decade'], row['gender_ratio']),
+                    xytext=(0, 10), textcoords='offset points',
+                    ha='center', fontsize=9)
+    paths.append(_save(plt, fig, output_dir, 'gender_ratio_evolution.png'))
+
+    # Stéréotypes
+    fig, axes = plt.subplots(1, 2, figsize=(16, 6))
+    axes[0].plot(df_gender['decade'], df_gender['female_negative_stereotypes'],
+                 marker='o', linewidth=2, markersize=7, color='darkred', label='Stéréotypes négatifs')
+    axes[0].plot(df_gender['decade'], df_gender['female_objectification'],
+                 marker='s', linewidth=2, markersize=7, color='orange', label='Objectification')
+    axes[0].set_title('Stéréotypes sur les Femmes', fontsize=13, fontweight='bold')
+    axes[0].set_xlabel('Décennie')
+    axes[0].set_ylabel('Fréquence (pour 1000 mots)')
+    axes[0].legend()
+    axes[0].grid(alpha=0.3)
+    axes[1].plot(df_gender['decade'], df_gender['male_stereotypes'],
+                 marker='o', linewidth=2, markersize=7, color='navy')
+    axes[1].set_title('Stéréotypes sur les Hommes (force, domination)', fontsize=13, fontweight='bold')
+    axes[1].set_xlabel('Décennie')
+    axes[1].set_ylabel('Fréquence (pour 1000 mots)')
+    axes[1].grid(alpha=0.3)
+    paths.append(_save(plt, fig, output_dir, 'gender_stereotypes.png'))
+
+    # Distribution des ratios par film
+    fig, ax = plt.subplots(figsize=(14, 6))
+    df_boxplot = df_films[df_films['gender_ratio_film'].notna()].copy()
+    sns.boxplot(data=df_boxplot, x='decade', y='gender_ratio_film', ax=ax, palette='Set2')
+    ax.axhline(y=1.0, color='red', linestyle='--', linewidth=1.5, label='Parité')
+    ax.set_xlabel('Décennie', fontsize=12)
+    ax.set_ylabel('Ratio Femmes/Hommes (par film)', fontsize=12)
+    ax.set_title('Distribution du Ratio Genre par Film et par Décennie', fontsize=14, fontweight='bold')
+    ax.legend()
+    ax.set_ylim(0, 2)
+    paths.append(_save(plt, fig, output_dir, 'gender_ratio_distribution.png'))
+
+    return paths
+
+
+def plot_ethnic_figures(df_racial: pd.DataFrame, df_films: pd.DataFrame,
+                        output_dir: str) -> List[str]:
+    """
+    Figures du notebook 2 (mentions des groupes, stéréotypes, ratio minorités/blancs,
+    distribution de la diversité).
+
+    Args:
+        df_racial: Résultats par décennie (ethnic_bias_by_decade.csv)
+        df_films: Résultats par film (ethnic_bias_by_film.csv)
+        output_dir: Dossier results/figures
+
+    Returns:
+        Chemins des figures
+    """
+    import seaborn as sns
+
+    plt = _pyplot()
+    sns.set_style('whitegrid')
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+
+    # Mentions des groupes ethniques
+    fig, ax = plt.subplots(figsize=(14, 7))
+    ethnic_groups = ['african_american', 'asian', 'hispanic', 'white', 'native', 'middle_eastern']
+    colors = ['#e74c3c', '#f39c12', '#9b59b6', '#3498db', '#2ecc71', '#1abc9c']
+    for group, color in zip(ethnic_groups, colors):
+        col_name = f'{group}_freq'
+        if col_name in df_racial.columns:
+            ax.plot(df_racial['decade'], df_racial[col_name],
+                    marker='o', linewidth=2.5, markersize=8,
+                    label=group.replace('_', ' ').title(), color=color)
+    ax.set_xlabel('Décennie', fontsize=12)
+    ax.set_ylabel('Fréquence (pour 1000 mots)', fontsize=12)
+    ax.set_title('Mentions des Groupes Ethniques dans les Scripts (1960-2020)',
+                 fontsize=14, fontweight='bold')
+    ax.legend(loc='best', fontsize=10)
+    ax.grid(alpha=0.3)
+    paths.append(_save(plt, fig, output_dir, 'ethnic_mentions_by_decade.png'))
+
+    # Stéréotypes raciaux
+    fig, axes = plt.subplots(1, 3, figsize=(18, 5))
+    stereotypes = [
+        ('stereotype_criminal_freq', 'Criminalité', 'darkred'),
+        ('stereotype_exotic_freq', 'Exotisme', 'orange'),
+        ('stereotype_poverty_freq', 'Pauvreté', 'brown')
+    ]
+    for idx, (col, title, color) in enumerate(stereotypes):
+        if col in df_racial.columns:
+            axes[idx].plot(df_racial['decade'], df_racial[col],
+                           marker='o', linewidth=2.5, markersize=8, color=color)
+            axes[idx].set_title(f'Stéréotype : {title}', fontsize=12, fontweight='bold')
+            axes[idx].set_xlabel('Décennie')
+            axes[idx].set_ylabel('Fréquence (pour 1000 mots)')
+            axes[idx].grid(alpha=0.3)
+    paths.append(_save(plt, fig, output_dir, 'racial_stereotypes.png'))
+
+    # Ratio minorités / blancs
+    if 'minority_white_ratio' in df_racial.columns:
+        fig, ax = plt.subplots(figsize=(12, 6))
+        ax.plot(df_racial['decade'], df_racial['minority_white_ratio'],
+                marker='o', linewidth=2.5, markersize=8, color='green')
+        ax.axhline(y=1.0, color='red', linestyle='--', linewidth=1.5,
+                   label='Égalité (ratio = 1.0)')
+        ax.set_xlabel('Décennie', fontsize=12)
+        ax.set_ylabel('Ratio Minorités/Blancs', fontsize=12)
+        ax.set_title('Évolution du Ratio Mentions Minorités/Blancs',
+                     fontsize=14, fontweight='bold')
+        ax.legend()
+        ax.grid(alpha=0.3)
+        paths.append(_save(plt, fig, output_dir, 'minority_white_ratio.png'))
+
+    # Distribution de la diversité
+    fig, ax = plt.subplots(figsize=(14, 6))
+    df_diversity = df_films[df_films['ethnic_diversity_score'] > 0].copy()
+    sns.violinplot(data=df_diversity, x='decade', y='ethnic_diversity_score', ax=ax, palette='muted')
+    ax.set_xlabel('Décennie', fontsize=12)
+    ax.set_ylabel('Score de Diversité Ethnique', fontsize=12)
+    ax.set_title('Distribution du Score de Diversité Ethnique par Décennie',
+                 fontsize=14, fontweight='bold')
+    paths.append(_save(plt, fig, output_dir, 'ethnic_diversity_distribution.png'))
+
+    return paths
+
+
+def plot_stereotype_figures(df_stereotypes: pd.DataFrame, df_evolution: pd.DataFrame,
+                            output_dir: str) -> List[str]:
+    """
+    Figures du notebook 3 (évolution des scores, corrélation entre stéréotypes).
+
+    Args:
+        df_stereotypes: Scores par film (stereotype_detection_scores.csv)
+        df_evolution: Scores moyens par décennie (stereotype_evolution_by_decade.csv)
+        output_dir: Dossier results/figures
+
+    Returns:
+        Chemins des figures
+    """
+    import seaborn as sns
+
+    plt = _pyplot()
+    sns.set_style('whitegrid')
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    fig.suptitle('Évolution des Stéréotypes Détectés par Décennie (1960-2020)',
+                 fontsize=18, fontweight='bold', y=0.995)
+    panels = [
+        (axes[0, 0], 'sexism_score', 'o', 'darkred', 'Stéréotypes Sexistes'),
+        (axes[0, 1], 'racism_score', 's', 'darkorange', 'Stéréotypes Racistes'),
+        (axes[1, 0], 'homophobia_score', '^', 'purple', 'Contenu Homophobe'),
+        (axes[1, 1], 'total_score', 'D', 'black', 'Score Total de Stéréotypes')
+    ]
+    for ax, column, marker, color, title in panels:
+        ax.plot(df_evolution['decade'], df_evolution[column],
+                marker=marker, linewidth=3, markersize=10, color=color)
+        ax.set_title(title, fontsize=14, fontweight='bold')
+        ax.set_xlabel('Décennie')
+        ax.set_ylabel('Nombre moyen d\'occurrences par film')
+        ax.grid(alpha=0.3)
+    paths.append(_save(plt, fig, output_dir, 'stereotype_detection_evolution.png'))
+
+    corr_matrix = df_stereotypes[['sexism_score', 'racism_score', 'homophobia_score']].corr()
+    fig = plt.figure(figsize=(10, 8))
+    sns.heatmap(corr_matrix, annot=True, fmt='.3f', cmap='RdYlGn_r',
+                center=0, square=True, linewidths=2, cbar_kws={"shrink": 0.8})
+    plt.title('Corrélation entre Types de Stéréotypes', fontsize=16, fontweight='bold', pad=20)
+    paths.append(_save(plt, fig, output_dir, 'stereotype_correlation_heatmap.png'))
+
+    return paths
+
+
+def plot_evolution_figures(df_evolution: pd.DataFrame, cooccurrence_matrix: pd.DataFrame,
+                           output_dir: str) -> List[str]:
+    """
+    Figures du notebook 4 (aire empilée des densités, heatmap de co-occurrence).
+
+    Args:
+        df_evolution: Densités par décennie (bias_evolution_by_decade.csv)
+        cooccurrence_matrix: Groupes × comportements (cooccurrence_matrix.csv)
+        output_dir: Dossier results/figures
+
+    Returns:
+        Chemins des figures
+    """
+    import seaborn as sns
+
+    plt = _pyplot()
+    sns.set_style('whitegrid')
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+
+    decades = df_evolution['decade']
+    sexism = df_evolution['sexism_density_mean']
+    racism = df_evolution['racism_density_mean']
+    homophobia = df_evolution['homophobia_density_mean']
+
+    fig, ax = plt.subplots(figsize=(16, 10))
+    ax.fill_between(decades, 0, sexism, label='Sexisme', alpha=0.7, color='#e74c3c')
+    ax.fill_between(decades, sexism, sexism + racism, label='Racisme', alpha=0.7, color='#f39c12')
+    ax.fill_between(decades, sexism + racism, sexism + racism + homophobia,
+                    label='Homophobie', alpha=0.7, color='#9b59b6')
+    ax.set_title('Évolution de la Part Relative des Biais Linguistiques (1960-2020)\n' +
+                 'Densité de Termes Problématiques pour 1000 Mots',
+                 fontsize=18, fontweight='bold', pad=20)
+    ax.set_xlabel('Décennie', fontsize=14)
+    ax.set_ylabel('Densité Cumulée (termes/1000 mots)', fontsize=14)
+    ax.legend(loc='upper right', fontsize=12)
+    ax.grid(alpha=0.3)
+    paths.append(_save(plt, fig, output_dir, 'stacked_area_bias_evolution.png'))
+
+    fig = plt.figure(figsize=(14, 10))
+    sns.heatmap(cooccurrence_matrix, annot=True, fmt='.1f', cmap='YlOrRd',
+                linewidths=1, cbar_kws={'label': '% de co-occurrence'})
+    plt.title('Heatmap de Co-occurrence : Groupes Sociaux × Comportements\n' +
+              'Analyse Pragmatique - N-grams (fenêtre ±10 mots)',
+              fontsize=16, fontweight='bold', pad=20)
+    plt.xlabel('Catégories de Comportements', fontsize=12)
+    plt.ylabel('Groupes Sociaux', fontsize=12)
+    plt.xticks(rotation=45, ha='right')
+    plt.yticks(rotation=0)
+    paths.append(_save(plt, fig, output_dir, 'cooccurrence_heatmap.png'))
+
+    return paths
+
+
+def plot_semantic_drift(df_proximity: pd.DataFrame, output_dir: str) -> List[str]:
+    """
+    Figure du notebook 4 : proximité sémantique vers Power/Agency par décennie.
+
+    Args:
+        df_proximity: Table semantic_proximity_evolution.csv
+        output_dir: Dossier results/figures
+
+    Returns:
+        Chemins des figures
+    """
+    plt = _pyplot()
+    os.makedirs(output_dir, exist_ok=True)
+
+    fig, axes = plt.subplots(1, 3, figsize=(18, 6))
+    fig.suptitle('Semantic Drift : Évolution de la Proximité Sémantique vers Power/Agency\n' +
+                 'Word2Vec Diachronique (1960-2020)',
+                 fontsize=18, fontweight='bold', y=1.02)
+
+    groups = df_proximity['group'].unique()
+    colors = {'Femmes': '#e74c3c', 'Afro-Américains': '#f39c12', 'LGBTQ+': '#9b59b6'}
+    panels = [
+        (axes[0], 'power_similarity', 'o', 'Proximité avec Power/Agency', 'Similarité Cosinus'),
+        (axes[1], 'submission_similarity', 's', 'Proximité avec Submission', 'Similarité Cosinus'),
+        (axes[2], 'empowerment_ratio', '^', 'Ratio Empowerment (Power/Submission)', 'Ratio')
+    ]
+    for ax, column, marker, title, ylabel in panels:
+        for group in groups:
+            group_data = df_proximity[df_proximity['group'] == group]
+            ax.plot(group_data['decade'], group_data[column],
+                    marker=marker, linewidth=2, markersize=8, label=group,
+                    color=colors.get(group, 'gray'))
+        ax.set_title(title, fontsize=14, fontweight='bold')
+        ax.set_xlabel('Décennie')
+        ax.set_ylabel(ylabel)
+        if column == 'empowerment_ratio':
+            ax.axhline(y=1, color='black', linestyle='--', alpha=0.5, label='Équilibre (ratio=1)')
+        else:
+            ax.set_ylim(0, 1)
+        ax.legend()
+        ax.grid(alpha=0.3)
+
+    return [_save(plt, fig, output_dir, 'semantic_drift_power_agency.png')]
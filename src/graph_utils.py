@@ -1,8 +1,13 @@
 # Ajout de fonctionnalités avancées pour Graph Mining
 
 import networkx as nx
+import numpy as np
 from collections import defaultdict
 import matplotlib.pyplot as plt
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from dtm import LexiconDTM
 
 def build_bipartite_graph(df, entity_words_dict):
     """
@@ -16,23 +21,97 @@ def build_bipartite_graph(df, entity_words_dict):
     Returns:
         Graphe biparti NetworkX
     """
+    # Fréquences relatives de toutes les entités pour tous les films en une opération
+    freqs = LexiconDTM.from_dataframe(
+        df, 'clean_text',
+        extra_words=[w for words in entity_words_dict.values() for w in words]
+    ).densities(entity_words_dict).to_numpy()
+    
+    film_nodes = [f"Film_{title[:20]}_{year:.0f}"
+                  for title, year in zip(df['title'], df['release_year'])]
+    theme_nodes = [f"Theme_{entity_name}" for entity_name in entity_words_dict]
+    film_attrs = [{'decade': decade} for decade in df['decade']]
+    
+    return build_bipartite_from_matrix(freqs, film_nodes, theme_nodes,
+                                       threshold=1.0, film_attrs=film_attrs)
+
+
+def build_bipartite_from_matrix(weights, film_nodes, theme_nodes, threshold=1.0, film_attrs=None):
+    """
+    Construit le graphe biparti Films ↔ Thèmes à partir d'une matrice de poids
+    précalculée (ex: LexiconDTM.densities), sans parcourir les films un par un.
+    
+    Args:
+        weights: Matrice films × thèmes (numpy ou scipy.sparse)
+        film_nodes: Nom du nœud de chaque film
+        theme_nodes: Nom du nœud de chaque thème
+        threshold: Poids minimal (strict) pour créer une arête
+        film_attrs: Attributs de chaque film (liste de dicts, ex: décennie)
+    
+    Returns:
+        Graphe biparti NetworkX
+    """
+    weights = sparse.csr_matrix(weights)
+    weights.data[weights.data <= threshold] = 0
+    weights.eliminate_zeros()
+    
     G = nx.Graph()
+    if film_attrs is None:
+        film_attrs = [{}] * len(film_nodes)
+    G.add_nodes_from((node, {'bipartite': 0, **attrs}) for node, attrs in zip(film_nodes, film_attrs))
+    
+    # Seuls les thèmes présents dans au moins un film deviennent des nœuds
+    used_themes = np.unique(weights.indices)
+    G.add_nodes_from((theme_nodes[j], {'bipartite': 1}) for j in used_themes.tolist())
     
-    for idx, row in df.iterrows():
-        film_node = f"Film_{row['title'][:20]}_{row['release_year']:.0f}"
-        G.add_node(film_node, bipartite=0, decade=row['decade'])
-        
-        # Calculer la présence de chaque entité
-        for entity_name, words in entity_words_dict.items():
-            freq = calculate_relative_frequency(row['clean_text'], words)
-            if freq > 1.0:  # Seuil de présence significative
-                entity_node = f"Theme_{entity_name}"
-                G.add_node(entity_node, bipartite=1)
-                G.add_edge(film_node, entity_node, weight=freq)
+    coo = weights.tocoo()
+    G.add_weighted_edges_from(
+        (film_nodes[i], theme_nodes[j], w)
+        for i, j, w in zip(coo.row.tolist(), coo.col.tolist(), coo.data.tolist())
+    )
     
     return G
 
 
+def sparse_projections(weights, threshold=1.0):
+    """
+    Projections du graphe biparti sur chaque type de nœud, en matrices creuses :
+    poids film–film = somme sur les thèmes partagés du produit des poids,
+    poids thème–thème = somme sur les films partagés.
+    
+    Args:
+        weights: Matrice films × thèmes
+        threshold: Poids minimal (strict) d'une arête film–thème
+    
+    Returns:
+        (matrice films × films, matrice thèmes × thèmes), diagonales nulles
+    """
+    weights = sparse.csr_matrix(weights, dtype=float)
+    weights.data[weights.data <= threshold] = 0
+    weights.eliminate_zeros()
+    
+    films = (weights @ weights.T).tocsr()
+    themes = (weights.T @ weights).tocsr()
+    for projection in (films, themes):
+        projection.setdiag(0)
+        projection.eliminate_zeros()
+    
+    return films, themes
+
+
+def projection_graph(matrix, nodes):
+    """
+    Graphe NetworkX pondéré d'une projection (sparse_projections).
+    """
+    G = nx.Graph()
+    G.add_nodes_from(nodes)
+    coo = sparse.triu(matrix, k=1).tocoo()
+    G.add_weighted_edges_from(
+        (nodes[i], nodes[j], w) for i, j, w in zip(coo.row.tolist(), coo.col.tolist(), coo.data.tolist())
+    )
+    return G
+
+
 def detect_communities(G):
     """
     Détecte les communautés dans le graphe de co-occurrence.
@@ -46,13 +125,24 @@ def detect_communities(G):
     return communities
 
 
-def centrality_analysis(G):
+def centrality_analysis(G, k=None, seed=None):
     """
     Analyse de centralité : quels mots sont les plus "importants" dans le réseau ?
+    
+    Args:
+        G: Graphe NetworkX
+        k: Nombre de pivots pour l'approximation de l'intermédiarité (betweenness) et de la
+           proximité (None : calcul exact, à réserver aux petits graphes)
+        seed: Graine du tirage des pivots
     """
     degree_cent = nx.degree_centrality(G)
-    betweenness_cent = nx.betweenness_centrality(G)
-    closeness_cent = nx.closeness_centrality(G)
+    
+    if k is None or k >= len(G):
+        betweenness_cent = nx.betweenness_centrality(G)
+        closeness_cent = nx.closeness_centrality(G)
+    else:
+        betweenness_cent = nx.betweenness_centrality(G, k=k, seed=seed)
+        closeness_cent = approximate_closeness(G, k, seed=seed)
     
     return {
         'degree': degree_cent,
@@ -61,4 +151,77 @@ def centrality_analysis(G):
     }
 
 
+def approximate_closeness(G, k, seed=None):
+    """
+    Proximité (closeness) estimée à partir des distances à k pivots tirés au hasard
+    (Eppstein & Wang), avec la même normalisation que nx.closeness_centrality
+    pour les graphes non connexes. Un parcours en largeur par pivot, en C (scipy).
+    
+    Args:
+        G: Graphe NetworkX (non orienté, distances en nombre d'arêtes)
+        k: Nombre de pivots
+        seed: Graine du tirage des pivots
+    
+    Returns:
+        Dict {nœud: proximité estimée}
+    """
+    nodes = list(G)
+    n = len(nodes)
+    if n <= 1:
+        return {node: 0.0 for node in nodes}
+    
+    adjacency = nx.to_scipy_sparse_array(G, nodelist=nodes, weight=None, format='csr')
+    rng = np.random.default_rng(seed)
+    pivots = rng.choice(n, size=min(k, n), replace=False)
+    
+    distances = csgraph.shortest_path(adjacency, directed=False, unweighted=True, indices=pivots)
+    reachable = np.isfinite(distances)
+    scale = n / len(pivots)
+    
+    # Estimations du nombre de nœuds atteignables et de la somme des distances
+    reach = reachable.sum(axis=0) * scale
+    total = np.where(reachable, distances, 0).sum(axis=0) * scale
+    with np.errstate(divide='ignore', invalid='ignore'):
+        closeness = np.where(total > 0, (reach - 1) / total * (reach - 1) / (n - 1), 0.0)
+    
+    return dict(zip(nodes, np.clip(closeness, 0, None).tolist()))
+
+
+def export_adjacency(G, path, weight='weight'):
+    """
+    Exporte le graphe en matrice d'adjacence creuse compacte (.npz) :
+    CSR (indptr, indices, poids float32) et noms des nœuds.
+    
+    Args:
+        G: Graphe NetworkX
+        path: Fichier .npz
+        weight: Attribut des arêtes utilisé comme poids
+    """
+    nodes = list(G)
+    adjacency = nx.to_scipy_sparse_array(G, nodelist=nodes, weight=weight,
+                                         dtype=np.float32, format='csr')
+    np.savez_compressed(
+        path,
+        indptr=adjacency.indptr.astype(np.int64),
+        indices=adjacency.indices.astype(np.int32),
+        data=adjacency.data,
+        nodes=np.array([str(node) for node in nodes], dtype=str),
+        bipartite=np.array([G.nodes[node].get('bipartite', -1) for node in nodes], dtype=np.int8)
+    )
+
+
+def load_adjacency(path):
+    """
+    Recharge une matrice d'adjacence exportée par export_adjacency.
+    
+    Returns:
+        (matrice CSR, liste des nœuds, tableau 'bipartite' de chaque nœud)
+    """
+    with np.load(path, allow_pickle=False) as data:
+        nodes = data['nodes'].tolist()
+        adjacency = sparse.csr_matrix((data['data'], data['indices'], data['indptr']),
+                                      shape=(len(nodes), len(nodes)))
+        return adjacency, nodes, data['bipartite']
+
+
 # Utilisation de ces fonctions dans le notebook analysis.ipynb
@@ -0,0 +1,313 @@
+"""
+instrumentation.py - Mesures par étape (temps, CPU, mémoire, débit)
+Désactivée par défaut : les fonctions décorées par @instrumented appellent
+directement la fonction d'origine. Une fois activée (enable() ou variable
+d'environnement NLP_PROFILE=chemin.jsonl), chaque appel écrit un événement JSON
+(une ligne) : temps réel, temps CPU, pic mémoire, octets lus, éléments traités.
+Les processus enfants (pools de parsing, étapes du pipeline) héritent de la
+variable d'environnement et écrivent dans le même fichier.
+
+Usage:
+    from instrumentation import enable, load_events, stage_report
+    enable('results/profile.jsonl')
+    ...
+    print(stage_report(load_events('results/profile.jsonl')))
+
+    python src/instrumentation.py results/profile.jsonl --compare ancien_profile.jsonl
+"""
+
+import functools
+import json
+import os
+import socket
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+
+ENV_VARIABLE = 'NLP_PROFILE'
+_HOST = socket.gethostname()
+
+# Fichier d'événements du processus courant (None = instrumentation désactivée)
+_sink = None
+_sink_path: Optional[str] = None
+_run_id: Optional[str] = None
+# Étapes en cours (imbrication) : {'id', 'start_memory', 'peak'}
+_stack: List[Dict] = []
+
+
+def enable(path: str, run_id: Optional[str] = None, trace_memory: bool = True) -> str:
+    """
+    Active l'instrumentation (processus courant et processus enfants).
+
+    Args:
+        path: Fichier JSON lines des événements (ajout en fin de fichier)
+        run_id: Identifiant de l'exécution (généré si None)
+        trace_memory: Mesurer le pic mémoire avec tracemalloc (ralentit les allocations)
+
+    Returns:
+        Identifiant de l'exécution
+    """
+    global _sink, _sink_path, _run_id
+
+    disable()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    _run_id = run_id or uuid.uuid4().hex[:12]
+    _sink_path = path
+    # Une ligne = une écriture en mode ajout : plusieurs processus peuvent partager le fichier
+    _sink = open(path, 'a', encoding='utf-8', buffering=1)
+
+    os.environ[ENV_VARIABLE] = path
+    os.environ[ENV_VARIABLE + '_RUN'] = _run_id
+    os.environ[ENV_VARIABLE + '_MEMORY'] = '1' if trace_memory else '0'
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return _run_id
+
+
+def disable() -> None:
+    """
+    Désactive l'instrumentation et ferme le fichier d'événements.
+    """
+    global _sink, _sink_path
+    if _sink is not None:
+        _sink.close()
+    _sink = None
+    _sink_path = None
+    _stack.clear()
+    for suffix in ('', '_RUN', '_MEMORY'):
+        os.environ.pop(ENV_VARIABLE + suffix, None)
+
+
+def is_enabled() -> bool:
+    return _sink is not None
+
+
+def _enable_from_environment() -> None:
+    path = os.environ.get(ENV_VARIABLE)
+    if path:
+        enable(path, os.environ.get(ENV_VARIABLE + '_RUN'),
+               os.environ.get(ENV_VARIABLE + '_MEMORY', '1') == '1')
+
+
+def _emit(event: Dict) -> None:
+    _sink.write(json.dumps(event) + '\n')
+
+
+@contextmanager
+def stage(name: str, items: Optional[int] = None,
+          bytes_read: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Mesure un bloc de code comme une étape.
+    Le dict retourné peut être complété dans le bloc ('items', 'bytes_read').
+
+    Args:
+        name: Nom de l'étape (ex: 'notebook1.frequencies')
+        items: Nombre d'éléments traités (scripts, dialogues...)
+        bytes_read: Octets lus sur disque
+
+    Yields:
+        Dict des compteurs de l'étape
+    """
+    counters = {'items': items, 'bytes_read': bytes_read}
+    if _sink is None:
+        yield counters
+        return
+
+    tracing = tracemalloc.is_tracing()
+    frame = {'id': uuid.uuid4().hex[:12], 'start_memory': 0, 'peak': 0}
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        if _stack:
+            _stack[-1]['peak'] = max(_stack[-1]['peak'], peak)
+        tracemalloc.reset_peak()
+        frame['start_memory'] = current
+    parent = _stack[-1]['id'] if _stack else None
+    _stack.append(frame)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    error = None
+    try:
+        yield counters
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        _stack.pop()
+
+        peak_memory = None
+        if tracing and tracemalloc.is_tracing():
+            frame['peak'] = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            peak_memory = frame['peak'] - frame['start_memory']
+            if _stack:
+                _stack[-1]['peak'] = max(_stack[-1]['peak'], frame['peak'])
+
+        items = counters.get('items')
+        event = {
+            'run': _run_id,
+            'id': frame['id'],
+            'parent': parent,
+            'stage': name,
+            'start': time.time() - wall,
+            'wall_time': wall,
+            'cpu_time': cpu,
+            'peak_memory': peak_memory,
+            'bytes_read': counters.get('bytes_read'),
+            'items': items,
+            'items_per_second': items / wall if items is not None and wall > 0 else None,
+            'pid': os.getpid(),
+            'host': _HOST
+        }
+        if error is not None:
+            event['error'] = error
+        if _sink is not None:
+            _emit(event)
+
+
+def instrumented(name: str,
+                 items: Optional[Callable] = None,
+                 bytes_read: Optional[Callable] = None) -> Callable:
+    """
+    Décorateur : mesure chaque appel de la fonction comme une étape.
+
+    Args:
+        name: Nom de l'étape
+        items: Fonction (args, kwargs, résultat) -> nombre d'éléments traités
+        bytes_read: Fonction (args, kwargs) -> octets lus
+
+    Returns:
+        Décorateur
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _sink is None:
+                return func(*args, **kwargs)
+
+            size = None
+            if bytes_read is not None:
+                try:
+                    size = bytes_read(args, kwargs)
+                except (OSError, TypeError, IndexError, KeyError):
+                    size = None
+            with stage(name, bytes_read=size) as counters:
+                result = func(*args, **kwargs)
+                if items is not None:
+                    counters['items'] = items(args, kwargs, result)
+            return result
+        return wrapper
+    return decorator
+
+
+# ===== RAPPORTS =====
+
+def load_events(path: str, run: Optional[str] = None) -> pd.DataFrame:
+    """
+    Charge les événements d'un fichier JSON lines.
+
+    Args:
+        path: Fichier d'événements
+        run: Identifiant d'exécution à garder (None = toutes ; 'last' = la dernière)
+
+    Returns:
+        DataFrame, une ligne par événement
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        events = pd.DataFrame([json.loads(line) for line in f if line.strip()])
+    if events.empty or run is None:
+        return events
+    if run == 'last':
+        run = events.loc[events['start'].idxmax(), 'run']
+    return events[events['run'] == run].reset_index(drop=True)
+
+
+def stage_report(events: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrège les événements par étape.
+    Le temps propre (self_time) exclut les étapes imbriquées exécutées dans le même processus.
+
+    Args:
+        events: Événements (load_events)
+
+    Returns:
+        DataFrame par étape (calls, wall_time, self_time, cpu_time, peak_memory,
+        bytes_read, items, items_per_second, mb_per_second), trié par temps propre
+    """
+    if events.empty:
+        return pd.DataFrame()
+
+    events = events.copy()
+    # Étapes enfants exécutées dans un autre processus (pool) : en parallèle, non déduites
+    children = events.dropna(subset=['parent'])
+    children_time = children.groupby(['parent', 'pid'])['wall_time'].sum()
+    own_children = pd.MultiIndex.from_arrays([events['id'], events['pid']])
+    events['self_time'] = events['wall_time'] - children_time.reindex(own_children).fillna(0).to_numpy()
+
+    report = events.groupby('stage').agg(
+        calls=('id', 'size'),
+        wall_time=('wall_time', 'sum'),
+        self_time=('self_time', 'sum'),
+        cpu_time=('cpu_time', 'sum'),
+        peak_memory=('peak_memory', 'max'),
+        bytes_read=('bytes_read', lambda s: s.sum(min_count=1)),
+        items=('items', lambda s: s.sum(min_count=1))
+    )
+    report['items_per_second'] = report['items'] / report['wall_time'].replace(0, float('nan'))
+    report['mb_per_second'] = report['bytes_read'] / 1e6 / report['wall_time'].replace(0, float('nan'))
+    return report.sort_values('self_time', ascending=False)
+
+
+def compare_reports(baseline: pd.DataFrame, current: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compare deux rapports étape par étape (ratios courant / référence).
+    Le débit (items_per_second) tient compte d'une taille de données différente.
+
+    Args:
+        baseline: Rapport de référence (stage_report)
+        current: Rapport à comparer
+
+    Returns:
+        DataFrame par étape, trié par ralentissement du débit
+    """
+    columns = ['wall_time', 'self_time', 'cpu_time', 'peak_memory', 'items', 'items_per_second']
+    merged = baseline[columns].join(current[columns], how='outer',
+                                    lsuffix='_baseline', rsuffix='_current')
+    for column in columns:
+        merged[f'{column}_ratio'] = (merged[f'{column}_current'] /
+                                     merged[f'{column}_baseline'].replace(0, float('nan')))
+    # Ralentissement : baisse du débit si disponible, sinon hausse du temps propre
+    merged['slowdown'] = (1 / merged['items_per_second_ratio']).fillna(merged['self_time_ratio'])
+    return merged.sort_values('slowdown', ascending=False)
+
+
+_enable_from_environment()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Rapport par étape d'un fichier d'événements")
+    arg_parser.add_argument('events', help="Fichier JSON lines (NLP_PROFILE)")
+    arg_parser.add_argument('--run', help="Identifiant d'exécution ('last' pour la dernière)")
+    arg_parser.add_argument('--compare', help="Fichier d'événements de référence")
+    args = arg_parser.parse_args()
+
+    pd.set_option('display.width', 200)
+    pd.set_option('display.max_columns', 20)
+
+    report = stage_report(load_events(args.events, args.run))
+    if args.compare:
+        baseline = stage_report(load_events(args.compare, 'last' if args.run == 'last' else None))
+        print(compare_reports(baseline, report)[
+            ['self_time_baseline', 'self_time_current', 'items_per_second_ratio', 'slowdown']])
+    else:
+        print(report)
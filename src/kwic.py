@@ -0,0 +1,240 @@
+"""
+kwic.py - Index positionnel pour l'extraction de contextes (Keyword In Context)
+Remplace extract_keyword_contexts (notebook 3) : le corpus est parcouru une
+seule fois pour construire les postings (film, position) de chaque terme du
+lexique, puis chaque requête ne lit que les contextes qu'elle retourne.
+"""
+
+import functools
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+class KWICIndex:
+    """
+    Index inversé positionnel : terme -> (film, début, fin) de chaque occurrence.
+
+    Les textes ne sont pas copiés : ils sont relus à la demande via `get_text`
+    (colonne d'un DataFrame, CorpusStore.text...).
+    """
+
+    def __init__(self, films: pd.DataFrame,
+                 get_text: Callable[[int], str],
+                 categories: Dict[str, List[str]],
+                 postings: Dict[str, np.ndarray]):
+        """
+        Args:
+            films: Métadonnées des films (title, release_year, decade), une ligne par film
+            get_text: Fonction numéro de film -> texte
+            categories: Dict {nom_catégorie: liste_de_mots}
+            postings: Dict {terme: tableau (n, 3) de (film, début, fin)}
+        """
+        self.films = films.reset_index(drop=True)
+        self.get_text = get_text
+        self.categories = {name: [w.lower() for w in words] for name, words in categories.items()}
+        self.postings = postings
+
+    @staticmethod
+    def _scan(texts: Iterable,
+              categories: Dict[str, List[str]],
+              extra_words: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Postings de chaque terme du lexique, en un seul parcours des textes.
+        """
+        from dictionaries import LexiconRegistry
+
+        registry = LexiconRegistry(categories)
+        vocabulary = list(dict.fromkeys(list(registry.terms) + [w.lower() for w in extra_words]))
+        simple_words = {w for w in vocabulary if _WORD_PATTERN.fullmatch(w)}
+        phrase_patterns = {w: re.compile(r'\b' + re.escape(w) + r'\b')
+                           for w in vocabulary if w not in simple_words}
+
+        hits: Dict[str, List] = {w: [] for w in vocabulary}
+
+        for film_id, text in enumerate(texts):
+            if not isinstance(text, str):
+                continue
+            text_lower = text.lower()
+
+            for match in _WORD_PATTERN.finditer(text_lower):
+                word = match.group()
+                if word in simple_words:
+                    hits[word].append((film_id, match.start(), match.end()))
+
+            for word, pattern in phrase_patterns.items():
+                for match in pattern.finditer(text_lower):
+                    hits[word].append((film_id, match.start(), match.end()))
+
+        return {
+            word: np.array(entries, dtype=np.int64).reshape(-1, 3)
+            for word, entries in hits.items()
+        }
+
+    @classmethod
+    def build(cls, df: pd.DataFrame,
+              text_column: str = 'clean_text',
+              categories: Optional[Dict[str, List[str]]] = None,
+              extra_words: Sequence[str] = ()) -> 'KWICIndex':
+        """
+        Construit l'index en un seul parcours d'un DataFrame (textes gardés en mémoire).
+
+        Args:
+            df: DataFrame des scripts (title, release_year, decade, texte)
+            text_column: Colonne du texte
+            categories: Catégories interrogeables (par défaut celles du notebook 3)
+            extra_words: Mots indexés en plus des catégories
+
+        Returns:
+            KWICIndex
+        """
+        if categories is None:
+            from dtm import stereotype_categories
+            categories = stereotype_categories()
+
+        texts = df[text_column].tolist()
+        postings = cls._scan(texts, categories, extra_words)
+
+        columns = [c for c in ('title', 'release_year', 'decade') if c in df.columns]
+        return cls(df[columns], texts.__getitem__, categories, postings)
+
+    @classmethod
+    def from_store(cls, store,
+                   text_column: str = 'clean_text',
+                   categories: Optional[Dict[str, List[str]]] = None,
+                   extra_words: Sequence[str] = ()) -> 'KWICIndex':
+        """
+        Construit l'index à partir d'un CorpusStore, sans charger le corpus :
+        les textes sont lus un par un, puis relus à la demande par store.text.
+
+        Args:
+            store: CorpusStore
+            text_column: Colonne du texte
+            categories: Catégories interrogeables (par défaut celles du notebook 3)
+            extra_words: Mots indexés en plus des catégories
+
+        Returns:
+            KWICIndex
+        """
+        if categories is None:
+            from dtm import stereotype_categories
+            categories = stereotype_categories()
+
+        postings = cls._scan(store.iter_texts(text_column), categories, extra_words)
+
+        metadata = store.metadata()
+        columns = [c for c in ('title', 'release_year', 'decade') if c in metadata.columns]
+        return cls(metadata[columns], functools.partial(store.text, column=text_column),
+                   categories, postings)
+
+    def _hits(self, word: Optional[str] = None,
+              category: Optional[str] = None,
+              decade: Optional[int] = None) -> List[tuple]:
+        """
+        Postings (terme, tableau) correspondant à une requête, filtrés par décennie.
+        """
+        if word is not None:
+            words = [word.lower()]
+        elif category is not None:
+            words = list(dict.fromkeys(self.categories[category]))
+        else:
+            raise ValueError("Préciser word ou category")
+
+        decades = self.films['decade'].to_numpy() if decade is not None else None
+
+        selected = []
+        for w in words:
+            entries = self.postings.get(w)
+            if entries is None:
+                raise KeyError(f"Terme non indexé : '{w}'")
+            if decades is not None and len(entries):
+                entries = entries[decades[entries[:, 0]] == decade]
+            selected.append((w, entries))
+        return selected
+
+    def count(self, word: Optional[str] = None,
+              category: Optional[str] = None,
+              decade: Optional[int] = None) -> int:
+        """
+        Nombre d'occurrences d'un mot ou d'une catégorie (optionnellement dans une décennie).
+        """
+        return sum(len(entries) for _, entries in self._hits(word, category, decade))
+
+    def contexts(self, word: Optional[str] = None,
+                 category: Optional[str] = None,
+                 decade: Optional[int] = None,
+                 context_window: int = 100,
+                 sample: Optional[int] = None,
+                 page: int = 0,
+                 page_size: int = 20,
+                 seed: Optional[int] = None) -> List[Dict]:
+        """
+        Contextes d'un mot ou d'une catégorie, au format de extract_keyword_contexts.
+
+        Args:
+            word: Mot recherché
+            category: Catégorie recherchée (si word est None)
+            decade: Décennie (None pour tout le corpus)
+            context_window: Nombre de caractères avant/après
+            sample: Si fourni, tire `sample` occurrences au hasard (ignore la pagination)
+            page: Numéro de page (à partir de 0)
+            page_size: Nombre de contextes par page
+            seed: Graine du tirage aléatoire
+
+        Returns:
+            Liste de dictionnaires (title, year, decade, keyword, context, position, matched_text)
+        """
+        hits = self._hits(word, category, decade)
+        keywords = np.concatenate([np.full(len(e), i) for i, (_, e) in enumerate(hits)]) \
+            if hits else np.empty(0, dtype=np.int64)
+        entries = np.concatenate([e for _, e in hits]) if hits else np.empty((0, 3), dtype=np.int64)
+
+        if sample is not None:
+            rng = np.random.default_rng(seed)
+            chosen = rng.choice(len(entries), size=min(sample, len(entries)), replace=False)
+        else:
+            # Ordre stable : film puis position
+            order = np.lexsort((entries[:, 1], entries[:, 0]))
+            chosen = order[page * page_size:(page + 1) * page_size]
+
+        results = []
+        for k in chosen:
+            film_id, start, end = (int(x) for x in entries[k])
+            text = self.get_text(film_id)
+            context = text[max(0, start - context_window):min(len(text), end + context_window)]
+            film = self.films.iloc[film_id]
+            results.append({
+                'title': film.get('title'),
+                'year': film.get('release_year'),
+                'decade': film.get('decade'),
+                'keyword': hits[keywords[k]][0],
+                'context': ' '.join(context.split()),
+                'position': start,
+                'matched_text': text[start:end]
+            })
+        return results
+
+    def counts_by_film(self, category: str) -> pd.Series:
+        """
+        Nombre d'occurrences d'une catégorie par film (score du notebook 3).
+        """
+        film_ids = np.concatenate([e[:, 0] for _, e in self._hits(category=category)])
+        return pd.Series(np.bincount(film_ids, minlength=len(self.films)), index=self.films.index)
+
+
+if __name__ == "__main__":
+    df = pd.DataFrame({
+        'title': ['Film A', 'Film B'],
+        'release_year': [1965, 1992],
+        'decade': [1960, 1990],
+        'clean_text': ["She is so emotional, and pretty too.", "A violent thug from the ghetto."]
+    })
+    index = KWICIndex.build(df)
+    print(index.count(category='racism'))
+    for ctx in index.contexts(category='sexism', context_window=10):
+        print(ctx)
@@ -0,0 +1,435 @@
+"""
+linguistic.py - Détection des stéréotypes en contexte (analyse syntaxique spaCy)
+Le comptage par lexique compte "she is not weak" comme un stéréotype. Ici,
+chaque occurrence d'un terme de stéréotype est rattachée à sa phrase analysée
+par spaCy : négation (dépendance 'neg' sur le terme ou sur la proposition) et
+groupe visé (sujet de la proposition ou nom qualifié par le terme).
+
+Seules les phrases contenant un terme du lexique sont analysées, en un seul
+flux nlp.pipe (par lots, éventuellement sur plusieurs processus) avec les
+composants inutiles désactivés. Les analyses sont gardées en cache (un DocBin
+par script) : elles ne sont recalculées que si le texte, le modèle ou le
+lexique change.
+
+Nécessite spaCy et un modèle anglais avec parser :
+    pip install spacy && python -m spacy download en_core_web_sm
+"""
+
+import hashlib
+import os
+import re
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from dictionaries import LEXICON, LEXICON_VERSION
+
+
+# Version du découpage en phrases (invalide le cache si elle change)
+SPLITTER_VERSION = 1
+DEFAULT_COMPONENTS = ('tok2vec', 'transformer', 'parser')
+DOC_ATTRS = ['ORTH', 'HEAD', 'DEP', 'POS', 'SPACY']
+
+NEGATION_WORDS = frozenset({'not', "n't", 'no', 'never', 'nothing', 'nobody', 'none', 'neither', 'nor'})
+SUBJECT_DEPS = frozenset({'nsubj', 'nsubjpass', 'csubj', 'expl'})
+# Dépendances par lesquelles un terme se rattache à sa proposition
+# ("she is weak" : weak -acomp-> is ; "a weak woman" : weak -amod-> woman)
+_ATTACHMENT_DEPS = frozenset({'acomp', 'attr', 'amod', 'advmod', 'xcomp', 'oprd', 'compound',
+                              'dobj', 'pobj', 'prep', 'appos', 'conj', 'npadvmod', 'nmod'})
+# Groupes visés : lexiques de dictionaries.py
+GROUP_PREFIXES = ('gender', 'ethnicity', 'lgbtq.orientation')
+
+_SENTENCE_PATTERN = re.compile(r'[^.!?]+(?:[.!?]+["\')\]]*|$)')
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """
+    Découpe un texte nettoyé (une ligne, voir normalize_script_text) en phrases.
+
+    Args:
+        text: Texte du script
+
+    Returns:
+        Positions (début, fin) de chaque phrase non vide
+    """
+    spans = []
+    for match in _SENTENCE_PATTERN.finditer(text):
+        start, end = match.span()
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            spans.append((start, end))
+    return spans
+
+
+def _bounded_span(text: str, start: int, end: int, position: int, max_chars: int) -> Tuple[int, int]:
+    """
+    Fenêtre d'au plus max_chars caractères autour d'une position, coupée sur des espaces
+    (scripts sans ponctuation : une « phrase » peut couvrir tout le texte).
+    """
+    if end - start <= max_chars:
+        return start, end
+    low = max(start, position - max_chars // 2)
+    high = min(end, low + max_chars)
+    low = max(start, high - max_chars)
+    if low > start:
+        space = text.find(' ', low, position)
+        low = space + 1 if space >= 0 else low
+    if high < end:
+        space = text.rfind(' ', position, high)
+        high = space if space > position else high
+    return low, high
+
+
+class StereotypeContext:
+    """
+    Lexique des stéréotypes (dtm.stereotype_categories) et des groupes visés,
+    avec la sélection des phrases à analyser.
+    """
+
+    def __init__(self, categories: Optional[Dict[str, List[str]]] = None,
+                 max_chars: int = 1000):
+        """
+        Args:
+            categories: {catégorie: termes} (par défaut les scores du notebook 3)
+            max_chars: Longueur maximale d'un passage envoyé à spaCy
+        """
+        if categories is None:
+            from dtm import stereotype_categories
+            categories = stereotype_categories()
+        self.categories = {name: sorted({t.lower() for t in terms}) for name, terms in categories.items()}
+        self.max_chars = max_chars
+
+        self.term_categories: Dict[str, List[str]] = {}
+        for name, terms in self.categories.items():
+            for term in terms:
+                self.term_categories.setdefault(term, []).append(name)
+        # Termes les plus longs d'abord (expressions avant leurs mots)
+        alternatives = sorted(self.term_categories, key=lambda t: (-len(t), t))
+        self.pattern = re.compile(r'\b(?:' + '|'.join(map(re.escape, alternatives)) + r')\b',
+                                  re.IGNORECASE)
+
+        group_ids = LEXICON.category_ids(*GROUP_PREFIXES)
+        self._group_ids = frozenset(group_ids)
+        self.version = hashlib.sha256(repr((
+            sorted(self.categories.items()), max_chars, LEXICON_VERSION, SPLITTER_VERSION
+        )).encode('utf-8')).hexdigest()[:16]
+
+    def passages(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Passages (phrases, bornées à max_chars) contenant au moins un terme du lexique.
+
+        Args:
+            text: Texte du script
+
+        Returns:
+            Positions (début, fin) triées et sans doublon
+        """
+        if not isinstance(text, str) or not text:
+            return []
+        positions = [m.start() for m in self.pattern.finditer(text)]
+        if not positions:
+            return []
+        sentences = split_sentences(text)
+        starts = [start for start, _ in sentences]
+
+        passages = []
+        for position in positions:
+            i = bisect_right(starts, position) - 1
+            if i < 0 or position >= sentences[i][1]:
+                continue
+            if passages and passages[-1][0] <= position < passages[-1][1]:
+                continue
+            start, end = _bounded_span(text, sentences[i][0], sentences[i][1], position, self.max_chars)
+            # Fenêtres d'une même longue phrase : sans recouvrement (pas d'occurrence comptée deux fois)
+            if passages and start < passages[-1][1]:
+                start = passages[-1][1]
+                while start < end and text[start].isspace():
+                    start += 1
+            passages.append((start, end))
+        return passages
+
+    def groups_of(self, word: str) -> List[str]:
+        """
+        Groupes (catégories du lexique, ex: 'gender.female') désignés par un mot.
+        """
+        return [LEXICON.categories[i] for i in sorted(LEXICON.lookup(word.lower()) & self._group_ids)]
+
+
+def _is_negated(token) -> bool:
+    """
+    Négation portant sur le terme ou sur la proposition qui le contient
+    ("she is not weak", "never a slut", "no savage").
+    """
+    current = token
+    while True:
+        for child in current.children:
+            if child.dep_ == 'neg' or (child.lower_ in NEGATION_WORDS and child.dep_ in ('det', 'advmod')):
+                return True
+        if current.dep_ not in _ATTACHMENT_DEPS or current.head is current:
+            return False
+        current = current.head
+
+
+def _described(token):
+    """
+    Entité décrite par le terme : nom qualifié (amod) ou sujet de la proposition.
+    """
+    if token.dep_ in ('amod', 'compound') and token.head is not token:
+        return token.head
+    current = token
+    while True:
+        subjects = [child for child in current.children if child.dep_ in SUBJECT_DEPS]
+        if subjects:
+            return subjects[0]
+        if current.dep_ not in _ATTACHMENT_DEPS or current.head is current:
+            return None
+        current = current.head
+
+
+def analyze_doc(doc, context: StereotypeContext) -> List[Dict]:
+    """
+    Occurrences des termes de stéréotypes d'un passage analysé.
+
+    Args:
+        doc: Doc spaCy (avec dépendances)
+        context: Lexique des stéréotypes et des groupes
+
+    Returns:
+        Liste de dicts (category, keyword, negated, subject, subject_group, dep)
+    """
+    hits = []
+    for token in doc:
+        categories = context.term_categories.get(token.lower_)
+        if not categories:
+            continue
+        subject = _described(token)
+        groups = []
+        if subject is not None:
+            # "black man" : le nom et ses modifieurs
+            for word in [subject] + [c for c in subject.children if c.dep_ in ('amod', 'compound')]:
+                groups.extend(g for g in context.groups_of(word.text) if g not in groups)
+        for category in categories:
+            hits.append({
+                'category': category,
+                'keyword': token.lower_,
+                'negated': _is_negated(token),
+                'subject': subject.text if subject is not None else None,
+                'subject_group': '|'.join(groups) if groups else None,
+                'dep': token.dep_
+            })
+    return hits
+
+
+class ContextAnalyzer:
+    """
+    Analyse spaCy des passages contenant des stéréotypes, avec cache DocBin par script.
+
+    Arborescence du cache :
+        cache_dir/<empreinte>/<clé du texte>.spacy
+    L'empreinte combine le modèle (nom, version, composants actifs), la version
+    de spaCy et le lexique : une nouvelle version du corpus ou du lexique
+    n'analyse que les scripts modifiés.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 model: str = 'en_core_web_sm',
+                 context: Optional[StereotypeContext] = None,
+                 batch_size: int = 256,
+                 n_process: int = 1,
+                 components: Sequence[str] = DEFAULT_COMPONENTS,
+                 nlp=None):
+        """
+        Args:
+            cache_dir: Dossier du cache (None = pas de cache)
+            model: Modèle spaCy (doit contenir un parser)
+            context: Lexique des stéréotypes (par défaut StereotypeContext())
+            batch_size: Passages par lot de nlp.pipe
+            n_process: Processus de nlp.pipe
+            components: Composants gardés actifs (les autres sont désactivés)
+            nlp: Pipeline spaCy déjà chargé (remplace model)
+        """
+        import spacy
+
+        if nlp is None:
+            nlp = spacy.load(model)
+        self.nlp = nlp
+        self.enabled = [name for name in nlp.pipe_names if name in components]
+        if 'parser' not in self.enabled:
+            # Négation et sujet décrit viennent de l'arbre de dépendances
+            raise ValueError(f"Le modèle spaCy '{nlp.meta.get('name', model)}' doit avoir un composant "
+                             f"'parser' actif (composants : {nlp.pipe_names}, gardés : {list(components)})")
+        self.context = context if context is not None else StereotypeContext()
+        self.batch_size = batch_size
+        self.n_process = n_process
+
+        meta = nlp.meta
+        self.fingerprint = hashlib.sha256(repr((
+            meta.get('lang'), meta.get('name'), meta.get('version'), spacy.__version__,
+            self.enabled, self.context.version
+        )).encode('utf-8')).hexdigest()[:16]
+        self.cache_dir = os.path.join(cache_dir, self.fingerprint) if cache_dir else None
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def text_key(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.spacy')
+
+    def _load(self, key: str) -> Optional[list]:
+        from spacy.tokens import DocBin
+
+        if not self.cache_dir or not os.path.exists(self._cache_path(key)):
+            return None
+        return list(DocBin().from_disk(self._cache_path(key)).get_docs(self.nlp.vocab))
+
+    def _save(self, key: str, docs: list) -> None:
+        from spacy.tokens import DocBin
+
+        if not self.cache_dir:
+            return
+        doc_bin = DocBin(attrs=DOC_ATTRS, docs=docs, store_user_data=True)
+        tmp_path = self._cache_path(key) + '.tmp'
+        doc_bin.to_disk(tmp_path)
+        os.replace(tmp_path, self._cache_path(key))
+
+    def _parse(self, texts: Sequence[str], todo: List[int]) -> Iterator[Tuple[int, list]]:
+        """
+        Analyse les passages des scripts `todo` en un seul flux nlp.pipe.
+
+        Yields:
+            (indice du script, Docs de ses passages) dans l'ordre de todo
+        """
+        passages = {i: self.context.passages(texts[i]) for i in todo}
+
+        def stream():
+            for i in todo:
+                for start, end in passages[i]:
+                    yield texts[i][start:end], (i, start)
+
+        pending = {i: len(passages[i]) for i in todo}
+        docs: Dict[int, list] = {i: [] for i in todo}
+        order = iter(todo)
+        next_script = next(order, None)
+
+        def ready():
+            nonlocal next_script
+            while next_script is not None and pending[next_script] == 0:
+                yield next_script, docs.pop(next_script)
+                next_script = next(order, None)
+
+        yield from ready()
+        with self.nlp.select_pipes(enable=self.enabled):
+            for doc, (i, start) in self.nlp.pipe(stream(), as_tuples=True,
+                                                 batch_size=self.batch_size,
+                                                 n_process=self.n_process):
+                doc.user_data['offset'] = start
+                docs[i].append(doc)
+                pending[i] -= 1
+                yield from ready()
+
+    def iter_docs(self, texts: Sequence[str]) -> Iterator[Tuple[int, list]]:
+        """
+        Docs des passages de chaque script (cache, sinon analyse).
+
+        Args:
+            texts: Textes des scripts
+
+        Yields:
+            (indice du script, liste de Docs), dans l'ordre des textes
+        """
+        keys = [self.text_key(t) if isinstance(t, str) else None for t in texts]
+        # Seule la liste des scripts à analyser est construite d'avance : les Docs
+        # en cache sont chargés un à un au moment de les rendre
+        todo = [i for i, key in enumerate(keys)
+                if key is not None and not (self.cache_dir and os.path.exists(self._cache_path(key)))]
+        remaining = set(todo)
+
+        parsed = self._parse(texts, todo)
+        for i in range(len(texts)):
+            if i in remaining:
+                j, docs = next(parsed)
+                self._save(keys[j], docs)
+                yield j, docs
+                continue
+            docs = self._load(keys[i]) if keys[i] is not None else []
+            if docs is None:
+                # Fichier de cache retiré entre-temps : analyse isolée
+                _, docs = next(self._parse(texts, [i]))
+                self._save(keys[i], docs)
+            yield i, docs
+
+    def analyze(self, df: pd.DataFrame, text_column: str = 'clean_text') -> pd.DataFrame:
+        """
+        Occurrences des stéréotypes de tous les films, avec négation et groupe visé.
+
+        Args:
+            df: DataFrame des scripts
+            text_column: Colonne du texte
+
+        Returns:
+            DataFrame (film, title, sentence_start, category, keyword, negated,
+            subject, subject_group, dep) ; film = position de la ligne dans df
+        """
+        titles = df['title'].tolist() if 'title' in df.columns else [None] * len(df)
+        rows = []
+        for i, docs in self.iter_docs(df[text_column].tolist()):
+            for doc in docs:
+                for hit in analyze_doc(doc, self.context):
+                    rows.append({'film': i, 'title': titles[i],
+                                 'sentence_start': doc.user_data.get('offset'), **hit})
+        columns = ['film', 'title', 'sentence_start', 'category', 'keyword', 'negated',
+                   'subject', 'subject_group', 'dep']
+        return pd.DataFrame(rows, columns=columns)
+
+
+def context_scores(hits: pd.DataFrame, df: pd.DataFrame,
+                   categories: Sequence[str] = ('sexism', 'racism', 'homophobia')) -> pd.DataFrame:
+    """
+    Scores par film : occurrences, occurrences niées et score hors négations.
+
+    Args:
+        hits: Sortie de ContextAnalyzer.analyze
+        df: DataFrame des scripts (même ordre que pour analyze)
+        categories: Catégories à compter
+
+    Returns:
+        DataFrame (title, decade, {cat}_hits, {cat}_negated, {cat}_score,
+        {cat}_targeted) ; targeted = occurrences non niées avec un groupe identifié
+    """
+    scores = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    for column in ('title', 'release_year', 'decade'):
+        if column in df.columns:
+            scores[column] = df[column].to_numpy()
+    for category in categories:
+        selected = hits[hits['category'] == category]
+        affirmed = selected[~selected['negated'].astype(bool)]
+        counts = {
+            'hits': selected.groupby('film').size(),
+            'negated': selected[selected['negated'].astype(bool)].groupby('film').size(),
+            'score': affirmed.groupby('film').size(),
+            'targeted': affirmed[affirmed['subject_group'].notna()].groupby('film').size()
+        }
+        for name, series in counts.items():
+            scores[f'{category}_{name}'] = series.reindex(scores.index, fill_value=0).astype(int)
+    return scores
+
+
+if __name__ == "__main__":
+    import sys
+
+    model = sys.argv[1] if len(sys.argv) > 1 else 'en_core_web_sm'
+    df = pd.DataFrame({'title': ['Example'], 'clean_text': [
+        "She is not weak. She is weak and hysterical. The hysterical woman left. "
+        "He was never a thug. Those thugs came back."
+    ]})
+    analyzer = ContextAnalyzer(model=model)
+    hits = analyzer.analyze(df)
+    print(hits.to_string())
+    print(context_scores(hits, df).T)
@@ -0,0 +1,506 @@
+"""
+mapreduce.py - Analyses par décennie en map-reduce sur des lots de scripts
+Les analyses de stats_analysis ne dépendent que de sommes entières par
+décennie (scripts, mots, occurrences par catégorie) : chaque lot (shard) de
+scripts est compté indépendamment (map), puis les comptes partiels sont
+additionnés (reduce) et les métriques calculées une seule fois. Les sommes
+entières ne dépendent pas de l'ordre des lots : le résultat est identique à
+celui de l'analyse en mémoire.
+
+À partir de scripts_index.csv, les fichiers sont relus et nettoyés comme dans
+l'étape clean du pipeline (fichiers illisibles ignorés), mais les quasi-doublons
+ne sont pas retirés : pour retrouver exactement gender_bias_by_decade.csv et
+racial_bias_by_decade.csv, partir de scripts_clean.pkl.
+
+Exécuteurs interchangeables (tout objet avec une méthode map(func, items)) :
+    SerialExecutor            dans le processus courant
+    ProcessExecutor           pool de processus local
+    SharedDirectoryExecutor   workers sur plusieurs machines partageant un dossier
+
+Usage:
+    python src/mapreduce.py run --index data/processed/scripts_index.csv --analysis gender \\
+        --shard-size 500 --executor queue --queue-dir /partage/queue
+    python src/mapreduce.py worker --queue-dir /partage/queue      # sur chaque machine
+"""
+
+import os
+import pickle
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+from stats_analysis import (_corpus_row, _gender_categories, _gender_row, _grouped_counts,
+                            _racial_categories, _racial_row)
+
+
+class Shard:
+    """
+    Lot de scripts : lignes de scripts_index.csv (chemins, années) ou de
+    scripts_clean.pkl (textes déjà nettoyés).
+    """
+
+    def __init__(self, name: str, rows: pd.DataFrame):
+        """
+        Args:
+            name: Nom du lot (ex: 'files-0-499', 'decade-1980')
+            rows: Scripts du lot (colonne filepath ou colonne de texte, et decade ou release_year)
+        """
+        self.name = name
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __repr__(self) -> str:
+        return f"Shard({self.name!r}, {len(self.rows)} scripts)"
+
+
+def shard_by_files(index: pd.DataFrame, shard_size: Optional[int] = None,
+                   num_shards: Optional[int] = None) -> List[Shard]:
+    """
+    Découpe un corpus en lots de lignes consécutives.
+
+    Args:
+        index: Scripts (scripts_index.csv ou scripts_clean.pkl)
+        shard_size: Scripts par lot
+        num_shards: Nombre de lots (si shard_size n'est pas donné)
+
+    Returns:
+        Liste de Shard
+    """
+    if shard_size is None:
+        shard_size = -(-len(index) // max(1, num_shards or 1))
+    shard_size = max(1, shard_size)
+    return [Shard(f'files-{start}-{min(start + shard_size, len(index)) - 1}',
+                  index.iloc[start:start + shard_size])
+            for start in range(0, len(index), shard_size)]
+
+
+def _decades(rows: pd.DataFrame, year_column: str = 'release_year') -> pd.Series:
+    return rows['decade'] if 'decade' in rows.columns else (rows[year_column] // 10) * 10
+
+
+def shard_by_decade(index: pd.DataFrame, year_column: str = 'release_year') -> List[Shard]:
+    """
+    Un lot par décennie.
+
+    Args:
+        index: Scripts (scripts_index.csv ou scripts_clean.pkl)
+        year_column: Colonne de l'année (si 'decade' est absente)
+
+    Returns:
+        Liste de Shard, par décennie croissante
+    """
+    decades = _decades(index, year_column)
+    return [Shard(f'decade-{decade:g}', index[decades == decade])
+            for decade in sorted(decades.dropna().unique())]
+
+
+# ===== MAP / REDUCE =====
+
+ANALYSES = {
+    'corpus': (None, None),
+    'gender': (_gender_categories, _gender_row),
+    'racial': (_racial_categories, _racial_row)
+}
+
+
+def _shard_texts(rows: pd.DataFrame, text_column: str, read_ahead: int) -> pd.Series:
+    """
+    Textes d'un lot : colonne existante, sinon lecture et nettoyage des fichiers
+    (comme l'étape clean du pipeline : les fichiers illisibles sont retirés du lot,
+    l'index de la série indique les lignes conservées).
+    """
+    if text_column in rows.columns:
+        return rows[text_column]
+    from parser import _read_texts, normalize_script_text
+
+    kept, texts = [], []
+    results = _read_texts(rows['filepath'].tolist(), read_ahead)
+    for label, (_, text, error) in zip(rows.index, results):
+        if error is None:
+            kept.append(label)
+            texts.append(normalize_script_text(text))
+    return pd.Series(texts, index=pd.Index(kept, dtype=rows.index.dtype), dtype=object)
+
+
+def map_shard(shard: Shard, word_categories: Dict[str, List[str]],
+              text_column: str = 'clean_text',
+              year_column: str = 'release_year',
+              read_ahead: int = 16) -> Dict:
+    """
+    Comptes partiels d'un lot (étape map).
+
+    Args:
+        shard: Lot de scripts
+        word_categories: Dict {nom_catégorie: liste_de_mots}
+        text_column: Colonne du texte (lu depuis filepath si absente)
+        year_column: Colonne de l'année (si 'decade' est absente)
+        read_ahead: Fichiers lus en avance (0 = lecture bloquante)
+
+    Returns:
+        Dict {décennie: {'num_scripts', 'total_words', 'category_counts'}}
+    """
+    texts = _shard_texts(shard.rows, text_column, read_ahead)
+    rows = shard.rows.loc[texts.index]
+    df = pd.DataFrame({text_column: texts})
+    partial = {}
+    for decade, num_scripts, counts in _grouped_counts(df, text_column, _decades(rows, year_column),
+                                                       word_categories):
+        partial[decade] = {'num_scripts': num_scripts, **counts}
+    return partial
+
+
+def reduce_partials(partials: Iterable[Dict]) -> Dict:
+    """
+    Additionne des comptes partiels (étape reduce, associative et commutative).
+
+    Args:
+        partials: Résultats de map_shard
+
+    Returns:
+        Dict {décennie: {'num_scripts', 'total_words', 'category_counts'}}
+    """
+    merged = {}
+    for partial in partials:
+        for decade, counts in partial.items():
+            total = merged.setdefault(decade, {'num_scripts': 0, 'total_words': 0,
+                                               'category_counts': {}})
+            total['num_scripts'] += counts['num_scripts']
+            total['total_words'] += counts['total_words']
+            for name, occurrences in counts['category_counts'].items():
+                total['category_counts'][name] = total['category_counts'].get(name, 0) + occurrences
+    return merged
+
+
+class _ShardTask:
+    """
+    Tâche map d'un lot (objet picklable envoyé aux processus ou aux workers).
+    """
+
+    def __init__(self, word_categories: Dict[str, List[str]], text_column: str,
+                 year_column: str, read_ahead: int):
+        self.word_categories = word_categories
+        self.text_column = text_column
+        self.year_column = year_column
+        self.read_ahead = read_ahead
+
+    def __call__(self, shard: Shard) -> Dict:
+        return map_shard(shard, self.word_categories, self.text_column, self.year_column,
+                         self.read_ahead)
+
+
+def analyze_sharded(shards: Sequence[Shard],
+                    analysis: str = 'corpus',
+                    word_categories: Optional[Dict[str, List[str]]] = None,
+                    executor=None,
+                    text_column: str = 'clean_text',
+                    year_column: str = 'release_year',
+                    read_ahead: int = 16) -> pd.DataFrame:
+    """
+    Analyse par décennie en map-reduce ; même résultat que l'analyse en mémoire
+    (analyze_corpus_by_decade, analyze_gender_bias_by_decade, analyze_racial_bias_by_decade).
+
+    Args:
+        shards: Lots de scripts (shard_by_files, shard_by_decade)
+        analysis: 'corpus' (word_categories requis), 'gender' ou 'racial'
+        word_categories: Dict {nom_catégorie: liste_de_mots} (analyse 'corpus')
+        executor: Objet avec map(func, items) (par défaut SerialExecutor)
+        text_column: Colonne du texte (lu depuis filepath si absente)
+        year_column: Colonne de l'année (si 'decade' est absente)
+        read_ahead: Fichiers lus en avance dans chaque lot (0 = lecture bloquante)
+
+    Returns:
+        DataFrame avec une ligne par décennie
+    """
+    if analysis not in ANALYSES:
+        raise ValueError(f"Analyse inconnue : {analysis!r} (choix : {', '.join(ANALYSES)})")
+    categories_func, row_func = ANALYSES[analysis]
+    if categories_func is not None:
+        word_categories = categories_func()
+    elif word_categories is None:
+        raise ValueError("word_categories est requis pour l'analyse 'corpus'")
+
+    if executor is None:
+        executor = SerialExecutor()
+    task = _ShardTask(word_categories, text_column, year_column, read_ahead)
+    merged = reduce_partials(executor.map(task, list(shards)))
+
+    if row_func is None:
+        return pd.DataFrame([_corpus_row(decade, agg['num_scripts'], agg, word_categories)
+                             for decade, agg in sorted(merged.items())])
+    return pd.DataFrame([row_func(decade, agg['num_scripts'], agg)
+                         for decade, agg in sorted(merged.items())])
+
+
+# ===== EXÉCUTEURS =====
+
+# Bail d'une tâche réservée dans SharedDirectoryExecutor (s)
+DEFAULT_LEASE = 60.0
+
+
+class SerialExecutor:
+    """
+    Exécution dans le processus courant (référence, débogage).
+    """
+
+    def map(self, func: Callable, items: Iterable) -> List:
+        return [func(item) for item in items]
+
+
+class ProcessExecutor:
+    """
+    Pool de processus local.
+    """
+
+    def __init__(self, n_workers: int = os.cpu_count() or 1):
+        self.n_workers = n_workers
+
+    def map(self, func: Callable, items: Iterable) -> List:
+        with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+            return list(executor.map(func, items))
+
+
+class SharedDirectoryExecutor:
+    """
+    Exécution répartie par un dossier partagé (NFS, disque réseau...).
+
+    Chaque tâche est un fichier pickle dans queue_dir/tasks ; un worker (même
+    machine ou autre machine, lancé avec `python src/mapreduce.py worker`)
+    la réserve par un renommage atomique dans queue_dir/claimed, puis écrit
+    son résultat dans queue_dir/results. Les workers doivent avoir accès à
+    src/ et aux fichiers des scripts sous les mêmes chemins.
+
+    Une réservation est un bail : le worker met à jour la date de modification
+    du fichier réservé pendant l'exécution, et une réservation non renouvelée
+    depuis `lease` secondes (worker tué, machine arrêtée) est remise dans la
+    file. Les horloges des machines doivent être à peu près synchronisées.
+    """
+
+    def __init__(self, queue_dir: str, local_workers: int = 0,
+                 poll_interval: float = 0.2,
+                 timeout: Optional[float] = None,
+                 lease: float = DEFAULT_LEASE):
+        """
+        Args:
+            queue_dir: Dossier partagé de la file de tâches
+            local_workers: Workers lancés sur cette machine pendant map (0 = workers externes)
+            poll_interval: Intervalle de scrutation des résultats (s)
+            timeout: Durée maximale d'un map (s, None = illimitée)
+            lease: Durée d'une réservation sans signe de vie avant remise en file (s)
+        """
+        self.queue_dir = queue_dir
+        self.local_workers = local_workers
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.lease = lease
+        for sub in ('tasks', 'claimed', 'results'):
+            os.makedirs(os.path.join(queue_dir, sub), exist_ok=True)
+
+    def map(self, func: Callable, items: Iterable) -> List:
+        job = uuid.uuid4().hex[:12]
+        names = []
+        for i, item in enumerate(items):
+            name = f'{job}-{i:06d}.pkl'
+            _write_atomic(os.path.join(self.queue_dir, 'tasks', name), (func, item))
+            names.append(name)
+
+        workers = [subprocess.Popen([sys.executable, os.path.abspath(__file__), 'worker',
+                                     '--queue-dir', self.queue_dir, '--exit-when-idle',
+                                     '--lease', str(self.lease)])
+                   for _ in range(self.local_workers)]
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        try:
+            return [self._wait(name, job, deadline) for name in names]
+        finally:
+            for worker in workers:
+                worker.wait()
+
+    def _wait(self, name: str, job: str, deadline: Optional[float]):
+        path = os.path.join(self.queue_dir, 'results', name)
+        while not os.path.exists(path):
+            if deadline is not None and time.monotonic() > deadline:
+                claimed = sorted(n for n in os.listdir(os.path.join(self.queue_dir, 'claimed'))
+                                 if n.startswith(job))
+                pending = sorted(n for n in os.listdir(os.path.join(self.queue_dir, 'tasks'))
+                                 if n.startswith(job))
+                raise TimeoutError(f"Tâche {name} sans résultat après {self.timeout} s "
+                                   f"(réservées : {claimed or 'aucune'} ; "
+                                   f"en attente : {pending or 'aucune'})")
+            _requeue_stale(self.queue_dir, self.lease)
+            time.sleep(self.poll_interval)
+        with open(path, 'rb') as f:
+            status, value = pickle.load(f)
+        os.remove(path)
+        if status == 'error':
+            raise RuntimeError(f"Échec de la tâche {name} :\n{value}")
+        return value
+
+
+def _write_atomic(path: str, value) -> None:
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(value, f)
+    os.replace(tmp_path, path)
+
+
+def _requeue_stale(queue_dir: str, lease: float) -> List[str]:
+    """
+    Remet dans la file les réservations dont le bail a expiré.
+
+    Returns:
+        Noms des tâches remises en file
+    """
+    claimed_dir = os.path.join(queue_dir, 'claimed')
+    requeued = []
+    now = time.time()
+    for claim in os.listdir(claimed_dir):
+        path = os.path.join(claimed_dir, claim)
+        try:
+            if now - os.path.getmtime(path) < lease:
+                continue
+            # Nom de la réservation : <tâche>.pkl.<hôte>.<pid>
+            name = claim[:claim.index('.pkl') + len('.pkl')]
+            os.rename(path, os.path.join(queue_dir, 'tasks', name))
+        except (FileNotFoundError, ValueError):
+            continue
+        requeued.append(name)
+    return requeued
+
+
+@contextmanager
+def _heartbeat(path: str, interval: float):
+    """
+    Renouvelle le bail d'une réservation (date de modification) toutes les
+    `interval` secondes tant que le bloc s'exécute.
+    """
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                return
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_worker(queue_dir: str, exit_when_idle: bool = False,
+               poll_interval: float = 0.5,
+               lease: float = DEFAULT_LEASE) -> int:
+    """
+    Boucle d'un worker : réserve, exécute et rend les tâches de la file.
+
+    Args:
+        queue_dir: Dossier partagé de la file
+        exit_when_idle: S'arrêter dès que la file est vide et qu'aucune tâche
+                        n'est réservée (une réservation expirée peut y revenir)
+        poll_interval: Attente entre deux scrutations d'une file vide (s)
+        lease: Durée d'une réservation sans signe de vie avant remise en file (s)
+
+    Returns:
+        Nombre de tâches exécutées
+    """
+    tasks_dir = os.path.join(queue_dir, 'tasks')
+    claimed_dir = os.path.join(queue_dir, 'claimed')
+    worker_id = f'{socket.gethostname()}.{os.getpid()}'
+    done = 0
+
+    while True:
+        _requeue_stale(queue_dir, lease)
+        pending = sorted(name for name in os.listdir(tasks_dir) if name.endswith('.pkl'))
+        if not pending:
+            if exit_when_idle and not os.listdir(claimed_dir):
+                return done
+            time.sleep(poll_interval)
+            continue
+
+        for name in pending:
+            claimed = os.path.join(claimed_dir, f'{name}.{worker_id}')
+            try:
+                # Renommage atomique : un seul worker obtient la tâche
+                os.rename(os.path.join(tasks_dir, name), claimed)
+                # Le renommage conserve la date d'écriture de la tâche : début du bail
+                os.utime(claimed)
+                with open(claimed, 'rb') as f:
+                    func, item = pickle.load(f)
+            except FileNotFoundError:
+                continue
+            with _heartbeat(claimed, lease / 4):
+                try:
+                    result = ('ok', func(item))
+                except Exception:
+                    result = ('error', traceback.format_exc())
+            _write_atomic(os.path.join(queue_dir, 'results', name), result)
+            try:
+                os.remove(claimed)
+            except FileNotFoundError:
+                # Bail expiré entre-temps : la tâche remise en file sera refaite
+                pass
+            done += 1
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Analyses par décennie en map-reduce")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Lance une analyse")
+    run.add_argument('--index', required=True,
+                     help="scripts_index.csv (fichiers relus, sans dédoublonnage) "
+                          "ou scripts_clean.pkl (textes de l'étape clean)")
+    run.add_argument('--analysis', choices=list(ANALYSES), default='gender')
+    run.add_argument('--shard-by', choices=['files', 'decade'], default='files')
+    run.add_argument('--shard-size', type=int, default=500)
+    run.add_argument('--executor', choices=['serial', 'process', 'queue'], default='process')
+    run.add_argument('--n-workers', type=int, default=os.cpu_count() or 1,
+                     help="Processus (process) ou workers locaux (queue)")
+    run.add_argument('--queue-dir', help="Dossier partagé (executor queue)")
+    run.add_argument('--output', help="CSV de sortie (sinon affichage)")
+
+    worker = commands.add_parser('worker', help="Exécute les tâches d'une file partagée")
+    worker.add_argument('--queue-dir', required=True)
+    worker.add_argument('--exit-when-idle', action='store_true')
+    worker.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                        help="Durée d'une réservation sans signe de vie avant remise en file (s)")
+    args = arg_parser.parse_args()
+
+    if args.command == 'worker':
+        run_worker(args.queue_dir, args.exit_when_idle, lease=args.lease)
+        sys.exit(0)
+
+    if args.analysis == 'corpus':
+        arg_parser.error("--analysis corpus nécessite des catégories (utiliser analyze_sharded)")
+    index = pd.read_pickle(args.index) if args.index.endswith('.pkl') else pd.read_csv(args.index)
+    shards = shard_by_decade(index) if args.shard_by == 'decade' else shard_by_files(index, args.shard_size)
+    if args.executor == 'queue':
+        if not args.queue_dir:
+            arg_parser.error("--queue-dir est requis avec --executor queue")
+        executor = SharedDirectoryExecutor(args.queue_dir, local_workers=args.n_workers)
+    elif args.executor == 'process':
+        executor = ProcessExecutor(args.n_workers)
+    else:
+        executor = SerialExecutor()
+
+    result = analyze_sharded(shards, args.analysis, executor=executor)
+    if args.output:
+        result.to_csv(args.output, index=False)
+    else:
+        print(result.to_string())
@@ -0,0 +1,162 @@
+"""
+matcher.py - Comptage des lexiques en une seule passe
+Compile une fois les dictionnaires de mots (y compris les expressions
+multi-mots comme 'puerto rican') et compte toutes les catégories d'un texte
+en un seul parcours.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from dictionaries import LexiconRegistry
+
+# Un mot "simple" est une suite de caractères \w : il correspond exactement
+# à un token de re.findall(r'\w+'), ce qui équivaut au motif \bmot\b
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+class LexiconMatcher:
+    """
+    Compteur de mots-clés construit une fois à partir d'un dictionnaire
+    {catégorie: liste_de_mots} (ex: GENDER_WORDS, ETHNICITY_WORDS).
+
+    Les mots simples sont comptés par une seule tokenisation du texte ;
+    les expressions (espaces, tirets) utilisent un motif précompilé
+    équivalent à celui de calculate_word_frequency. Les mots de chaque
+    catégorie viennent d'un LexiconRegistry : un mot présent dans plusieurs
+    catégories est compté dans chacune.
+    """
+
+    def __init__(self, word_categories: Dict[str, List[str]]):
+        """
+        Args:
+            word_categories: Dict {nom_catégorie: liste_de_mots}
+        """
+        self.categories = {name: list(words) for name, words in word_categories.items()}
+        self.registry = LexiconRegistry(self.categories)
+
+        # Mots uniques (en minuscules) de chaque catégorie
+        self._category_words = self.registry.words
+        self.vocabulary = list(self.registry.terms)
+
+        self._simple_words = [w for w in self.vocabulary if _WORD_PATTERN.fullmatch(w)]
+        self._phrase_patterns = {
+            w: re.compile(r'\b' + re.escape(w) + r'\b')
+            for w in self.vocabulary if not _WORD_PATTERN.fullmatch(w)
+        }
+
+    @classmethod
+    def from_dicts(cls, *dicts: Dict[str, List[str]], prefix: bool = False) -> 'LexiconMatcher':
+        """
+        Construit un matcher à partir de plusieurs dictionnaires de dictionaries.py.
+
+        Args:
+            dicts: Dictionnaires {catégorie: liste_de_mots}
+            prefix: Si True, préfixe les catégories par l'index du dictionnaire
+                    (évite les collisions de noms entre dictionnaires)
+
+        Returns:
+            LexiconMatcher
+        """
+        merged = {}
+        for i, d in enumerate(dicts):
+            for name, words in d.items():
+                merged[f'{i}_{name}' if prefix else name] = words
+        return cls(merged)
+
+    def count_words(self, text: str) -> Dict[str, int]:
+        """
+        Compte chaque mot du vocabulaire dans un texte (une seule passe pour les mots simples).
+
+        Args:
+            text: Texte à analyser
+
+        Returns:
+            Dictionnaire {mot_en_minuscules: fréquence}
+        """
+        if not isinstance(text, str):
+            return {word: 0 for word in self.vocabulary}
+
+        text_lower = text.lower()
+        tokens = Counter(_WORD_PATTERN.findall(text_lower))
+
+        counts = {word: tokens.get(word, 0) for word in self._simple_words}
+        for word, pattern in self._phrase_patterns.items():
+            counts[word] = len(pattern.findall(text_lower))
+
+        return counts
+
+    def category_counts(self, word_counts: Dict[str, int]) -> Dict[str, int]:
+        """
+        Agrège des comptes par mot en comptes par catégorie.
+
+        Args:
+            word_counts: Résultat de count_words
+
+        Returns:
+            Dictionnaire {catégorie: occurrences}
+        """
+        return {
+            name: sum(word_counts.get(w, 0) for w in words)
+            for name, words in self._category_words.items()
+        }
+
+    def count(self, text: str, total_words: Optional[int] = None) -> Dict:
+        """
+        Compte tous les mots de toutes les catégories d'un texte.
+
+        Args:
+            text: Texte à analyser
+            total_words: Nombre de mots déjà connu (évite un split du texte)
+
+        Returns:
+            Dictionnaire avec 'word_counts', 'category_counts' et 'total_words'
+        """
+        word_counts = self.count_words(text)
+
+        if total_words is None:
+            total_words = len(text.split()) if isinstance(text, str) else 0
+
+        return {
+            'word_counts': word_counts,
+            'category_counts': self.category_counts(word_counts),
+            'total_words': total_words
+        }
+
+    def word_frequency(self, word_counts: Dict[str, int], word_list: List[str]) -> Dict[str, int]:
+        """
+        Reconstruit le format de calculate_word_frequency pour une liste de mots.
+
+        Args:
+            word_counts: Résultat de count_words
+            word_list: Liste de mots (doivent appartenir au vocabulaire)
+
+        Returns:
+            Dictionnaire {mot: fréquence}
+        """
+        return {word: word_counts.get(word.lower(), 0) for word in word_list}
+
+
+def relative_frequency(occurrences: int, total_words: int) -> float:
+    """
+    Fréquence relative (occurrences pour 1000 mots).
+
+    Args:
+        occurrences: Nombre d'occurrences des mots cibles
+        total_words: Nombre total de mots
+
+    Returns:
+        Fréquence relative
+    """
+    if total_words == 0:
+        return 0.0
+    return (occurrences / total_words) * 1000
+
+
+if __name__ == "__main__":
+    from dictionaries import ETHNICITY_WORDS
+
+    matcher = LexiconMatcher(ETHNICITY_WORDS)
+    result = matcher.count("A Puerto Rican and a middle eastern man met an Indian woman.")
+    print(result['category_counts'], result['total_words'])
@@ -0,0 +1,410 @@
+"""
+ngrams.py - Comptage des n-grammes sur les identifiants de tokens
+Les n-grammes sont des clés entières (identifiants des tokens juxtaposés sur
+64 bits) calculées d'un bloc sur le tableau int32 de chaque script (token_cache) :
+pas de tuples Python ni de Counter. Le comptage peut être restreint aux
+fenêtres autour de mots cibles (extract_ngrams_around_target du notebook 4).
+
+Deux modes :
+    exact        clés et comptes en tableaux triés, fusionnés par paquets
+    approximatif Count-Min sketch + candidats les plus fréquents : mémoire
+                 fixe (largeur × profondeur), quel que soit le nombre de n-grammes
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def key_bits(n: int) -> int:
+    """
+    Bits par token d'une clé de n-gramme (64 bits au total, 32 au plus).
+    """
+    if not 1 <= n <= 64:
+        raise ValueError(f"Taille de n-gramme invalide : {n}")
+    return min(32, 64 // n)
+
+
+def pack_ngrams(ids: np.ndarray, n: int, bits: Optional[int] = None) -> np.ndarray:
+    """
+    Clés des n-grammes consécutifs d'un tableau d'identifiants.
+
+    Args:
+        ids: Identifiants des tokens (int32)
+        n: Taille des n-grammes
+        bits: Bits par token (par défaut key_bits(n))
+
+    Returns:
+        Tableau uint64 de len(ids) - n + 1 clés (n-gramme commençant à chaque position)
+    """
+    bits = key_bits(n) if bits is None else bits
+    ids = np.asarray(ids)
+    if len(ids) < n:
+        return np.zeros(0, dtype=np.uint64)
+    if len(ids) and int(ids.max()) >> bits:
+        raise ValueError(f"Identifiant de token trop grand pour des clés de {bits} bits par token")
+
+    ids = ids.astype(np.uint64)
+    count = len(ids) - n + 1
+    keys = np.zeros(count, dtype=np.uint64)
+    for j in range(n):
+        keys = (keys << np.uint64(bits)) | ids[j:j + count]
+    return keys
+
+
+def unpack_ngrams(keys: np.ndarray, n: int, bits: Optional[int] = None) -> np.ndarray:
+    """
+    Identifiants des tokens de chaque clé (inverse de pack_ngrams).
+
+    Returns:
+        Tableau clés × n d'identifiants
+    """
+    bits = key_bits(n) if bits is None else bits
+    keys = np.asarray(keys, dtype=np.uint64)
+    mask = np.uint64((1 << bits) - 1)
+    shifts = np.arange(n - 1, -1, -1, dtype=np.uint64) * np.uint64(bits)
+    return ((keys[:, None] >> shifts[None, :]) & mask).astype(np.int64)
+
+
+def window_multiplicity(is_target: np.ndarray, n: int, window: int) -> np.ndarray:
+    """
+    Nombre de fenêtres de cibles contenant chaque n-gramme.
+
+    Comme dans le notebook 4, chaque occurrence d'une cible i ouvre la fenêtre
+    [i - window, i + window] et chacun de ses n-grammes est compté : un
+    n-gramme commençant en s l'est autant de fois qu'il y a de cibles dans
+    [s + n - 1 - window, s + window].
+
+    Args:
+        is_target: Masque des tokens cibles
+        n: Taille des n-grammes
+        window: Demi-largeur de la fenêtre
+
+    Returns:
+        Tableau int64 (une valeur par n-gramme, 0 = hors de toute fenêtre)
+    """
+    length = len(is_target)
+    count = length - n + 1
+    if count <= 0:
+        return np.zeros(0, dtype=np.int64)
+    cumulative = np.concatenate([[0], np.cumsum(is_target, dtype=np.int64)])
+    starts = np.arange(count)
+    low = np.clip(starts + n - 1 - window, 0, length)
+    high = np.clip(starts + window + 1, 0, length)
+    return np.maximum(cumulative[high] - cumulative[low], 0)
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch sur des clés uint64 : estimation par excès des comptes,
+    en mémoire fixe (depth × width compteurs).
+    """
+
+    def __init__(self, width: int = 1 << 18, depth: int = 4, seed: int = 0):
+        """
+        Args:
+            width: Compteurs par ligne (arrondi à une puissance de 2)
+            depth: Nombre de lignes (fonctions de hachage)
+            seed: Graine des fonctions de hachage
+        """
+        self.log_width = max(1, int(width - 1).bit_length())
+        self.width = 1 << self.log_width
+        self.depth = depth
+        self.seed = seed
+        self.table = np.zeros((depth, self.width), dtype=np.int64)
+        rng = np.random.default_rng(seed)
+        # Hachage par multiplication-décalage : (a * clé + b) mod 2^64, bits de poids fort
+        self._a = rng.integers(0, 1 << 64, size=depth, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 1 << 64, size=depth, dtype=np.uint64)
+        self.total = 0
+
+    def _buckets(self, keys: np.ndarray, row: int) -> np.ndarray:
+        with np.errstate(over='ignore'):
+            hashed = self._a[row] * keys + self._b[row]
+        return (hashed >> np.uint64(64 - self.log_width)).astype(np.intp)
+
+    def update(self, keys: np.ndarray, weights: Optional[np.ndarray] = None) -> None:
+        """
+        Ajoute des occurrences (poids 1 par clé par défaut).
+        """
+        keys = np.asarray(keys, dtype=np.uint64)
+        if weights is None:
+            weights = np.ones(len(keys), dtype=np.int64)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(self._buckets(keys, row), weights=weights,
+                                           minlength=self.width).astype(np.int64)
+        self.total += int(np.sum(weights))
+
+    def query(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Comptes estimés (jamais inférieurs aux comptes exacts).
+        """
+        keys = np.asarray(keys, dtype=np.uint64)
+        estimates = self.table[0, self._buckets(keys, 0)]
+        for row in range(1, self.depth):
+            np.minimum(estimates, self.table[row, self._buckets(keys, row)], out=estimates)
+        return estimates
+
+    def merge(self, other: 'CountMinSketch') -> None:
+        """
+        Ajoute les comptes d'un sketch de mêmes dimensions et même graine.
+        """
+        if (other.width, other.depth, other.seed) != (self.width, self.depth, self.seed):
+            raise ValueError("Sketches de dimensions ou de graines différentes")
+        self.table += other.table
+        self.total += other.total
+
+
+class _ExactCounts:
+    """
+    Comptes exacts : clés triées, comptes et ordre de première rencontre,
+    avec un tampon fusionné par paquets.
+    """
+
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.first = np.zeros(0, dtype=np.int64)
+        self._buffer: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._buffered = 0
+
+    def add(self, keys: np.ndarray, weights: np.ndarray, order: np.ndarray) -> None:
+        self._buffer.append((keys, weights, order))
+        self._buffered += len(keys)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        keys = np.concatenate([self.keys] + [b[0] for b in self._buffer])
+        weights = np.concatenate([self.counts] + [b[1] for b in self._buffer])
+        order = np.concatenate([self.first] + [b[2] for b in self._buffer])
+        self._buffer, self._buffered = [], 0
+
+        # Les ordres sont déjà croissants (état, puis documents ajoutés dans l'ordre) :
+        # un tri stable par clé met en tête de chaque clé sa première rencontre
+        sort = np.argsort(keys, kind='stable')
+        keys, weights, order = keys[sort], weights[sort], order[sort]
+        starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]])) if len(keys) else \
+            np.zeros(0, dtype=np.intp)
+        self.keys = keys[starts]
+        self.counts = np.add.reduceat(weights, starts) if len(keys) else weights
+        self.first = order[starts]
+
+    def top(self, k: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        self.flush()
+        # Comptes décroissants, égalités dans l'ordre de première rencontre (Counter.most_common)
+        ranking = np.lexsort((self.first, -self.counts))
+        if k is not None:
+            ranking = ranking[:k]
+        return self.keys[ranking], self.counts[ranking]
+
+
+class _SketchCounts:
+    """
+    Comptes approximatifs : Count-Min sketch et au plus `capacity` candidats
+    (n-grammes aux estimations les plus élevées).
+    """
+
+    def __init__(self, capacity: int, width: int, depth: int, seed: int):
+        self.capacity = capacity
+        self.sketch = CountMinSketch(width, depth, seed)
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.first = np.zeros(0, dtype=np.int64)
+
+    def add(self, keys: np.ndarray, weights: np.ndarray, order: np.ndarray) -> None:
+        if not len(keys):
+            return
+        self.sketch.update(keys, weights)
+        batch_keys, index = np.unique(keys, return_index=True)
+        candidates = np.concatenate([self.keys, batch_keys])
+        first = np.concatenate([self.first, order[index]])
+        candidates, index = np.unique(candidates, return_index=True)
+        first = first[index]
+        if len(candidates) > self.capacity:
+            estimates = self.sketch.query(candidates)
+            keep = np.argpartition(-estimates, self.capacity - 1)[:self.capacity]
+            candidates, first = candidates[keep], first[keep]
+        self.keys, self.first = candidates, first
+
+    def flush(self) -> None:
+        pass
+
+    def top(self, k: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        estimates = self.sketch.query(self.keys)
+        ranking = np.lexsort((self.first, -estimates))
+        if k is not None:
+            ranking = ranking[:k]
+        return self.keys[ranking], estimates[ranking]
+
+
+class NGramCounter:
+    """
+    Compteur de n-grammes par groupe (décennie...) sur des identifiants de tokens.
+    """
+
+    def __init__(self, n: int = 2,
+                 targets: Optional[Iterable[int]] = None,
+                 window: int = 5,
+                 approximate: bool = False,
+                 capacity: int = 10000,
+                 width: int = 1 << 18,
+                 depth: int = 4,
+                 seed: int = 0,
+                 buffer_size: int = 1 << 20):
+        """
+        Args:
+            n: Taille des n-grammes
+            targets: Identifiants des mots cibles (None = tous les n-grammes du texte)
+            window: Demi-largeur de la fenêtre autour de chaque cible
+            approximate: Count-Min sketch au lieu des comptes exacts
+            capacity: Candidats gardés par groupe (mode approximatif, >= k demandé)
+            width: Largeur du sketch (mode approximatif)
+            depth: Profondeur du sketch (mode approximatif)
+            seed: Graine du sketch
+            buffer_size: Clés accumulées avant fusion (mode exact)
+        """
+        self.n = n
+        self.bits = key_bits(n)
+        self.targets = None if targets is None else np.unique(np.asarray(list(targets), dtype=np.int64))
+        self.window = window
+        self.approximate = approximate
+        self.capacity = capacity
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.buffer_size = buffer_size
+        self.groups: Dict = {}
+        self._documents = 0
+
+    def _counts_for(self, group):
+        counts = self.groups.get(group)
+        if counts is None:
+            if self.approximate:
+                counts = _SketchCounts(self.capacity, self.width, self.depth, self.seed)
+            else:
+                counts = _ExactCounts(self.buffer_size)
+            self.groups[group] = counts
+        return counts
+
+    def document_ngrams(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Clés des n-grammes d'un document et leur nombre d'occurrences comptées.
+
+        Args:
+            ids: Identifiants des tokens du document
+
+        Returns:
+            (clés, poids, positions) dans l'ordre du texte, n-grammes hors fenêtre exclus
+        """
+        keys = pack_ngrams(ids, self.n, self.bits)
+        if self.targets is None:
+            return keys, np.ones(len(keys), dtype=np.int64), np.arange(len(keys), dtype=np.int64)
+        weights = window_multiplicity(np.isin(ids, self.targets), self.n, self.window)
+        positions = np.flatnonzero(weights)
+        return keys[positions], weights[positions], positions.astype(np.int64)
+
+    def add(self, ids: np.ndarray, group=None) -> None:
+        """
+        Compte les n-grammes d'un document.
+
+        Args:
+            ids: Identifiants des tokens (TokenCache.ids)
+            group: Groupe du document (ex: décennie)
+        """
+        keys, weights, positions = self.document_ngrams(ids)
+        # Ordre de première rencontre : (document, position)
+        order = (np.int64(self._documents) << np.int64(32)) + positions
+        self._documents += 1
+        if len(keys):
+            self._counts_for(group).add(keys, weights, order)
+
+    def top(self, k: Optional[int] = 10, group=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        N-grammes les plus fréquents d'un groupe.
+
+        Returns:
+            (tableau k × n d'identifiants, comptes ou estimations)
+        """
+        counts = self.groups.get(group)
+        if counts is None:
+            return np.zeros((0, self.n), dtype=np.int64), np.zeros(0, dtype=np.int64)
+        keys, values = counts.top(k)
+        return unpack_ngrams(keys, self.n, self.bits), values
+
+    def top_frame(self, vocabulary: Sequence[str], k: Optional[int] = 10,
+                  group_name: str = 'decade') -> pd.DataFrame:
+        """
+        N-grammes les plus fréquents de chaque groupe (groupes triés).
+
+        Args:
+            vocabulary: Tokens par identifiant (TokenCache.vocabulary)
+            k: Nombre de n-grammes par groupe (None = tous, mode exact)
+            group_name: Nom de la colonne des groupes
+
+        Returns:
+            DataFrame (groupe, rank, ngram, count)
+        """
+        rows = []
+        for group in sorted(self.groups):
+            ids, values = self.top(k, group)
+            for rank, (ngram, value) in enumerate(zip(ids.tolist(), values.tolist()), start=1):
+                rows.append({group_name: group, 'rank': rank,
+                             'ngram': ' '.join(vocabulary[i] for i in ngram), 'count': value})
+        return pd.DataFrame(rows, columns=[group_name, 'rank', 'ngram', 'count'])
+
+
+def ngrams_by_decade(df: pd.DataFrame, token_cache,
+                     targets: Optional[Iterable[str]] = None,
+                     n: int = 2, window: int = 5, k: int = 10,
+                     text_column: str = 'clean_text',
+                     **kwargs) -> pd.DataFrame:
+    """
+    N-grammes les plus fréquents par décennie (analyze_associations_by_decade du notebook 4).
+
+    Args:
+        df: DataFrame des scripts (colonnes decade et texte)
+        token_cache: TokenCache des identifiants de tokens
+        targets: Mots cibles (None = tous les n-grammes)
+        n: Taille des n-grammes
+        window: Demi-largeur de la fenêtre autour des cibles
+        k: N-grammes par décennie
+        text_column: Colonne du texte
+        **kwargs: Paramètres de NGramCounter (approximate, width, depth, capacity...)
+
+    Returns:
+        DataFrame (decade, rank, ngram, count)
+    """
+    texts = df[text_column].tolist()
+    all_ids = [token_cache.ids(text) for text in texts]
+    target_ids = None
+    if targets is not None:
+        target_ids = [token_cache.token_ids[t] for t in dict.fromkeys(targets) if t in token_cache.token_ids]
+
+    counter = NGramCounter(n, target_ids, window, **kwargs)
+    for ids, decade in zip(all_ids, df['decade'].tolist()):
+        if not pd.isna(decade):
+            counter.add(ids, decade)
+    return counter.top_frame(token_cache.vocabulary, k)
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import tempfile
+    import time
+
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+    from synthetic import generate_corpus
+    from token_cache import TokenCache
+
+    df = generate_corpus(num_scripts=200, words_per_script=20000, seed=1)
+    cache = TokenCache(tempfile.mkdtemp(), tokenizer='regex')
+    for approximate in (False, True):
+        start = time.perf_counter()
+        top = ngrams_by_decade(df, cache, n=3, k=5, approximate=approximate, text_column='raw_text')
+        print(f"approximate={approximate} : {time.perf_counter() - start:.1f} s")
+        print(top.head(10).to_string(index=False))
@@ -5,9 +5,32 @@ Extrait les dialogues, nettoie les noms de personnages, prépare le texte pour l
 
 import re
 import os
-from typing import Dict, List, Optional
+import itertools
+from typing import Dict, Iterable, Iterator, List, Optional
+import numpy as np
 import pandas as pd
 
+from instrumentation import instrumented, stage
+
+
+# Motifs compilés une seule fois (et non à chaque ligne / à chaque script)
+_CHARACTER_PATTERN = re.compile(r'^([A-Z\s]{2,30})(?:\:|$)')
+_PARENTHESES_PATTERN = re.compile(r'\([^)]*\)')
+_BRACKETS_PATTERN = re.compile(r'\[[^\]]*\]')
+_SCENE_NUMBER_PATTERN = re.compile(r'(SCENE|SÉQUENCE)\s+\d+', flags=re.IGNORECASE)
+_BLANK_LINES_PATTERN = re.compile(r'\n\s*\n')
+
+# Nettoyage du notebook 0 (texte du corpus scripts_clean.pkl)
+_CREDITS_PATTERN = re.compile(r'(Written by|Screenplay by|Script by).*?\n', flags=re.IGNORECASE)
+_TRANSITIONS_PATTERN = re.compile(r'(FADE IN:|FADE OUT:|CUT TO:)')
+_SHORT_PARENTHESES_PATTERN = re.compile(r'\(.*?\)')
+_INT_EXT_PATTERN = re.compile(r'INT\.|EXT\.')
+_UPPERCASE_LINE_PATTERN = re.compile(r'^[A-Z\s]+$', flags=re.MULTILINE)
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Version du parsing (incluse dans la clé des checkpoints, avec le code du module)
+PARSER_VERSION = 2
+
 
 def extract_character_name(line: str) -> Optional[str]:
     """
@@ -21,14 +44,14 @@ def extract_character_name(line: str) -> Optional[str]:
         Nom du personnage ou None si non trouvé
     """
     # Pattern pour détecter un nom de personnage (tout en majuscules suivi de : ou espace)
-    pattern = r'^([A-Z\s]{2,30})(?:\:|$)'
-    match = re.match(pattern, line.strip())
+    match = _CHARACTER_PATTERN.match(line.strip())
     
     if match:
         return match.group(1).strip()
     return None
 
 
+@instrumented('parser.clean_script_text', items=lambda args, kwargs, result: 1)
 def clean_script_text(text: str, remove_stage_directions: bool = True) -> str:
     """
     Nettoie le texte d'un script.
@@ -45,14 +68,14 @@ def clean_script_text(text: str, remove_stage_directions: bool = True) -> str:
     
     # Supprimer les indications scéniques (ex: (Il sort), [pause], etc.)
     if remove_stage_directions:
-        text = re.sub(r'\([^)]*\)', '', text)
-        text = re.sub(r'\[[^\]]*\]', '', text)
+        text = _PARENTHESES_PATTERN.sub('', text)
+        text = _BRACKETS_PATTERN.sub('', text)
     
     # Supprimer les numéros de scène
-    text = re.sub(r'(SCENE|SÉQUENCE)\s+\d+', '', text, flags=re.IGNORECASE)
+    text = _SCENE_NUMBER_PATTERN.sub('', text)
     
     # Supprimer les lignes vides multiples
-    text = re.sub(r'\n\s*\n', '\n\n', text)
+    text = _BLANK_LINES_PATTERN.sub('\n\n', text)
     
     # Supprimer les espaces en début/fin
     text = text.strip()
@@ -60,75 +83,155 @@ def clean_script_text(text: str, remove_stage_directions: bool = True) -> str:
     return text
 
 
-def extract_dialogues(script_text: str) -> List[Dict[str, str]]:
+def normalize_script_text(raw_text: str) -> str:
     """
-    Extrait les dialogues d'un script avec les noms des personnages.
+    Nettoie le texte brut d'un script comme le notebook 0 (colonne clean_text de
+    scripts_clean.pkl) : crédits, transitions, indications scéniques, INT./EXT.
+    et lignes en majuscules supprimés, espaces normalisés (texte sur une ligne).
     
     Args:
-        script_text: Texte complet du script
+        raw_text: Texte brut du script
         
     Returns:
-        Liste de dictionnaires {'character': nom, 'dialogue': texte}
+        Texte nettoyé
     """
-    dialogues = []
-    lines = script_text.split('\n')
-    
-    current_character = None
-    current_dialogue = []
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            # Ligne vide: sauvegarder le dialogue en cours si existant
-            if current_character and current_dialogue:
-                dialogues.append({
-                    'character': current_character,
-                    'dialogue': ' '.join(current_dialogue)
-                })
-                current_character = None
-                current_dialogue = []
-            continue
+    text = _CREDITS_PATTERN.sub('', raw_text)
+    text = _TRANSITIONS_PATTERN.sub('', text)
+    text = _SHORT_PARENTHESES_PATTERN.sub('', text)  # Supprimer les indications scéniques
+    text = _INT_EXT_PATTERN.sub('', text)  # Supprimer INT./EXT.
+    text = _UPPERCASE_LINE_PATTERN.sub('', text)  # Supprimer les noms de personnages en majuscules seuls
+    text = _WHITESPACE_PATTERN.sub(' ', text)  # Normaliser les espaces
+    return text.strip()
+
+
+def scan_script(script_text: str) -> Dict:
+    """
+    Repère les répliques d'un script en un seul parcours, sans copier le texte.
+    
+    Chaque réplique est un enregistrement compact : identifiant du personnage
+    (noms internés par script) et offsets [début, fin) dans script_text. Les
+    lignes de la réplique sont celles de script_text[début:fin].
+    
+    Args:
+        script_text: Texte complet du script (nettoyé)
         
-        # Vérifier si c'est un nom de personnage
-        character_name = extract_character_name(line)
+    Returns:
+        Dictionnaire {'characters': noms, 'character_ids': int32,
+                      'starts': int64, 'ends': int64}
+    """
+    characters = []
+    name_ids = {}
+    character_ids, starts, ends = [], [], []
+    
+    current_id = -1      # personnage en cours (-1 : aucun)
+    dialogue_start = -1  # début de la réplique en cours (-1 : vide)
+    dialogue_end = -1
+    position = 0
+    
+    for line in script_text.split('\n'):
+        line_start = position
+        position += len(line) + 1
+        stripped = line.strip()
         
-        if character_name:
-            # Nouveau personnage: sauvegarder le dialogue précédent
-            if current_character and current_dialogue:
-                dialogues.append({
-                    'character': current_character,
-                    'dialogue': ' '.join(current_dialogue)
-                })
+        if not stripped:
+            # Ligne vide: clore la réplique en cours si existante
+            if current_id >= 0 and dialogue_start >= 0:
+                character_ids.append(current_id)
+                starts.append(dialogue_start)
+                ends.append(dialogue_end)
+                current_id = -1
+                dialogue_start = -1
+            continue
+        
+        match = _CHARACTER_PATTERN.match(stripped)
+        if match:
+            # Nouveau personnage: clore la réplique précédente
+            if current_id >= 0 and dialogue_start >= 0:
+                character_ids.append(current_id)
+                starts.append(dialogue_start)
+                ends.append(dialogue_end)
             
-            current_character = character_name
-            current_dialogue = []
+            name = match.group(1).strip()
+            current_id = name_ids.get(name, -1)
+            if current_id < 0:
+                current_id = name_ids[name] = len(characters)
+                characters.append(name)
+            dialogue_start = -1
             
             # Si le dialogue commence sur la même ligne (après le :)
-            if ':' in line:
-                dialogue_part = line.split(':', 1)[1].strip()
-                if dialogue_part:
-                    current_dialogue.append(dialogue_part)
-        else:
-            # C'est une ligne de dialogue (continuation)
-            if current_character:
-                current_dialogue.append(line)
+            colon = line.find(':')
+            if colon >= 0 and line[colon + 1:].strip():
+                dialogue_start = line_start + colon + 1
+                dialogue_end = line_start + len(line)
+        elif current_id >= 0:
+            # Ligne de dialogue (continuation)
+            if dialogue_start < 0:
+                dialogue_start = line_start
+            dialogue_end = line_start + len(line)
+    
+    if current_id >= 0 and dialogue_start >= 0:
+        character_ids.append(current_id)
+        starts.append(dialogue_start)
+        ends.append(dialogue_end)
+    
+    return {
+        'characters': characters,
+        'character_ids': np.array(character_ids, dtype=np.int32),
+        'starts': np.array(starts, dtype=np.int64),
+        'ends': np.array(ends, dtype=np.int64)
+    }
+
+
+def dialogue_text(script_text: str, start: int, end: int) -> str:
+    """
+    Texte d'une réplique repérée par scan_script (lignes nettoyées jointes par un espace).
+    """
+    text = script_text[start:end]
+    if '\n' not in text:
+        return text.strip()
+    return ' '.join(line.strip() for line in text.split('\n'))
+
+
+def dialogues_from_scan(script_text: str, scan: Dict) -> List[Dict[str, str]]:
+    """
+    Matérialise les répliques repérées par scan_script au format de extract_dialogues.
+    """
+    characters = scan['characters']
     
-    # Sauvegarder le dernier dialogue
-    if current_character and current_dialogue:
-        dialogues.append({
-            'character': current_character,
-            'dialogue': ' '.join(current_dialogue)
-        })
+    return [
+        {'character': characters[c], 'dialogue': dialogue_text(script_text, start, end)}
+        for c, start, end in zip(scan['character_ids'].tolist(),
+                                 scan['starts'].tolist(),
+                                 scan['ends'].tolist())
+    ]
+
+
+@instrumented('parser.extract_dialogues', items=lambda args, kwargs, result: len(result))
+def extract_dialogues(script_text: str) -> List[Dict[str, str]]:
+    """
+    Extrait les dialogues d'un script avec les noms des personnages.
     
-    return dialogues
+    Args:
+        script_text: Texte complet du script
+        
+    Returns:
+        Liste de dictionnaires {'character': nom, 'dialogue': texte}
+    """
+    return dialogues_from_scan(script_text, scan_script(script_text))
 
 
-def parse_script_file(filepath: str) -> Dict:
+@instrumented('parser.parse_script_file', items=lambda args, kwargs, result: 1,
+              bytes_read=lambda args, kwargs: os.path.getsize(args[0] if args else kwargs['filepath']))
+def parse_script_file(filepath: str,
+                      keep_raw_text: bool = True,
+                      keep_dialogues: bool = True) -> Dict:
     """
     Parse un fichier de script complet.
     
     Args:
         filepath: Chemin vers le fichier .txt
+        keep_raw_text: Si False, ne conserve pas le texte brut (économie mémoire)
+        keep_dialogues: Si False, ne conserve pas la liste des dialogues
         
     Returns:
         Dictionnaire avec le texte nettoyé et les dialogues extraits
@@ -136,50 +239,329 @@ def parse_script_file(filepath: str) -> Dict:
     with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
         raw_text = f.read()
     
+    return parse_script_text(filepath, raw_text, keep_raw_text, keep_dialogues)
+
+
+@instrumented('parser.parse_script_text', items=lambda args, kwargs, result: 1)
+def parse_script_text(filepath: str,
+                      raw_text: str,
+                      keep_raw_text: bool = True,
+                      keep_dialogues: bool = True) -> Dict:
+    """
+    Parse le texte d'un script déjà lu (ex: par prefetch.prefetch_texts).
+    
+    Args:
+        filepath: Chemin du fichier d'origine
+        raw_text: Texte brut du script
+        keep_raw_text: Si False, ne conserve pas le texte brut (économie mémoire)
+        keep_dialogues: Si False, ne conserve pas la liste des dialogues
+        
+    Returns:
+        Dictionnaire au format de parse_script_file
+    """
     clean_text = clean_script_text(raw_text)
-    dialogues = extract_dialogues(clean_text)
+    # Même nom d'étape que extract_dialogues : le repérage des répliques est mesuré
+    # quel que soit le point d'entrée (fichier, répertoire ou texte seul)
+    with stage('parser.extract_dialogues') as counters:
+        scan = scan_script(clean_text)
+        dialogues = dialogues_from_scan(clean_text, scan) if keep_dialogues else None
+        counters['items'] = len(scan['character_ids'])
+    names = scan['characters']
     
     return {
         'filepath': filepath,
         'filename': os.path.basename(filepath),
-        'raw_text': raw_text,
+        'raw_text': raw_text if keep_raw_text else None,
         'clean_text': clean_text,
         'dialogues': dialogues,
-        'num_dialogues': len(dialogues),
-        'characters': list(set(d['character'] for d in dialogues))
+        'num_dialogues': len(scan['character_ids']),
+        # Personnages ayant au moins une réplique, par ordre d'apparition
+        'characters': [names[i] for i in np.unique(scan['character_ids']).tolist()]
     }
 
 
-def load_scripts_from_directory(directory: str, limit: Optional[int] = None) -> pd.DataFrame:
+def iter_script_files(directory: str, limit: Optional[int] = None) -> Iterator[str]:
+    """
+    Parcourt paresseusement les fichiers .txt d'un répertoire.
+    
+    Args:
+        directory: Chemin vers le dossier contenant les scripts .txt
+        limit: Nombre maximum de fichiers (None pour tous)
+        
+    Yields:
+        Chemins des fichiers
+    """
+    import glob
+    
+    files = glob.iglob(os.path.join(directory, "*.txt"))
+    if limit:
+        files = itertools.islice(files, limit)
+    yield from files
+
+
+def iter_parsed_scripts(directory: str,
+                        metadata: Optional[pd.DataFrame] = None,
+                        limit: Optional[int] = None,
+                        keep_raw_text: bool = False,
+                        keep_dialogues: bool = False,
+                        read_ahead: int = 16) -> Iterator[Dict]:
+    """
+    Générateur de scripts parsés : un seul script est en mémoire à la fois
+    (plus au plus `read_ahead` fichiers lus en avance).
+    
+    Par défaut le texte brut et les dialogues ne sont pas conservés ; seul
+    `clean_text` (et les métadonnées) est transmis aux consommateurs.
+    
+    Args:
+        directory: Chemin vers le dossier contenant les scripts .txt
+        metadata: DataFrame avec une colonne 'filename' (ex: scripts_metadata.csv) ;
+                  si fourni, seuls ces fichiers sont parsés et leurs colonnes
+                  (title, release_year, decade...) sont ajoutées à chaque script
+        limit: Nombre maximum de scripts (None pour tous)
+        keep_raw_text: Conserver le texte brut
+        keep_dialogues: Conserver la liste des dialogues
+        read_ahead: Fichiers lus en avance par des threads (0 = lecture bloquante)
+        
+    Yields:
+        Dictionnaires au format de parse_script_file (+ métadonnées)
+    """
+    if metadata is None:
+        entries = ((filepath, {}) for filepath in iter_script_files(directory))
+    else:
+        entries = (
+            (os.path.join(directory, row['filename']), row)
+            for row in metadata.to_dict('records')
+        )
+    
+    paths, metas = itertools.tee(entries)
+    texts = _read_texts((filepath for filepath, _ in paths), read_ahead)
+    
+    count = 0
+    for (filepath, raw_text, error), (_, meta) in zip(texts, metas):
+        if limit and count >= limit:
+            break
+        if isinstance(error, FileNotFoundError):
+            continue
+        
+        try:
+            if error is not None:
+                raise error
+            parsed = parse_script_text(filepath, raw_text, keep_raw_text=keep_raw_text,
+                                       keep_dialogues=keep_dialogues)
+        except Exception as e:
+            print(f"  Erreur sur {filepath}: {e}")
+            continue
+        
+        for key, value in meta.items():
+            parsed.setdefault(key, value)
+        
+        count += 1
+        yield parsed
+
+
+def _read_files(filepaths: Iterable[str]) -> Iterator[tuple]:
+    """
+    Lecture bloquante, fichier par fichier : (chemin, octets ou None, erreur ou None).
+    """
+    from prefetch import read_bytes
+    
+    for filepath in filepaths:
+        try:
+            yield filepath, read_bytes(filepath), None
+        except OSError as e:
+            yield filepath, None, e
+
+
+def _read_texts(filepaths: Iterable[str], read_ahead: int) -> Iterator[tuple]:
+    """
+    Textes des fichiers dans l'ordre : (chemin, texte ou None, erreur ou None).
+    Avec read_ahead > 0, les lectures sont anticipées par un pool de threads ;
+    avec 0, chaque fichier est lu au moment où il est demandé.
+    
+    L'attente de chaque fichier est mesurée comme l'étape 'prefetch.read'
+    (bytes_read = taille du fichier lu).
+    """
+    from prefetch import decode_script, prefetch_files
+    
+    files = prefetch_files(filepaths, read_ahead=read_ahead) if read_ahead > 0 else _read_files(filepaths)
+    while True:
+        with stage('prefetch.read') as counters:
+            item = next(files, None)
+            if item is not None:
+                counters['items'] = 1
+                counters['bytes_read'] = len(item[1]) if item[1] is not None else 0
+        if item is None:
+            return
+        filepath, data, error = item
+        yield filepath, (decode_script(data) if data is not None else None), error
+
+
+def _parse_chunk(filepaths: List[str], read_ahead: int = 16) -> Dict:
+    """
+    Parse un lot de fichiers (exécuté dans un processus worker).
+    Les fichiers suivants sont lus par des threads pendant le parsing du courant.
+    
+    Args:
+        filepaths: Chemins des fichiers du lot
+        read_ahead: Fichiers lus en avance (0 = lecture bloquante)
+        
+    Returns:
+        Liste alignée sur filepaths de {'parsed': script parsé ou None, 'error': message ou None}
+    """
+    results = []
+    for filepath, raw_text, error in _read_texts(filepaths, read_ahead):
+        try:
+            if error is not None:
+                raise error
+            results.append({'parsed': parse_script_text(filepath, raw_text), 'error': None})
+        except Exception as e:
+            results.append({'parsed': None, 'error': str(e)})
+    return results
+
+
+_CODE_DIGEST: Optional[str] = None
+
+
+def _code_digest() -> str:
+    """
+    Empreinte du code de parsing (PARSER_VERSION et source de ce module).
+    """
+    global _CODE_DIGEST
+    if _CODE_DIGEST is None:
+        import hashlib
+        
+        h = hashlib.sha1(str(PARSER_VERSION).encode('utf-8'))
+        with open(os.path.abspath(__file__), 'rb') as f:
+            h.update(f.read())
+        _CODE_DIGEST = h.hexdigest()
+    return _CODE_DIGEST
+
+
+def _file_checkpoint_path(checkpoint_dir: str, filepath: str) -> str:
+    """
+    Chemin du checkpoint d'un fichier, identifié par son chemin, sa taille, sa date
+    de modification (os.stat, le contenu n'est pas relu) et le code du parser : un
+    fichier modifié (ou un parser modifié) est reparsé, et ajouter ou retirer des
+    fichiers ne change pas les autres clés.
+    """
+    import hashlib
+    
+    stat = os.stat(filepath)
+    key = f"{os.path.abspath(filepath)}\0{stat.st_size}\0{stat.st_mtime_ns}\0{_code_digest()}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+    return os.path.join(checkpoint_dir, digest[:2], f"{digest}.pkl")
+
+
+def _save_checkpoint(path: str, result: Dict) -> None:
+    """
+    Écrit un checkpoint de façon atomique (fichier temporaire puis renommage).
+    """
+    import pickle
+    
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+@instrumented('parser.load_scripts_from_directory', items=lambda args, kwargs, result: len(result))
+def load_scripts_from_directory(directory: str,
+                                limit: Optional[int] = None,
+                                n_workers: int = 1,
+                                chunksize: int = 50,
+                                checkpoint_dir: Optional[str] = None,
+                                read_ahead: int = 16) -> pd.DataFrame:
     """
     Charge et parse tous les scripts d'un répertoire.
     
+    Les fichiers (triés par chemin) sont traités par lots de `chunksize`. Avec
+    n_workers > 1 les lots sont répartis sur un pool de processus ; avec
+    `checkpoint_dir`, le résultat de chaque fichier parsé sans erreur est sauvegardé
+    sur disque dès que son lot est terminé, et un chargement interrompu ne reparse
+    que les fichiers restants (ainsi que ceux en erreur). Un checkpoint n'est
+    réutilisé que si le chemin, la taille et la date de modification du fichier
+    (pas son contenu) et le code du parser n'ont pas changé. Le DataFrame retourné
+    est identique quel que soit le mode.
+    
     Args:
         directory: Chemin vers le dossier contenant les scripts .txt
         limit: Nombre maximum de fichiers à charger (None pour tous)
+        n_workers: Nombre de processus (1 = séquentiel, None = tous les cœurs)
+        chunksize: Nombre de fichiers par lot
+        checkpoint_dir: Dossier des checkpoints (None pour désactiver la reprise)
+        read_ahead: Fichiers lus en avance par des threads dans chaque processus
+                    (0 = lecture bloquante)
         
     Returns:
         DataFrame avec les scripts parsés
     """
     import glob
+    import pickle
     
-    script_files = glob.glob(os.path.join(directory, "*.txt"))
+    script_files = sorted(glob.glob(os.path.join(directory, "*.txt")))
     
     if limit:
         script_files = script_files[:limit]
     
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    chunksize = max(1, chunksize)
+    
+    results: List[Optional[Dict]] = [None] * len(script_files)
+    
     print(f"Chargement de {len(script_files)} scripts...")
     
-    parsed_scripts = []
-    for i, filepath in enumerate(script_files):
-        if i % 100 == 0:
-            print(f"  Progression: {i}/{len(script_files)}")
+    # Reprise : recharger les fichiers déjà traités
+    checkpoint_paths: List[Optional[str]] = [None] * len(script_files)
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        for i, filepath in enumerate(script_files):
+            try:
+                path = _file_checkpoint_path(checkpoint_dir, filepath)
+            except OSError:
+                continue
+            checkpoint_paths[i] = path
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    results[i] = pickle.load(f)
         
-        try:
-            parsed = parse_script_file(filepath)
-            parsed_scripts.append(parsed)
-        except Exception as e:
-            print(f"  Erreur sur {filepath}: {e}")
+        resumed = sum(1 for r in results if r is not None)
+        if resumed:
+            print(f"  Reprise : {resumed}/{len(script_files)} fichiers déjà traités")
+    
+    pending = [i for i, r in enumerate(results) if r is None]
+    chunks = [pending[i:i + chunksize] for i in range(0, len(pending), chunksize)]
+    done_files = len(script_files) - len(pending)
+    
+    def _store(chunk: List[int], chunk_results: List[Dict]) -> None:
+        nonlocal done_files
+        for i, result in zip(chunk, chunk_results):
+            results[i] = result
+            if result['error'] is not None:
+                # Pas de checkpoint : une erreur (peut-être transitoire) est retentée au prochain chargement
+                print(f"  Erreur sur {script_files[i]}: {result['error']}")
+            elif checkpoint_paths[i]:
+                os.makedirs(os.path.dirname(checkpoint_paths[i]), exist_ok=True)
+                _save_checkpoint(checkpoint_paths[i], result)
+        done_files += len(chunk)
+        print(f"  Progression: {done_files}/{len(script_files)}")
+    
+    def _paths(chunk: List[int]) -> List[str]:
+        return [script_files[i] for i in chunk]
+    
+    if n_workers > 1 and len(chunks) > 1:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = {executor.submit(_parse_chunk, _paths(chunk), read_ahead): k
+                       for k, chunk in enumerate(chunks)}
+            for future in as_completed(futures):
+                _store(chunks[futures[future]], future.result())
+    else:
+        for chunk in chunks:
+            _store(chunk, _parse_chunk(_paths(chunk), read_ahead))
+    
+    parsed_scripts = [result['parsed'] for result in results if result['parsed'] is not None]
     
     return pd.DataFrame(parsed_scripts)
 
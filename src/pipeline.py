@@ -0,0 +1,796 @@
+"""
+pipeline.py - Exécution sans notebook de toute la chaîne d'analyse
+Les étapes (ingest, clean, tokenise, score, aggregate, uncertainty, context, embed, plot)
+forment un graphe de dépendances ; chacune lit et écrit des fichiers. Une étape est
+sautée si l'empreinte de ses entrées (fichiers, paramètres, code des modules
+utilisés) n'a pas changé depuis sa dernière exécution réussie, et les étapes
+indépendantes s'exécutent en parallèle.
+
+Les fichiers produits sont ceux des notebooks 0 à 4 (data/processed,
+results/*.csv, results/figures/*.png).
+
+Usage:
+    python src/pipeline.py --scripts-dir chemin/scripts --metadata chemin/metadata.csv
+    python src/pipeline.py --stages aggregate plot --n-workers 3
+    python src/pipeline.py --exclude embed context  # sans gensim ni spaCy
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SRC_DIR)
+
+
+# ===== LEXIQUES DES NOTEBOOKS =====
+
+def cooccurrence_categories():
+    """
+    Groupes sociaux et catégories de comportements de la matrice de co-occurrence (notebook 4).
+    """
+    from dictionaries import (GENDER_WORDS, ETHNICITY_WORDS, LGBTQ_WORDS,
+                              ACTION_VERBS, RACIAL_STEREOTYPES)
+
+    social_groups = {
+        'Femmes': GENDER_WORDS['female'],
+        'Hommes': GENDER_WORDS['male'],
+        'Afro-Américains': ETHNICITY_WORDS.get('african_american', ['black', 'african']),
+        'Asiatiques': ETHNICITY_WORDS.get('asian', ['asian', 'chinese', 'japanese']),
+        'Hispaniques': ETHNICITY_WORDS.get('hispanic', ['hispanic', 'latino', 'latina']),
+        'LGBTQ+': LGBTQ_WORDS.get('neutral', ['gay', 'lesbian', 'queer', 'transgender'])
+    }
+    behavior_categories = {
+        'Violence': ACTION_VERBS.get('violence', ['kill', 'fight', 'attack', 'shoot', 'beat']),
+        'Pouvoir': ACTION_VERBS.get('power', ['lead', 'command', 'control', 'decide', 'rule']),
+        'Soumission': ACTION_VERBS.get('submission', ['obey', 'serve', 'submit', 'follow', 'comply']),
+        'Émotion': ACTION_VERBS.get('emotion', ['cry', 'scream', 'feel', 'worry', 'fear']),
+        'Domesticité': ['cook', 'clean', 'care', 'nurture', 'raise', 'mother'],
+        'Crime': RACIAL_STEREOTYPES['criminal'],
+        'Pauvreté': RACIAL_STEREOTYPES['poverty']
+    }
+    return social_groups, behavior_categories
+
+
+# ===== ÉTAPES =====
+# Chaque étape reçoit la configuration (dict de chemins et d'options) et
+# communique avec les autres uniquement par fichiers.
+
+def _path(config: Dict, *parts: str) -> str:
+    return os.path.join(config[parts[0]], *parts[1:])
+
+
+def _load_corpus(config: Dict) -> pd.DataFrame:
+    return pd.read_pickle(_path(config, 'data_dir', 'scripts_clean.pkl'))
+
+
+def _token_cache(config: Dict):
+    from token_cache import TokenCache
+    return TokenCache(_path(config, 'cache_dir', 'tokens'), tokenizer=config['tokenizer'])
+
+
+def stage_ingest(config: Dict) -> None:
+    """
+    Métadonnées (année, décennie, période 1960-2020) et association titre -> fichier.
+    """
+    from title_index import ScriptFileIndex, matching_report
+
+    df_meta = pd.read_csv(config['metadata'])
+    df_meta.columns = [c.strip() for c in df_meta.columns]
+
+    year_col = config.get('year_column')
+    if year_col is None:
+        candidates = [c for c in df_meta.columns if 'year' in c.lower() or 'date' in c.lower()]
+        if not candidates:
+            raise ValueError(f"Aucune colonne d'année dans {config['metadata']}")
+        year_col = candidates[0]
+
+    df_meta['release_year'] = pd.to_numeric(df_meta[year_col], errors='coerce')
+    df_meta = df_meta.dropna(subset=['release_year'])
+    df_meta['decade'] = (df_meta['release_year'] // 10) * 10
+    df_meta = df_meta[(df_meta['release_year'] >= 1960) & (df_meta['release_year'] <= 2020)]
+
+    imdb_columns = [c for c in df_meta.columns if 'imdb' in c.lower()]
+    matched = ScriptFileIndex.from_directory(config['scripts_dir']).match_frame(
+        df_meta, 'title', imdb_columns[0] if imdb_columns else None)
+
+    os.makedirs(config['data_dir'], exist_ok=True)
+    report = matching_report(matched)
+    report[['title', 'release_year', 'match_status', 'match_method', 'match_score', 'match_candidates']].to_csv(
+        _path(config, 'data_dir', 'scripts_matching_report.csv'), index=False)
+    print(f"  Association titres -> fichiers : {(matched['match_status'] != 'unmatched').sum()}/{len(matched)} "
+          f"({(matched['match_status'] == 'ambiguous').sum()} ambiguës)")
+
+    df_index = matched.dropna(subset=['filepath'])[['title', 'release_year', 'decade', 'filepath']]
+    df_index.to_csv(_path(config, 'data_dir', 'scripts_index.csv'), index=False)
+
+
+def stage_clean(config: Dict) -> None:
+    """
+    Lecture et nettoyage des scripts (scripts_clean.pkl et scripts_metadata.csv du notebook 0),
+    puis retrait des quasi-doublons (scripts_duplicates.csv).
+    """
+    from parser import _read_texts, normalize_script_text
+
+    df_index = pd.read_csv(_path(config, 'data_dir', 'scripts_index.csv'))
+
+    script_data = []
+    texts = _read_texts(df_index['filepath'].tolist(), config.get('read_ahead', 16))
+    for row, (_, raw_text, error) in zip(df_index.itertuples(index=False), texts):
+        if error is not None:
+            continue
+        clean_text = normalize_script_text(raw_text)
+        script_data.append({
+            'title': row.title,
+            'release_year': row.release_year,
+            'decade': row.decade,
+            'filepath': row.filepath,
+            'filename': os.path.basename(row.filepath),
+            'clean_text': clean_text,
+            'word_count': len(clean_text.split())
+        })
+
+    df_scripts = pd.DataFrame(script_data)
+
+    # Brouillons et réimports d'un même script : une seule version gardée
+    report_columns = ['title', 'filename', 'word_count', 'canonical_title', 'cluster', 'cluster_size',
+                      'canonical', 'similarity']
+    report = pd.DataFrame(columns=report_columns)
+    if config.get('dedup_threshold') and len(df_scripts):
+        from dedup import deduplicate, duplicates_report
+
+        kept, clusters = deduplicate(df_scripts, threshold=config['dedup_threshold'],
+                                     keep=config.get('dedup_keep', 'longest'))
+        report = duplicates_report(df_scripts, clusters)[report_columns]
+        print(f"  Quasi-doublons : {len(df_scripts) - len(kept)} scripts retirés "
+              f"({report['cluster'].nunique()} groupes)")
+        df_scripts = kept.reset_index(drop=True)
+    report.to_csv(_path(config, 'data_dir', 'scripts_duplicates.csv'), index=False)
+
+    df_scripts[['title', 'release_year', 'decade', 'filename', 'word_count']].to_csv(
+        _path(config, 'data_dir', 'scripts_metadata.csv'), index=False)
+    df_scripts.to_pickle(_path(config, 'data_dir', 'scripts_clean.pkl'))
+
+
+def stage_tokenise(config: Dict) -> None:
+    """
+    Tokenisation de tous les scripts dans le cache de tokens (partagé par score, aggregate, embed).
+    Le manifeste est écrit dans le dossier du cache : supprimer le cache force la reprise de l'étape.
+    """
+    df = _load_corpus(config)
+    cache = _token_cache(config)
+    keys = [cache.key(text) for text in df['clean_text'] if isinstance(text, str)]
+    for text in df['clean_text']:
+        cache.ids(text)
+
+    with open(os.path.join(cache.cache_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump({'fingerprint': cache.fingerprint, 'keys': keys}, f)
+
+
+def stage_score(config: Dict) -> None:
+    """
+    Scores par film des notebooks 1 à 4 (gender/ethnic_bias_by_film, stereotype_detection_scores,
+    keyword_frequencies, bias_density_by_film).
+    """
+    from dictionaries import GENDER_WORDS, GENDER_STEREOTYPES, ETHNICITY_WORDS, RACIAL_STEREOTYPES
+    from dtm import LexiconDTM, bias_densities, stereotype_categories
+
+    df = _load_corpus(config)
+    results_dir = config['results_dir']
+    os.makedirs(results_dir, exist_ok=True)
+
+    stereotypes = stereotype_categories()
+    dtm = LexiconDTM.from_dataframe(df, 'clean_text')
+    films = df[['title', 'release_year', 'decade']].reset_index(drop=True)
+
+    # Notebook 1
+    gender = dtm.densities({
+        'female_freq': GENDER_WORDS['female'],
+        'male_freq': GENDER_WORDS['male'],
+        'female_stereotypes': GENDER_STEREOTYPES['female_negative'],
+        'objectification': GENDER_STEREOTYPES['female_objectification']
+    }).reset_index(drop=True)
+    gender['gender_ratio_film'] = gender['female_freq'] / gender['male_freq'].replace(0, np.nan)
+    pd.concat([films, gender[['female_freq', 'male_freq', 'gender_ratio_film',
+                              'female_stereotypes', 'objectification']]], axis=1).to_csv(
+        os.path.join(results_dir, 'gender_bias_by_film.csv'), index=False)
+
+    # Notebook 2
+    ethnic = dtm.densities({
+        **{f'{group}_freq': ETHNICITY_WORDS[group] for group in ['african_american', 'asian', 'hispanic']},
+        **{f'stereotype_{s}': RACIAL_STEREOTYPES[s] for s in ['criminal', 'exotic', 'poverty']}
+    }).reset_index(drop=True)
+    ethnic['ethnic_diversity_score'] = ethnic[
+        ['african_american_freq', 'asian_freq', 'hispanic_freq']].sum(axis=1)
+    pd.concat([films, ethnic], axis=1).to_csv(
+        os.path.join(results_dir, 'ethnic_bias_by_film.csv'), index=False)
+
+    # Notebook 3
+    scores = dtm.category_counts(stereotypes).add_suffix('_score').reset_index(drop=True)
+    scores['total_score'] = scores.sum(axis=1)
+    df_stereotypes = pd.concat([films.rename(columns={'release_year': 'year'}), scores], axis=1)
+    df_stereotypes.to_csv(os.path.join(results_dir, 'stereotype_detection_scores.csv'), index=False)
+
+    # Compteurs de mots-clés, dans l'ordre de première rencontre (film, puis mot-clé)
+    counts = dtm.matrix.tocsr()
+    keyword_rows = []
+    for category, keywords in stereotypes.items():
+        columns = [dtm.word_index[k.lower()] for k in keywords]
+        sub = counts[:, columns].toarray()
+        counter = Counter()
+        for film_counts in sub:
+            for keyword, count in zip(keywords, film_counts.tolist()):
+                if count:
+                    counter[keyword] += count
+        keyword_rows += [{'category': category, 'keyword': word, 'count': count}
+                         for word, count in counter.most_common(50)]
+    pd.DataFrame(keyword_rows).to_csv(os.path.join(results_dir, 'keyword_frequencies.csv'), index=False)
+
+    # Notebook 4 : densités sur les tokens (mots du lexique / tokens alphabétiques)
+    cache = _token_cache(config)
+    df_density = bias_densities([cache.ids(text) for text in df['clean_text']],
+                                cache.token_ids, len(cache.vocabulary))
+    pd.concat([films, df_density], axis=1).to_csv(
+        os.path.join(results_dir, 'bias_density_by_film.csv'), index=False)
+
+
+def _cooccurrence_matrix(df: pd.DataFrame, cache) -> pd.DataFrame:
+    """
+    Matrice groupes × comportements du notebook 4 : termes de comportement dans la
+    fenêtre tokens[pos-10:pos+10] de chaque mention (mention comprise), en % des mentions.
+    """
+    from cooccurrence import CooccurrenceCounter, category_cooccurrence
+
+    social_groups, behavior_categories = cooccurrence_categories()
+    terms = [w.lower() for words in list(social_groups.values()) + list(behavior_categories.values())
+             for w in words]
+
+    counter = CooccurrenceCounter(window=(10, 10), terms=terms)
+    vocabulary = cache.vocabulary
+    for text in df['clean_text']:
+        ids = cache.ids(text)
+        counter.add_document([vocabulary[i] for i in ids.tolist()])
+    return category_cooccurrence(counter, social_groups, behavior_categories)
+
+
+def stage_aggregate(config: Dict) -> None:
+    """
+    Résultats par décennie des notebooks 1 à 4, matrice de co-occurrence et
+    bigrammes autour des mots cibles.
+    """
+    from dictionaries import GENDER_WORDS, ETHNICITY_WORDS
+    from ngrams import ngrams_by_decade
+    from stats_analysis import analyze_gender_bias_by_decade, analyze_racial_bias_by_decade
+
+    df = _load_corpus(config)
+    results_dir = config['results_dir']
+
+    # Notebook 1
+    analyze_gender_bias_by_decade(df, 'clean_text', 'decade').to_csv(
+        os.path.join(results_dir, 'gender_bias_by_decade.csv'), index=False)
+
+    # Notebook 2
+    df_racial = analyze_racial_bias_by_decade(df, text_column='clean_text', year_column='release_year')
+    minorities = ['african_american', 'asian', 'hispanic', 'native', 'middle_eastern']
+    minority_cols = [f'{m}_freq' for m in minorities if f'{m}_freq' in df_racial.columns]
+    df_racial['minorities_total'] = df_racial[minority_cols].sum(axis=1)
+    if 'white_freq' in df_racial.columns:
+        df_racial['minority_white_ratio'] = df_racial['minorities_total'] / df_racial['white_freq'].replace(0, np.nan)
+    df_racial.to_csv(os.path.join(results_dir, 'ethnic_bias_by_decade.csv'), index=False)
+
+    # Notebook 3
+    df_stereotypes = pd.read_csv(os.path.join(results_dir, 'stereotype_detection_scores.csv'))
+    df_stereotypes.groupby('decade').agg({
+        'sexism_score': 'mean',
+        'racism_score': 'mean',
+        'homophobia_score': 'mean',
+        'total_score': 'mean',
+        'title': 'count'
+    }).rename(columns={'title': 'num_films'}).reset_index().to_csv(
+        os.path.join(results_dir, 'stereotype_evolution_by_decade.csv'), index=False)
+
+    # Notebook 4
+    df_density = pd.read_csv(os.path.join(results_dir, 'bias_density_by_film.csv'))
+    df_evolution = df_density.groupby('decade').agg({
+        'sexism_density': ['mean', 'std', 'median'],
+        'racism_density': ['mean', 'std', 'median'],
+        'homophobia_density': ['mean', 'std', 'median'],
+        'total_bias_density': ['mean', 'std', 'median'],
+        'title': 'count'
+    }).reset_index()
+    df_evolution.columns = ['_'.join(col).strip('_') if col[1] else col[0]
+                            for col in df_evolution.columns.values]
+    df_evolution.rename(columns={'title_count': 'num_films'}, inplace=True)
+    df_evolution.to_csv(os.path.join(results_dir, 'bias_evolution_by_decade.csv'), index=False)
+
+    _cooccurrence_matrix(df, _token_cache(config)).to_csv(
+        os.path.join(results_dir, 'cooccurrence_matrix.csv'))
+
+    # Notebook 4 : bigrammes autour des mentions de femmes et de minorités
+    targets = {
+        'female': GENDER_WORDS['female'],
+        'minorities': (ETHNICITY_WORDS.get('african_american', []) + ETHNICITY_WORDS.get('hispanic', []) +
+                       ETHNICITY_WORDS.get('asian', []))
+    }
+    associations = []
+    for group, words in targets.items():
+        top = ngrams_by_decade(df, _token_cache(config), words, n=2, window=5, k=10,
+                               approximate=config.get('ngram_approximate', False))
+        top.insert(0, 'group', group)
+        associations.append(top)
+    pd.concat(associations).to_csv(os.path.join(results_dir, 'ngram_associations_by_decade.csv'), index=False)
+
+
+def stage_uncertainty(config: Dict) -> None:
+    """
+    Intervalles de confiance bootstrap, tests de tendance et tests par permutation
+    (première vs dernière décennie) des métriques des notebooks 1 et 2.
+    """
+    from resampling import DecadeResampler
+
+    df = _load_corpus(config)
+    results_dir = config['results_dir']
+    n_replicates = config.get('n_bootstrap', 10000)
+
+    intervals, trends, permutations = [], [], []
+    for analysis, resampler in (('gender', DecadeResampler.gender(df)),
+                                ('ethnic', DecadeResampler.racial(df))):
+        replicates = resampler.bootstrap_replicates(n_replicates, seed=0)
+        for frames, frame in ((intervals, resampler.confidence_intervals(replicates=replicates)),
+                              (trends, resampler.trend_tests(replicates=replicates)),
+                              (permutations, resampler.permutation_test(n_permutations=n_replicates,
+                                                                        seed=0))):
+            frame.insert(0, 'analysis', analysis)
+            frames.append(frame)
+
+    pd.concat(intervals).to_csv(os.path.join(results_dir, 'bootstrap_confidence_intervals.csv'), index=False)
+    pd.concat(trends).to_csv(os.path.join(results_dir, 'trend_tests.csv'), index=False)
+    pd.concat(permutations).to_csv(os.path.join(results_dir, 'permutation_tests.csv'), index=False)
+
+
+def stage_context(config: Dict) -> None:
+    """
+    Stéréotypes en contexte (négation, groupe visé) par analyse syntaxique spaCy.
+    """
+    from linguistic import ContextAnalyzer, context_scores
+
+    df = _load_corpus(config)
+    results_dir = config['results_dir']
+    analyzer = ContextAnalyzer(_path(config, 'cache_dir', 'spacy'),
+                               model=config.get('spacy_model', 'en_core_web_sm'),
+                               n_process=config.get('spacy_processes', 1))
+    hits = analyzer.analyze(df)
+    hits.to_csv(os.path.join(results_dir, 'stereotype_context_hits.csv'), index=False)
+    context_scores(hits, df).to_csv(os.path.join(results_dir, 'stereotype_context_scores.csv'), index=False)
+
+
+def stage_embed(config: Dict) -> None:
+    """
+    Word2Vec diachronique et proximité sémantique (semantic_proximity_evolution.csv).
+    """
+    from embeddings import train_diachronic, write_semantic_proximity
+
+    embeddings = train_diachronic(_load_corpus(config), _path(config, 'cache_dir', 'embeddings'),
+                                  token_cache=_token_cache(config),
+                                  n_workers=config.get('embed_workers', 1))
+    write_semantic_proximity(
+        embeddings, os.path.join(config['results_dir'], 'semantic_proximity_evolution.csv'))
+
+
+def stage_plot(config: Dict) -> None:
+    """
+    Figures des notebooks 1 à 4 (results/figures).
+    """
+    import figures
+
+    results_dir = config['results_dir']
+    figures_dir = os.path.join(results_dir, 'figures')
+
+    def read(name, **kwargs):
+        return pd.read_csv(os.path.join(results_dir, name), **kwargs)
+
+    figures.plot_gender_figures(read('gender_bias_by_decade.csv'), read('gender_bias_by_film.csv'),
+                                figures_dir)
+    figures.plot_ethnic_figures(read('ethnic_bias_by_decade.csv'), read('ethnic_bias_by_film.csv'),
+                                figures_dir)
+    figures.plot_stereotype_figures(read('stereotype_detection_scores.csv'),
+                                    read('stereotype_evolution_by_decade.csv'), figures_dir)
+    figures.plot_evolution_figures(read('bias_evolution_by_decade.csv'),
+                                   read('cooccurrence_matrix.csv', index_col=0), figures_dir)
+    if os.path.exists(os.path.join(results_dir, 'semantic_proximity_evolution.csv')):
+        figures.plot_semantic_drift(read('semantic_proximity_evolution.csv'), figures_dir)
+
+
+class Stage:
+    """
+    Étape du pipeline : fonction, dépendances, fichiers lus et écrits, modules utilisés.
+    """
+
+    def __init__(self, name: str, func: Callable[[Dict], None],
+                 deps: Sequence[str], inputs: Sequence[str], outputs: Sequence[str],
+                 modules: Sequence[str], params: Sequence[str] = ()):
+        """
+        Args:
+            name: Nom de l'étape
+            func: Fonction config -> None (niveau module, pour l'exécuter dans un autre processus)
+            deps: Étapes à exécuter avant
+            inputs: Fichiers lus (clés de config ou chemins relatifs 'clé/fichier')
+            outputs: Fichiers écrits (même format)
+            modules: Modules de src/ dont le code influe sur les sorties (les modules
+                     qu'ils importent, directement ou non, sont inclus dans l'empreinte)
+            params: Clés de config qui influent sur les sorties
+        """
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.modules = list(modules) + ['pipeline']
+        self.params = list(params)
+
+
+_RESULTS_BY_STAGE = {
+    'score': ['gender_bias_by_film.csv', 'ethnic_bias_by_film.csv', 'stereotype_detection_scores.csv',
+              'keyword_frequencies.csv', 'bias_density_by_film.csv'],
+    'aggregate': ['gender_bias_by_decade.csv', 'ethnic_bias_by_decade.csv',
+                  'stereotype_evolution_by_decade.csv', 'bias_evolution_by_decade.csv',
+                  'cooccurrence_matrix.csv', 'ngram_associations_by_decade.csv'],
+    'uncertainty': ['bootstrap_confidence_intervals.csv', 'trend_tests.csv', 'permutation_tests.csv'],
+    'context': ['stereotype_context_hits.csv', 'stereotype_context_scores.csv'],
+    'embed': ['semantic_proximity_evolution.csv']
+}
+
+STAGES = [
+    Stage('ingest', stage_ingest, [], ['metadata', 'scripts_dir'],
+          ['data_dir/scripts_index.csv', 'data_dir/scripts_matching_report.csv'],
+          ['title_index'], ['year_column']),
+    Stage('clean', stage_clean, ['ingest'], ['data_dir/scripts_index.csv', 'scripts_dir'],
+          ['data_dir/scripts_clean.pkl', 'data_dir/scripts_metadata.csv', 'data_dir/scripts_duplicates.csv'],
+          ['parser', 'prefetch', 'dedup'], ['dedup_threshold', 'dedup_keep']),
+    Stage('tokenise', stage_tokenise, ['clean'], ['data_dir/scripts_clean.pkl'],
+          ['cache_dir/tokens/manifest.json'], ['token_cache', 'parser'], ['tokenizer']),
+    Stage('score', stage_score, ['clean', 'tokenise'],
+          ['data_dir/scripts_clean.pkl', 'cache_dir/tokens/manifest.json'],
+          [f'results_dir/{name}' for name in _RESULTS_BY_STAGE['score']],
+          ['dtm', 'counts', 'matcher', 'dictionaries', 'token_cache']),
+    Stage('aggregate', stage_aggregate, ['score'],
+          ['data_dir/scripts_clean.pkl', 'cache_dir/tokens/manifest.json',
+           'results_dir/stereotype_detection_scores.csv', 'results_dir/bias_density_by_film.csv'],
+          [f'results_dir/{name}' for name in _RESULTS_BY_STAGE['aggregate']],
+          ['stats_analysis', 'counts', 'matcher', 'dictionaries', 'token_cache', 'ngrams', 'cooccurrence'],
+          ['ngram_approximate']),
+    Stage('uncertainty', stage_uncertainty, ['clean'], ['data_dir/scripts_clean.pkl'],
+          [f'results_dir/{name}' for name in _RESULTS_BY_STAGE['uncertainty']],
+          ['resampling', 'stats_analysis', 'counts', 'matcher', 'dictionaries'], ['n_bootstrap']),
+    Stage('context', stage_context, ['clean'], ['data_dir/scripts_clean.pkl'],
+          [f'results_dir/{name}' for name in _RESULTS_BY_STAGE['context']],
+          ['linguistic', 'dtm', 'dictionaries'], ['spacy_model']),
+    Stage('embed', stage_embed, ['tokenise'],
+          ['data_dir/scripts_clean.pkl', 'cache_dir/tokens/manifest.json'],
+          [f'results_dir/{name}' for name in _RESULTS_BY_STAGE['embed']],
+          ['embeddings', 'semantic_query', 'token_cache']),
+    Stage('plot', stage_plot, ['score', 'aggregate', 'embed'],
+          [f'results_dir/{name}' for stage in ('score', 'aggregate', 'embed')
+           for name in _RESULTS_BY_STAGE[stage]],
+          ['results_dir/figures'], ['figures'])
+]
+
+
+# ===== EXÉCUTION =====
+
+def _resolve(config: Dict, entry: str) -> Optional[str]:
+    """
+    Chemin d'une entrée/sortie ('clé' ou 'clé/fichier').
+    """
+    key, _, rest = entry.partition('/')
+    base = config.get(key)
+    if base is None:
+        return None
+    return os.path.join(base, rest) if rest else base
+
+
+def _hash_path(h, path: Optional[str]) -> None:
+    """
+    Ajoute un fichier (contenu) ou un dossier (noms, tailles, dates) à l'empreinte.
+    """
+    if path is None or not os.path.exists(path):
+        h.update(b'<absent>')
+    elif os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            stat = os.stat(os.path.join(path, name))
+            h.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode('utf-8'))
+    else:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+
+
+def _local_imports(module: str) -> List[str]:
+    """
+    Modules de src/ importés par un module (y compris dans les fonctions).
+    """
+    path = os.path.join(SRC_DIR, f"{module}.py")
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    return sorted(n for n in names if os.path.exists(os.path.join(SRC_DIR, f"{n}.py")))
+
+
+def module_closure(modules: Sequence[str]) -> List[str]:
+    """
+    Modules de src/ listés et tous ceux qu'ils importent, transitivement
+    (ex: token_cache -> parser, dont le nettoyage influe sur les tokens).
+    Les imports de pipeline lui-même ne sont pas suivis : chaque étape déclare
+    les modules qu'elle utilise.
+    """
+    seen = set()
+    stack = list(modules)
+    while stack:
+        module = stack.pop()
+        if module in seen:
+            continue
+        seen.add(module)
+        if module != 'pipeline':
+            stack.extend(_local_imports(module))
+    return sorted(seen)
+
+
+def stage_fingerprint(stage: Stage, config: Dict) -> str:
+    """
+    Empreinte des entrées d'une étape : fichiers lus, paramètres, code des modules
+    (et des modules qu'ils importent).
+    """
+    h = hashlib.sha256(stage.name.encode('utf-8'))
+    for entry in stage.inputs:
+        h.update(entry.encode('utf-8'))
+        _hash_path(h, _resolve(config, entry))
+    h.update(json.dumps({p: config.get(p) for p in stage.params}, sort_keys=True).encode('utf-8'))
+    for module in module_closure(stage.modules):
+        h.update(module.encode('utf-8'))
+        _hash_path(h, os.path.join(SRC_DIR, f"{module}.py"))
+    return h.hexdigest()
+
+
+def _run_stage(stage_name: str, config: Dict) -> float:
+    """
+    Exécute une étape (éventuellement dans un processus séparé) et retourne sa durée.
+    """
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    from instrumentation import stage
+
+    start = time.perf_counter()
+    with stage(f'pipeline.{stage_name}'):
+        STAGE_BY_NAME[stage_name].func(config)
+    return time.perf_counter() - start
+
+
+STAGE_BY_NAME = {stage.name: stage for stage in STAGES}
+
+
+def _load_state(path: str) -> Dict[str, str]:
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def _save_state(path: str, state: Dict[str, str]) -> None:
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def select_stages(targets: Optional[Sequence[str]] = None,
+                  exclude: Sequence[str] = (),
+                  from_corpus: bool = False) -> List[Stage]:
+    """
+    Étapes à exécuter : les cibles et leurs dépendances, moins les étapes exclues.
+
+    Args:
+        targets: Étapes demandées (None pour toutes)
+        exclude: Étapes à ne pas exécuter (les dépendances vers elles sont ignorées)
+        from_corpus: Partir d'un scripts_clean.pkl existant (sans ingest ni clean)
+    """
+    excluded = set(exclude)
+    if from_corpus:
+        excluded |= {'ingest', 'clean'}
+
+    wanted = set()
+    stack = list(targets) if targets else [stage.name for stage in STAGES]
+    while stack:
+        name = stack.pop()
+        if name not in STAGE_BY_NAME:
+            raise ValueError(f"Étape inconnue : {name} (choix : {list(STAGE_BY_NAME)})")
+        if name in excluded or name in wanted:
+            continue
+        wanted.add(name)
+        stack.extend(STAGE_BY_NAME[name].deps)
+
+    return [stage for stage in STAGES if stage.name in wanted]
+
+
+def run_pipeline(config: Dict,
+                 targets: Optional[Sequence[str]] = None,
+                 exclude: Sequence[str] = (),
+                 force: bool = False,
+                 n_workers: int = 1) -> Dict[str, str]:
+    """
+    Exécute le pipeline : chaque étape dont les dépendances sont terminées est lancée
+    (ou sautée si ses entrées n'ont pas changé), jusqu'à n_workers étapes à la fois.
+
+    Args:
+        config: Chemins et options (scripts_dir, metadata, data_dir, results_dir,
+                cache_dir, tokenizer, year_column, embed_workers, read_ahead, n_bootstrap)
+        targets: Étapes demandées (None pour toutes)
+        exclude: Étapes à ne pas exécuter
+        force: Ré-exécuter même si les entrées n'ont pas changé
+        n_workers: Nombre d'étapes exécutées en parallèle
+
+    Returns:
+        Dict {étape: 'run' | 'skipped' | 'failed' | 'blocked'}
+    """
+    from_corpus = config.get('scripts_dir') is None
+    stages = select_stages(targets, exclude, from_corpus)
+    if from_corpus and not os.path.exists(_path(config, 'data_dir', 'scripts_clean.pkl')):
+        raise FileNotFoundError("scripts_clean.pkl introuvable : préciser --scripts-dir et --metadata")
+
+    for key in ('data_dir', 'results_dir', 'cache_dir'):
+        os.makedirs(config[key], exist_ok=True)
+    state_path = _path(config, 'cache_dir', 'pipeline_state.json')
+    state = _load_state(state_path)
+
+    selected = {stage.name for stage in stages}
+    status: Dict[str, str] = {}
+    pending = [stage for stage in stages]
+    running = {}
+    executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+
+    def finish(name: str, fingerprint: str, seconds: float) -> None:
+        status[name] = 'run'
+        # Empreinte des entrées lues avant l'exécution : une entrée modifiée pendant
+        # l'étape ne correspondra plus au prochain lancement, qui la ré-exécutera
+        state[name] = fingerprint
+        _save_state(state_path, state)
+        print(f"✓ {name} ({seconds:.1f} s)")
+
+    try:
+        while pending or running:
+            for stage in list(pending):
+                deps = [d for d in stage.deps if d in selected]
+                if any(status.get(d) in ('failed', 'blocked') for d in deps):
+                    status[stage.name] = 'blocked'
+                    pending.remove(stage)
+                    print(f"✗ {stage.name} : dépendance en échec")
+                    continue
+                if not all(status.get(d) in ('run', 'skipped') for d in deps):
+                    continue
+
+                pending.remove(stage)
+                fingerprint = stage_fingerprint(stage, config)
+                outputs_exist = all(os.path.exists(_resolve(config, o)) for o in stage.outputs)
+                if not force and outputs_exist and state.get(stage.name) == fingerprint:
+                    status[stage.name] = 'skipped'
+                    print(f"= {stage.name} (entrées inchangées)")
+                    continue
+
+                if executor is None:
+                    try:
+                        finish(stage.name, fingerprint, _run_stage(stage.name, config))
+                    except Exception as e:
+                        status[stage.name] = 'failed'
+                        print(f"✗ {stage.name} : {e}")
+                else:
+                    running[executor.submit(_run_stage, stage.name, config)] = (stage.name, fingerprint)
+
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, fingerprint = running.pop(future)
+                    try:
+                        finish(name, fingerprint, future.result())
+                    except Exception as e:
+                        status[name] = 'failed'
+                        print(f"✗ {name} : {e}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return status
+
+
+def default_config() -> Dict:
+    """
+    Configuration par défaut (arborescence du dépôt).
+    """
+    return {
+        'scripts_dir': None,
+        'metadata': None,
+        'year_column': None,
+        'data_dir': os.path.join(ROOT_DIR, 'data', 'processed'),
+        'results_dir': os.path.join(ROOT_DIR, 'results'),
+        'cache_dir': os.path.join(ROOT_DIR, 'data', 'cache'),
+        'tokenizer': 'nltk',
+        'embed_workers': 1,
+        'read_ahead': 16,
+        'n_bootstrap': 10000,
+        'dedup_threshold': 0.8,
+        'dedup_keep': 'longest',
+        'ngram_approximate': False,
+        'spacy_model': 'en_core_web_sm',
+        'spacy_processes': 1
+    }
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Pipeline d'analyse des scripts (sans notebooks)")
+    arg_parser.add_argument('--scripts-dir', help="Dossier des scripts .txt (sinon : scripts_clean.pkl existant)")
+    arg_parser.add_argument('--metadata', help="CSV des métadonnées (titre, année)")
+    arg_parser.add_argument('--year-column', help="Colonne de l'année (détectée par défaut)")
+    arg_parser.add_argument('--data-dir', help="Dossier data/processed")
+    arg_parser.add_argument('--results-dir', help="Dossier results")
+    arg_parser.add_argument('--cache-dir', help="Dossier des caches (tokens, modèles, état)")
+    arg_parser.add_argument('--tokenizer', choices=['nltk', 'regex'], default='nltk')
+    arg_parser.add_argument('--stages', nargs='+', help="Étapes à exécuter (et leurs dépendances)")
+    arg_parser.add_argument('--exclude', nargs='+', default=[], help="Étapes à ne pas exécuter")
+    arg_parser.add_argument('--force', action='store_true', help="Ignorer les empreintes")
+    arg_parser.add_argument('--n-workers', type=int, default=1, help="Étapes en parallèle")
+    arg_parser.add_argument('--embed-workers', type=int, default=1, help="Décennies entraînées en parallèle")
+    arg_parser.add_argument('--read-ahead', type=int, help="Scripts lus en avance pendant le nettoyage (0 = lecture bloquante)")
+    arg_parser.add_argument('--dedup-threshold', type=float,
+                            help="Similarité des quasi-doublons retirés au nettoyage (0 = aucun retrait)")
+    arg_parser.add_argument('--dedup-keep', choices=['longest', 'shortest', 'first', 'last'],
+                            help="Version gardée par groupe de quasi-doublons")
+    arg_parser.add_argument('--ngram-approximate', action='store_true', default=None,
+                            help="Bigrammes par Count-Min sketch (mémoire bornée) dans aggregate")
+    arg_parser.add_argument('--n-bootstrap', type=int, help="Réplicats bootstrap / permutations (uncertainty)")
+    arg_parser.add_argument('--spacy-model', help="Modèle spaCy de l'étape context")
+    arg_parser.add_argument('--spacy-processes', type=int, help="Processus de nlp.pipe (context)")
+    arg_parser.add_argument('--profile', help="Fichier JSON lines des mesures par étape (instrumentation.py)")
+    args = arg_parser.parse_args()
+
+    config = default_config()
+    for key in ('scripts_dir', 'metadata', 'year_column', 'data_dir', 'results_dir', 'cache_dir',
+                'tokenizer', 'embed_workers', 'read_ahead', 'n_bootstrap', 'dedup_threshold',
+                'dedup_keep', 'ngram_approximate', 'spacy_model', 'spacy_processes'):
+        value = getattr(args, key)
+        if value is not None:
+            config[key] = value
+    if config['scripts_dir'] is not None and config['metadata'] is None:
+        arg_parser.error("--metadata est requis avec --scripts-dir")
+
+    if args.profile:
+        import instrumentation
+        run_id = instrumentation.enable(args.profile)
+
+    status = run_pipeline(config, args.stages, args.exclude, args.force, args.n_workers)
+
+    if args.profile:
+        instrumentation.disable()
+        print(instrumentation.stage_report(instrumentation.load_events(args.profile, run_id)).to_string())
+    if any(s in ('failed', 'blocked') for s in status.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+prefetch.py - Lecture anticipée des fichiers de scripts
+Un pool de threads lit les fichiers (en octets) en avance sur le parsing :
+pendant qu'un script est nettoyé, les suivants sont déjà en cours de lecture.
+Le décodage est fait par le consommateur, une fois le fichier en mémoire, si
+bien que le parsing n'attend jamais le système de fichiers tant que la
+lecture garde de l'avance. Utile surtout sur un stockage réseau, où la
+latence de chaque fichier domine.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional, Tuple
+
+
+def read_bytes(filepath: str) -> bytes:
+    """
+    Lit un fichier entier en octets (exécuté dans les threads de lecture).
+    """
+    with open(filepath, 'rb') as f:
+        return f.read()
+
+
+def decode_script(data: bytes) -> str:
+    """
+    Décode un script comme open(..., 'r', encoding='utf-8', errors='ignore').read()
+    (octets invalides ignorés, fins de ligne \\r\\n et \\r converties en \\n).
+
+    Args:
+        data: Contenu brut du fichier
+
+    Returns:
+        Texte du script
+    """
+    text = data.decode('utf-8', errors='ignore')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def prefetch_files(filepaths: Iterable[str],
+                   read_ahead: int = 16,
+                   n_threads: int = 8) -> Iterator[Tuple[str, Optional[bytes], Optional[Exception]]]:
+    """
+    Lit des fichiers en avance, dans l'ordre donné.
+
+    Au plus `read_ahead` fichiers sont lus ou en attente de consommation : la
+    mémoire reste bornée même si le parsing est plus lent que la lecture.
+
+    Args:
+        filepaths: Chemins des fichiers (itérable paresseux accepté)
+        read_ahead: Nombre de fichiers lus en avance sur le consommateur
+        n_threads: Nombre de lectures simultanées
+
+    Yields:
+        (chemin, contenu en octets ou None, erreur de lecture ou None)
+    """
+    read_ahead = max(1, read_ahead)
+    paths = iter(filepaths)
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(n_threads, read_ahead)),
+                            thread_name_prefix='prefetch') as executor:
+        try:
+            for filepath in paths:
+                pending.append((filepath, executor.submit(read_bytes, filepath)))
+                if len(pending) >= read_ahead:
+                    break
+
+            while pending:
+                filepath, future = pending.popleft()
+                # Relancer une lecture avant de rendre la main au consommateur
+                next_path = next(paths, None)
+                if next_path is not None:
+                    pending.append((next_path, executor.submit(read_bytes, next_path)))
+                try:
+                    data = future.result()
+                except OSError as e:
+                    yield filepath, None, e
+                    continue
+                yield filepath, data, None
+        finally:
+            # Consommateur arrêté avant la fin : abandonner les lectures non commencées
+            for _, future in pending:
+                future.cancel()
+
+
+def prefetch_texts(filepaths: Iterable[str],
+                   read_ahead: int = 16,
+                   n_threads: int = 8) -> Iterator[Tuple[str, Optional[str], Optional[Exception]]]:
+    """
+    Comme prefetch_files, avec le texte décodé (decode_script) au lieu des octets.
+    """
+    for filepath, data, error in prefetch_files(filepaths, read_ahead, n_threads):
+        yield filepath, (decode_script(data) if data is not None else None), error
+
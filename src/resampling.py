@@ -0,0 +1,397 @@
+"""
+resampling.py - Intervalles de confiance bootstrap et tests par permutation
+Les métriques par décennie (fréquences pour 1000 mots, ratios) sont des
+rapports de sommes sur les films. À partir des vecteurs de comptes par film,
+un réplicat bootstrap n'est qu'une pondération des films : des milliers de
+réplicats se calculent en un produit matriciel, sans relancer l'analyse.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from counts import SCRIPT_COUNTS, ScriptCountCache
+
+
+def _ratio_spec(spec) -> Tuple[List[str], List[str], float]:
+    numerator, denominator = spec[0], spec[1]
+    fill = spec[2] if len(spec) > 2 else np.nan
+    return list(numerator), list(denominator), fill
+
+
+def _metrics_from_sums(sums: np.ndarray, totals: np.ndarray,
+                       columns: List[str],
+                       ratios: Dict[str, Tuple[List[int], List[int], float]]) -> np.ndarray:
+    """
+    Métriques (fréquences pour 1000 mots puis ratios) à partir des sommes de comptes.
+
+    Args:
+        sums: Sommes par catégorie (... × catégories)
+        totals: Nombres de mots (...)
+        columns: Noms des catégories
+        ratios: {nom: (index numérateur, index dénominateur, valeur si dénominateur nul)}
+
+    Returns:
+        Tableau (... × (catégories + ratios))
+    """
+    totals = np.asarray(totals, dtype=np.float64)[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        freqs = np.where(totals > 0, sums / totals * 1000, 0.0)
+        values = [freqs]
+        for numerator, denominator, fill in ratios.values():
+            num = sums[..., numerator].sum(axis=-1)
+            den = sums[..., denominator].sum(axis=-1)
+            values.append(np.where(den > 0, num / den, fill)[..., None])
+    return np.concatenate(values, axis=-1)
+
+
+def _bootstrap_chunk(counts: np.ndarray, totals: np.ndarray, codes: np.ndarray,
+                     num_decades: int, columns: List[str], ratios: Dict,
+                     n_replicates: int, seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    Réplicats bootstrap stratifiés par décennie (exécuté éventuellement dans un processus).
+
+    Returns:
+        Tableau réplicats × décennies × métriques
+    """
+    rng = np.random.default_rng(seed)
+    result = np.empty((n_replicates, num_decades, len(columns) + len(ratios)))
+    for d in range(num_decades):
+        films = np.flatnonzero(codes == d)
+        n = len(films)
+        # Poids de chaque film dans chaque réplicat (tirage avec remise de n films)
+        weights = rng.multinomial(n, np.full(n, 1.0 / n), size=n_replicates).astype(np.float64)
+        sums = weights @ counts[films]
+        words = weights @ totals[films]
+        result[:, d] = _metrics_from_sums(sums, words, columns, ratios)
+    return result
+
+
+def _permutation_chunk(counts: np.ndarray, totals: np.ndarray, num_a: int,
+                       columns: List[str], ratios: Dict,
+                       n_permutations: int, seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    Différences (groupe A - groupe B) des métriques pour des étiquettes permutées.
+
+    Returns:
+        Tableau permutations × métriques
+    """
+    rng = np.random.default_rng(seed)
+    n = len(totals)
+    order = rng.permuted(np.tile(np.arange(n), (n_permutations, 1)), axis=1)
+    in_a = np.zeros((n_permutations, n))
+    in_a[np.arange(n_permutations)[:, None], order[:, :num_a]] = 1.0
+
+    sums_a = in_a @ counts
+    words_a = in_a @ totals
+    sums_b = counts.sum(axis=0) - sums_a
+    words_b = totals.sum() - words_a
+    return (_metrics_from_sums(sums_a, words_a, columns, ratios) -
+            _metrics_from_sums(sums_b, words_b, columns, ratios))
+
+
+class DecadeResampler:
+    """
+    Incertitude des métriques par décennie à partir des comptes par film.
+
+    Les fréquences sont calculées comme dans stats_analysis (somme des occurrences
+    de la décennie / somme des mots × 1000) ; le bootstrap tire les films avec
+    remise à l'intérieur de chaque décennie.
+    """
+
+    def __init__(self, counts: np.ndarray, totals: np.ndarray, decades: Sequence,
+                 columns: List[str],
+                 ratios: Optional[Dict[str, Tuple]] = None):
+        """
+        Args:
+            counts: Occurrences par film et par catégorie (films × catégories)
+            totals: Nombre de mots par film
+            decades: Décennie de chaque film (NaN = film ignoré)
+            columns: Nom de la métrique de chaque catégorie (ex: 'female_mentions_freq')
+            ratios: {nom: (catégories du numérateur, catégories du dénominateur[, valeur
+                    si dénominateur nul, NaN par défaut])}
+        """
+        codes, keys = pd.factorize(pd.Series(list(decades)), sort=True)
+        valid = codes >= 0
+        self.counts = np.asarray(counts, dtype=np.float64)[valid]
+        self.totals = np.asarray(totals, dtype=np.float64)[valid]
+        self.codes = codes[valid]
+        self.decades = list(keys)
+        self.columns = list(columns)
+
+        index = {name: i for i, name in enumerate(self.columns)}
+        self.ratios = {}
+        for name, spec in (ratios or {}).items():
+            numerator, denominator, fill = _ratio_spec(spec)
+            self.ratios[name] = ([index[c] for c in numerator], [index[c] for c in denominator], fill)
+        self.metrics = self.columns + list(self.ratios)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, text_column: str,
+                       word_categories: Dict[str, List[str]],
+                       ratios: Optional[Dict[str, Tuple]] = None,
+                       year_column: str = 'release_year',
+                       cache: Optional[ScriptCountCache] = None) -> 'DecadeResampler':
+        """
+        Compte les catégories de chaque film (cache de counts.py, partagé avec stats_analysis).
+
+        Args:
+            df: DataFrame des scripts
+            text_column: Colonne du texte
+            word_categories: Dict {nom_de_métrique: liste_de_mots}
+            ratios: Ratios entre métriques (voir __init__)
+            year_column: Colonne de l'année (si 'decade' est absente)
+            cache: Cache des vecteurs de comptes (par défaut SCRIPT_COUNTS)
+
+        Returns:
+            DecadeResampler
+        """
+        if cache is None:
+            cache = SCRIPT_COUNTS
+        indices = cache.category_indices(word_categories)
+        matrix, totals = cache.count_matrix(df[text_column])
+        counts = np.column_stack([matrix[:, idx].sum(axis=1) for idx in indices.values()]) \
+            if indices else np.zeros((len(df), 0))
+
+        decades = df['decade'] if 'decade' in df.columns else (df[year_column] // 10) * 10
+        return cls(counts, totals, decades, list(word_categories), ratios)
+
+    @classmethod
+    def gender(cls, df: pd.DataFrame, text_column: str = 'clean_text',
+               **kwargs) -> 'DecadeResampler':
+        """
+        Métriques de analyze_gender_bias_by_decade.
+        """
+        from dictionaries import GENDER_WORDS, GENDER_STEREOTYPES
+
+        categories = {
+            'female_mentions_freq': GENDER_WORDS['female'],
+            'male_mentions_freq': GENDER_WORDS['male'],
+            'female_negative_stereotypes': GENDER_STEREOTYPES['female_negative'],
+            'female_objectification': GENDER_STEREOTYPES['female_objectification'],
+            'male_stereotypes': GENDER_STEREOTYPES['male_stereotypes']
+        }
+        ratios = {'gender_ratio': (['female_mentions_freq'], ['male_mentions_freq'], 0.0)}
+        return cls.from_dataframe(df, text_column, categories, ratios, **kwargs)
+
+    @classmethod
+    def racial(cls, df: pd.DataFrame, text_column: str = 'clean_text',
+               **kwargs) -> 'DecadeResampler':
+        """
+        Métriques de analyze_racial_bias_by_decade (et ratio minorités / blancs du notebook 2).
+        """
+        from stats_analysis import _racial_categories
+
+        categories = _racial_categories()
+        minorities = [c for c in ('african_american_freq', 'asian_freq', 'hispanic_freq',
+                                  'native_freq', 'middle_eastern_freq') if c in categories]
+        ratios = {'minority_white_ratio': (minorities, ['white_freq'])}
+        return cls.from_dataframe(df, text_column, categories, ratios, **kwargs)
+
+    def _decade_sums(self) -> Tuple[np.ndarray, np.ndarray]:
+        num_decades = len(self.decades)
+        sums = np.zeros((num_decades, self.counts.shape[1]))
+        np.add.at(sums, self.codes, self.counts)
+        words = np.bincount(self.codes, weights=self.totals, minlength=num_decades)
+        return sums, words
+
+    def estimates(self) -> pd.DataFrame:
+        """
+        Métriques observées par décennie (mêmes valeurs que les analyses de stats_analysis).
+
+        Returns:
+            DataFrame (decade, num_scripts, métriques...)
+        """
+        sums, words = self._decade_sums()
+        values = _metrics_from_sums(sums, words, self.columns, self.ratios)
+        frame = pd.DataFrame(values, columns=self.metrics)
+        frame.insert(0, 'num_scripts', np.bincount(self.codes, minlength=len(self.decades)))
+        frame.insert(0, 'decade', self.decades)
+        return frame
+
+    def _run_chunks(self, func, n_total: int, seed: Optional[int], n_workers: int,
+                    chunk_size: int, *args) -> np.ndarray:
+        """
+        Exécute func par lots de chunk_size tirages, chacun avec sa propre graine
+        (résultats identiques quel que soit n_workers).
+        """
+        sizes = [min(chunk_size, n_total - start) for start in range(0, n_total, chunk_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        tasks = [args + (size, child) for size, child in zip(sizes, seeds)]
+
+        if n_workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                parts = list(executor.map(func, *zip(*tasks)))
+        else:
+            parts = [func(*task) for task in tasks]
+        return np.concatenate(parts, axis=0)
+
+    def bootstrap_replicates(self, n_replicates: int = 10000,
+                             seed: Optional[int] = None,
+                             n_workers: int = 1,
+                             chunk_size: int = 2000) -> np.ndarray:
+        """
+        Métriques de chaque réplicat bootstrap.
+
+        Args:
+            n_replicates: Nombre de réplicats
+            seed: Graine aléatoire
+            n_workers: Processus (utile pour un très grand nombre de réplicats)
+            chunk_size: Réplicats par lot (borne la mémoire : lot × films poids)
+
+        Returns:
+            Tableau réplicats × décennies × métriques
+        """
+        return self._run_chunks(_bootstrap_chunk, n_replicates, seed, n_workers, chunk_size,
+                                self.counts, self.totals, self.codes, len(self.decades),
+                                self.columns, self.ratios)
+
+    def confidence_intervals(self, n_replicates: int = 10000,
+                             alpha: float = 0.05,
+                             seed: Optional[int] = None,
+                             n_workers: int = 1,
+                             replicates: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Intervalles de confiance bootstrap (percentiles) de toutes les métriques.
+
+        Args:
+            n_replicates: Nombre de réplicats
+            alpha: 1 - niveau de confiance
+            seed: Graine aléatoire
+            n_workers: Processus
+            replicates: Réplicats déjà calculés (bootstrap_replicates)
+
+        Returns:
+            DataFrame (decade, metric, estimate, ci_low, ci_high, std_error)
+        """
+        if replicates is None:
+            replicates = self.bootstrap_replicates(n_replicates, seed, n_workers)
+        estimates = self.estimates()
+        with np.errstate(invalid='ignore'):
+            low, high = np.nanpercentile(replicates, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=0)
+            std_error = np.nanstd(replicates, axis=0, ddof=1)
+
+        index = pd.MultiIndex.from_product([self.decades, self.metrics], names=['decade', 'metric'])
+        return pd.DataFrame({
+            'estimate': estimates[self.metrics].to_numpy().reshape(-1),
+            'ci_low': low.reshape(-1),
+            'ci_high': high.reshape(-1),
+            'std_error': std_error.reshape(-1)
+        }, index=index).reset_index()
+
+    def trend_tests(self, n_replicates: int = 10000,
+                    alpha: float = 0.05,
+                    seed: Optional[int] = None,
+                    n_workers: int = 1,
+                    replicates: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Pente par décennie (régression linéaire, comme compare_decades) avec son
+        intervalle bootstrap.
+
+        Args:
+            n_replicates: Nombre de réplicats
+            alpha: 1 - niveau de confiance
+            seed: Graine aléatoire
+            n_workers: Processus
+            replicates: Réplicats déjà calculés (bootstrap_replicates)
+
+        Returns:
+            DataFrame (metric, slope, ci_low, ci_high, p_sign) ; p_sign est la part
+            des réplicats dont la pente est de signe opposé (ou nulle)
+        """
+        if replicates is None:
+            replicates = self.bootstrap_replicates(n_replicates, seed, n_workers)
+
+        x = np.asarray(self.decades, dtype=np.float64)
+        x_centered = (x - x.mean()) / ((x - x.mean()) ** 2).sum() if len(x) > 1 else np.zeros_like(x)
+        # Pente des moindres carrés de toutes les métriques et de tous les réplicats à la fois
+        estimates = self.estimates()[self.metrics].to_numpy()
+        slope = x_centered @ estimates
+        slopes = np.einsum('d,rdm->rm', x_centered, replicates)
+
+        with np.errstate(invalid='ignore'):
+            low, high = np.nanpercentile(slopes, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=0)
+            opposite = np.where(slope >= 0, slopes <= 0, slopes >= 0)
+            p_sign = np.nanmean(np.where(np.isnan(slopes), np.nan, opposite), axis=0)
+
+        return pd.DataFrame({
+            'metric': self.metrics,
+            'slope': slope,
+            'ci_low': low,
+            'ci_high': high,
+            'p_sign': p_sign
+        })
+
+    def permutation_test(self, decade_a=None, decade_b=None,
+                         n_permutations: int = 10000,
+                         seed: Optional[int] = None,
+                         n_workers: int = 1,
+                         chunk_size: int = 2000) -> pd.DataFrame:
+        """
+        Test par permutation de la différence entre deux décennies (bilatéral),
+        pour toutes les métriques à la fois.
+
+        Args:
+            decade_a: Première décennie (par défaut la plus ancienne, ex: 1960)
+            decade_b: Seconde décennie (par défaut la plus récente, ex: 2010)
+            n_permutations: Nombre de permutations des films entre les deux décennies
+            seed: Graine aléatoire
+            n_workers: Processus
+            chunk_size: Permutations par lot
+
+        Returns:
+            DataFrame (metric, decade_a, decade_b, value_a, value_b, difference, p_value),
+            p_value valant NaN quand la différence observée est NaN (les permutations
+            à différence NaN ne comptent pas dans le nombre de permutations)
+        """
+        decade_a = self.decades[0] if decade_a is None else decade_a
+        decade_b = self.decades[-1] if decade_b is None else decade_b
+        code_a, code_b = self.decades.index(decade_a), self.decades.index(decade_b)
+
+        films_a = np.flatnonzero(self.codes == code_a)
+        films_b = np.flatnonzero(self.codes == code_b)
+        films = np.concatenate([films_a, films_b])
+        counts, totals = self.counts[films], self.totals[films]
+
+        estimates = self.estimates()[self.metrics].to_numpy()
+        observed = estimates[code_a] - estimates[code_b]
+        differences = self._run_chunks(_permutation_chunk, n_permutations, seed, n_workers,
+                                       chunk_size, counts, totals, len(films_a),
+                                       self.columns, self.ratios)
+        with np.errstate(invalid='ignore'):
+            extreme = (np.abs(differences) >= np.abs(observed) - 1e-12).sum(axis=0)
+        # Permutations à différence indéfinie (dénominateur nul) : exclues du test
+        valid = (~np.isnan(differences)).sum(axis=0)
+        p_value = (extreme + 1) / (valid + 1)
+        # Différence observée indéfinie (ex: ratio sans mention 'white') : pas de test
+        p_value = np.where(np.isnan(observed), np.nan, p_value)
+
+        return pd.DataFrame({
+            'metric': self.metrics,
+            'decade_a': decade_a,
+            'decade_b': decade_b,
+            'value_a': estimates[code_a],
+            'value_b': estimates[code_b],
+            'difference': observed,
+            'p_value': p_value
+        })
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+    from synthetic import generate_corpus
+    from parser import clean_script_text
+
+    df = generate_corpus(num_scripts=120, words_per_script=3000, seed=1)
+    df['clean_text'] = df['raw_text'].map(clean_script_text)
+
+    resampler = DecadeResampler.gender(df)
+    replicates = resampler.bootstrap_replicates(n_replicates=2000, seed=0)
+    print(resampler.confidence_intervals(replicates=replicates).head(12))
+    print(resampler.trend_tests(replicates=replicates))
+    print(resampler.permutation_test(n_permutations=2000, seed=0))
@@ -0,0 +1,197 @@
+"""
+semantic_query.py - Requêtes de proximité sémantique par blocs
+Les matrices de vecteurs de chaque décennie sont normalisées une seule fois ;
+une requête (groupes × concepts, ou test WEAT) rassemble les mots de toutes
+les listes et calcule les similarités de toutes les décennies par un seul
+produit matriciel, au lieu d'appels mot à mot.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from embeddings import DiachronicEmbeddings
+
+
+class SemanticQueryEngine:
+    """
+    Similarités cosinus groupes × concepts et tests WEAT sur toutes les décennies.
+    """
+
+    def __init__(self, embeddings: DiachronicEmbeddings, aligned: bool = False):
+        """
+        Args:
+            embeddings: Vecteurs par décennie (train_diachronic)
+            aligned: Utiliser les vecteurs alignés (vocabulaire commun) plutôt que
+                     le vocabulaire complet de chaque décennie
+        """
+        self.decades = list(embeddings.decades)
+        self.aligned = aligned
+
+        if aligned:
+            common_index = {w: i for i, w in enumerate(embeddings.common_vocabulary)}
+            self._index = {decade: common_index for decade in self.decades}
+            matrices = {decade: embeddings.aligned[decade] for decade in self.decades}
+        else:
+            self._index = embeddings.word_index
+            matrices = embeddings.vectors
+
+        # Normalisation faite une fois pour toutes les requêtes
+        self._normalized = {}
+        for decade in self.decades:
+            matrix = np.asarray(matrices[decade], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._normalized[decade] = matrix / np.where(norms > 0, norms, 1)
+
+        self.dimension = next(iter(self._normalized.values())).shape[1] if self.decades else 0
+
+    def _gather(self, words: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vecteurs normalisés des mots dans chaque décennie.
+
+        Returns:
+            (tenseur décennies × mots × dimensions, présence décennies × mots)
+        """
+        vectors = np.zeros((len(self.decades), len(words), self.dimension), dtype=np.float32)
+        present = np.zeros((len(self.decades), len(words)), dtype=bool)
+        for d, decade in enumerate(self.decades):
+            index = self._index[decade]
+            rows = np.array([index.get(w, -1) for w in words], dtype=np.int64)
+            present[d] = rows >= 0
+            vectors[d, present[d]] = self._normalized[decade][rows[present[d]]]
+        return vectors, present
+
+    @staticmethod
+    def _indicator(lists: Dict[str, List[str]], words: List[str]) -> np.ndarray:
+        """
+        Matrice listes × mots (nombre d'occurrences du mot dans la liste).
+        """
+        position = {w: i for i, w in enumerate(words)}
+        indicator = np.zeros((len(lists), len(words)), dtype=np.float32)
+        for i, word_list in enumerate(lists.values()):
+            for w in word_list:
+                indicator[i, position[w]] += 1
+        return indicator
+
+    def similarity_blocks(self, groups: Dict[str, List[str]],
+                          concepts: Dict[str, List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Similarité cosinus moyenne de chaque groupe avec chaque concept, par décennie.
+        Les mots absents d'une décennie sont ignorés (comme model.wv dans le notebook 4).
+
+        Args:
+            groups: Dict {nom_groupe: liste_de_mots}
+            concepts: Dict {nom_concept: liste_de_mots}
+
+        Returns:
+            (similarités décennies × groupes × concepts (0.0 si aucune paire),
+             nombre de paires de mots utilisées, même forme)
+        """
+        group_words = list(dict.fromkeys(w for words in groups.values() for w in words))
+        concept_words = list(dict.fromkeys(w for words in concepts.values() for w in words))
+
+        group_vectors, group_present = self._gather(group_words)
+        concept_vectors, concept_present = self._gather(concept_words)
+
+        # Similarités mot à mot de toutes les décennies : un produit matriciel par lots
+        similarities = group_vectors @ concept_vectors.transpose(0, 2, 1)
+
+        group_weights = self._indicator(groups, group_words)[None] * group_present[:, None, :]
+        concept_weights = self._indicator(concepts, concept_words)[None] * concept_present[:, None, :]
+
+        sums = group_weights @ similarities @ concept_weights.transpose(0, 2, 1)
+        pairs = group_weights.sum(axis=2)[:, :, None] * concept_weights.sum(axis=2)[:, None, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = np.where(pairs > 0, sums / pairs, 0.0)
+
+        return means, pairs.astype(np.int64)
+
+    def similarity_table(self, groups: Dict[str, List[str]],
+                         concepts: Dict[str, List[str]]) -> pd.DataFrame:
+        """
+        Résultats de similarity_blocks en format long.
+
+        Returns:
+            DataFrame (decade, group, concept, similarity, num_pairs)
+        """
+        means, pairs = self.similarity_blocks(groups, concepts)
+        index = pd.MultiIndex.from_product([self.decades, list(groups), list(concepts)],
+                                           names=['decade', 'group', 'concept'])
+        return pd.DataFrame({
+            'similarity': means.reshape(-1),
+            'num_pairs': pairs.reshape(-1)
+        }, index=index).reset_index()
+
+    def weat(self, targets_x: List[str], targets_y: List[str],
+             attributes_a: List[str], attributes_b: List[str],
+             n_permutations: int = 10000,
+             seed: Optional[int] = None) -> pd.DataFrame:
+        """
+        Test WEAT (Caliskan et al., 2017) par décennie : taille d'effet et p-valeur
+        unilatérale par permutations des cibles X ∪ Y.
+
+        Args:
+            targets_x: Mots cibles X (ex: mots féminins)
+            targets_y: Mots cibles Y (ex: mots masculins)
+            attributes_a: Attributs A (ex: Power/Agency)
+            attributes_b: Attributs B (ex: Submission)
+            n_permutations: Nombre de permutations
+            seed: Graine aléatoire
+
+        Returns:
+            DataFrame (decade, effect_size, p_value, num_x, num_y)
+        """
+        targets_x = list(dict.fromkeys(targets_x))
+        targets_y = list(dict.fromkeys(targets_y))
+        targets = targets_x + targets_y
+        is_x = np.arange(len(targets)) < len(targets_x)
+
+        target_vectors, target_present = self._gather(targets)
+        means, _ = self._attribute_means(target_vectors, list(dict.fromkeys(attributes_a)))
+        means_b, _ = self._attribute_means(target_vectors, list(dict.fromkeys(attributes_b)))
+        # s(w, A, B) de chaque cible, toutes décennies
+        association = means - means_b
+
+        rng = np.random.default_rng(seed)
+        results = []
+        for d, decade in enumerate(self.decades):
+            valid = target_present[d] & ~np.isnan(association[d])
+            s = association[d][valid]
+            x = is_x[valid]
+            num_x, num_y = int(x.sum()), int((~x).sum())
+
+            effect_size = p_value = np.nan
+            if num_x and num_y and num_x + num_y > 2:
+                std = s.std(ddof=1)
+                if std > 0:
+                    effect_size = float((s[x].mean() - s[~x].mean()) / std)
+                observed = s[x].sum() - s[~x].sum()
+
+                # Toutes les permutations en une opération : les num_x premiers
+                # indices de chaque ligne forment le nouveau X
+                order = np.argsort(rng.random((n_permutations, len(s))), axis=1)
+                permuted = s[order]
+                stats = permuted[:, :num_x].sum(axis=1) - permuted[:, num_x:].sum(axis=1)
+                p_value = float((np.sum(stats >= observed) + 1) / (n_permutations + 1))
+
+            results.append({
+                'decade': decade,
+                'effect_size': effect_size,
+                'p_value': p_value,
+                'num_x': num_x,
+                'num_y': num_y
+            })
+        return pd.DataFrame(results)
+
+    def _attribute_means(self, target_vectors: np.ndarray,
+                         attributes: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Similarité moyenne de chaque cible avec les attributs présents (NaN si aucun).
+        """
+        attribute_vectors, attribute_present = self._gather(attributes)
+        similarities = target_vectors @ attribute_vectors.transpose(0, 2, 1)
+        counts = attribute_present.sum(axis=1)[:, None]
+        sums = (similarities * attribute_present[:, None, :]).sum(axis=2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan), counts
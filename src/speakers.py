@@ -0,0 +1,345 @@
+"""
+speakers.py - Index des personnages et statistiques par locuteur
+Les noms de personnages sont internés (une table pour tout le corpus) et les
+répliques stockées en tableaux d'entiers (film, personnage, offsets dans le
+texte nettoyé). Les comptes des lexiques de dictionaries.py sont agrégés par
+locuteur (film × personnage), ce qui permet d'étudier qui parle, et combien,
+sans re-parser les scripts.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from counts import ScriptCountCache
+from dictionaries import LexiconRegistry
+from dtm import LexiconDTM
+from parser import scan_script, dialogue_text
+
+
+# Marqueurs de genre dans les noms de personnages ("MRS PARKER", "OLD MAN"...)
+NAME_GENDER_MARKERS = {
+    'female': [
+        'mrs', 'miss', 'ms', 'madam', 'madame', 'lady', 'woman', 'girl', 'mother',
+        'mom', 'mum', 'aunt', 'sister', 'wife', 'daughter', 'queen', 'princess',
+        'grandma', 'grandmother', 'waitress', 'actress', 'nun', 'bride'
+    ],
+    'male': [
+        'mr', 'sir', 'lord', 'man', 'boy', 'guy', 'father', 'dad', 'uncle',
+        'brother', 'husband', 'son', 'king', 'prince', 'grandpa', 'grandfather',
+        'waiter', 'actor', 'priest', 'groom'
+    ]
+}
+
+_NAME_MARKERS = LexiconRegistry(NAME_GENDER_MARKERS)
+
+
+def gender_from_name(name: str) -> Optional[str]:
+    """
+    Genre d'un personnage déduit des marqueurs de son nom.
+
+    Args:
+        name: Nom du personnage (ex: "MRS PARKER")
+
+    Returns:
+        'female', 'male', ou None si aucun marqueur (ou des marqueurs contradictoires)
+    """
+    genders = {gender for token in name.lower().split() for gender in _NAME_MARKERS.lookup(token)}
+    return _NAME_MARKERS.categories[genders.pop()] if len(genders) == 1 else None
+
+
+class SpeakerIndex:
+    """
+    Table des personnages internés, répliques codées en entiers et comptes par locuteur.
+
+    Un locuteur est un couple (film, personnage) ; un même nom dans deux films
+    partage le même identifiant de nom mais donne deux locuteurs distincts.
+    """
+
+    def __init__(self, films: pd.DataFrame,
+                 names: List[str],
+                 turns: Dict[str, np.ndarray],
+                 speakers: Dict[str, np.ndarray],
+                 counts: sparse.csr_matrix,
+                 vocabulary: List[str],
+                 get_text: Optional[Callable[[int], str]] = None):
+        """
+        Args:
+            films: Métadonnées des films (title, release_year, decade), une ligne par film
+            names: Table des noms de personnages
+            turns: Répliques {'film', 'character', 'start', 'end', 'words', 'speaker'}
+            speakers: Locuteurs {'film', 'character', 'num_turns', 'total_words'}
+            counts: Comptes des termes du lexique (locuteurs × vocabulaire)
+            vocabulary: Terme de chaque colonne de counts
+            get_text: Fonction numéro de film -> texte nettoyé (pour relire les répliques)
+        """
+        self.films = films.reset_index(drop=True)
+        self.names = list(names)
+        self.name_ids = {name: i for i, name in enumerate(self.names)}
+        self.turns = turns
+        self.speakers = speakers
+        self.dtm = LexiconDTM(counts, vocabulary, speakers['total_words'])
+        self.get_text = get_text
+
+    @classmethod
+    def build(cls, df: pd.DataFrame,
+              text_column: str = 'clean_text',
+              extra_words: Sequence[str] = ()) -> 'SpeakerIndex':
+        """
+        Construit l'index en un seul parcours des scripts.
+
+        Args:
+            df: DataFrame des scripts (title, release_year, decade, texte nettoyé)
+            text_column: Colonne du texte nettoyé
+            extra_words: Mots à ajouter au vocabulaire de dictionaries.py
+
+        Returns:
+            SpeakerIndex
+        """
+        texts = df[text_column].tolist()
+        columns = [c for c in ('title', 'release_year', 'decade') if c in df.columns]
+        return cls._build(df[columns], texts, extra_words, texts.__getitem__)
+
+    @classmethod
+    def from_store(cls, store, column: str = 'clean_text',
+                   extra_words: Sequence[str] = ()) -> 'SpeakerIndex':
+        """
+        Construit l'index depuis un CorpusStore (textes lus un par un, non gardés en mémoire).
+
+        Args:
+            store: CorpusStore
+            column: Colonne du texte nettoyé
+            extra_words: Mots à ajouter au vocabulaire de dictionaries.py
+
+        Returns:
+            SpeakerIndex
+        """
+        metadata = store.metadata()
+        columns = [c for c in ('title', 'release_year', 'decade') if c in metadata.columns]
+        return cls._build(metadata[columns], store.iter_texts(column), extra_words,
+                          lambda i: store.text(i, column))
+
+    @classmethod
+    def _build(cls, films: pd.DataFrame,
+               texts: Iterable,
+               extra_words: Sequence[str],
+               get_text: Optional[Callable[[int], str]]) -> 'SpeakerIndex':
+        # Cache dédié : les textes par locuteur ne doivent pas remplir SCRIPT_COUNTS
+        cache = ScriptCountCache()
+        cache.add_words(extra_words)
+
+        names: List[str] = []
+        name_ids: Dict[str, int] = {}
+        turn_parts = {key: [] for key in ('film', 'character', 'start', 'end', 'words', 'speaker')}
+        speaker_parts = {key: [] for key in ('film', 'character', 'num_turns', 'total_words')}
+        rows = []
+        num_speakers = 0
+
+        for film_id, text in enumerate(texts):
+            if not isinstance(text, str):
+                continue
+            scan = scan_script(text)
+            if not len(scan['character_ids']):
+                continue
+
+            # Identifiants locaux (par script) -> identifiants du corpus
+            local_to_global = []
+            for name in scan['characters']:
+                if name not in name_ids:
+                    name_ids[name] = len(names)
+                    names.append(name)
+                local_to_global.append(name_ids[name])
+            characters = np.array(local_to_global, dtype=np.int32)[scan['character_ids']]
+
+            dialogues = [dialogue_text(text, start, end)
+                         for start, end in zip(scan['starts'].tolist(), scan['ends'].tolist())]
+            words = np.fromiter((len(d.split()) for d in dialogues),
+                                dtype=np.int32, count=len(dialogues))
+
+            # Locuteurs du film, par ordre de première réplique
+            speaker_chars, first, local_speaker = np.unique(characters, return_index=True,
+                                                            return_inverse=True)
+            order = np.argsort(first, kind='stable')
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            local_speaker = rank[local_speaker]
+            speaker_chars = speaker_chars[order]
+
+            # Un texte par locuteur (répliques séparées par des retours à la ligne)
+            speaker_dialogues = [[] for _ in range(len(speaker_chars))]
+            for dialogue, speaker in zip(dialogues, local_speaker.tolist()):
+                speaker_dialogues[speaker].append(dialogue)
+            for parts in speaker_dialogues:
+                rows.append(cache.script_vector('\n'.join(parts))[0])
+            cache.clear()
+
+            turn_parts['film'].append(np.full(len(characters), film_id, dtype=np.int32))
+            turn_parts['character'].append(characters)
+            turn_parts['start'].append(scan['starts'])
+            turn_parts['end'].append(scan['ends'])
+            turn_parts['words'].append(words)
+            turn_parts['speaker'].append((local_speaker + num_speakers).astype(np.int32))
+
+            speaker_parts['film'].append(np.full(len(speaker_chars), film_id, dtype=np.int32))
+            speaker_parts['character'].append(speaker_chars.astype(np.int32))
+            speaker_parts['num_turns'].append(np.bincount(local_speaker, minlength=len(speaker_chars)))
+            speaker_parts['total_words'].append(
+                np.bincount(local_speaker, weights=words, minlength=len(speaker_chars)))
+            num_speakers += len(speaker_chars)
+
+        dtypes = {'film': np.int32, 'character': np.int32, 'start': np.int64, 'end': np.int64,
+                  'words': np.int32, 'speaker': np.int32, 'num_turns': np.int32,
+                  'total_words': np.int64}
+        turns = {key: np.concatenate(parts).astype(dtypes[key]) if parts
+                 else np.empty(0, dtype=dtypes[key]) for key, parts in turn_parts.items()}
+        speakers = {key: np.concatenate(parts).astype(dtypes[key]) if parts
+                    else np.empty(0, dtype=dtypes[key]) for key, parts in speaker_parts.items()}
+
+        vocabulary = list(cache.vocabulary)
+        counts = sparse.csr_matrix(
+            np.vstack(rows) if rows else np.zeros((0, len(vocabulary)), dtype=np.int64))
+
+        return cls(films, names, turns, speakers, counts, vocabulary, get_text)
+
+    def __len__(self) -> int:
+        return len(self.speakers['film'])
+
+    def dialogue(self, turn: int) -> str:
+        """
+        Texte d'une réplique (relu dans le texte du film).
+        """
+        if self.get_text is None:
+            raise ValueError("Textes non disponibles (index chargé sans DataFrame)")
+        film = int(self.turns['film'][turn])
+        return dialogue_text(self.get_text(film),
+                             int(self.turns['start'][turn]), int(self.turns['end'][turn]))
+
+    def film_characters(self, film: int) -> List[str]:
+        """
+        Personnages ayant au moins une réplique dans un film, par ordre d'apparition.
+        """
+        mask = self.speakers['film'] == film
+        return [self.names[c] for c in self.speakers['character'][mask].tolist()]
+
+    def speakers_frame(self, categories: Optional[Dict[str, List[str]]] = None,
+                       genders: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """
+        Statistiques par locuteur : répliques, mots, genre et occurrences des lexiques.
+
+        Args:
+            categories: Dict {nom_catégorie: liste_de_mots} (par défaut mots genrés
+                        et stéréotypes du notebook 3)
+            genders: Genre par nom de personnage, prioritaire sur gender_from_name
+
+        Returns:
+            DataFrame, une ligne par locuteur
+        """
+        if categories is None:
+            from dictionaries import GENDER_WORDS
+            from dtm import stereotype_categories
+            categories = {**GENDER_WORDS, **stereotype_categories()}
+        genders = genders or {}
+
+        films = self.films.iloc[self.speakers['film']].reset_index(drop=True)
+        names = [self.names[c] for c in self.speakers['character'].tolist()]
+
+        frame = pd.DataFrame({
+            'film': self.speakers['film'],
+            'character': names,
+            'gender': [genders.get(n, gender_from_name(n)) for n in names],
+            'num_turns': self.speakers['num_turns'],
+            'total_words': self.speakers['total_words']
+        })
+        frame = pd.concat([films, frame], axis=1)
+
+        counts = self.dtm.category_counts(categories).add_suffix('_count')
+        return pd.concat([frame, counts.reset_index(drop=True)], axis=1)
+
+    def speech_by_decade(self, genders: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """
+        Parole par décennie et par genre de personnage (locuteurs, répliques, mots,
+        part des mots de la décennie).
+
+        Args:
+            genders: Genre par nom de personnage, prioritaire sur gender_from_name
+
+        Returns:
+            DataFrame (decade, gender, num_speakers, num_turns, total_words, word_share)
+        """
+        frame = self.speakers_frame(categories={}, genders=genders)
+        frame['gender'] = frame['gender'].fillna('unknown')
+
+        result = frame.groupby(['decade', 'gender']).agg(
+            num_speakers=('character', 'size'),
+            num_turns=('num_turns', 'sum'),
+            total_words=('total_words', 'sum')
+        ).reset_index()
+        decade_words = result.groupby('decade')['total_words'].transform('sum')
+        result['word_share'] = result['total_words'] / decade_words.replace(0, np.nan)
+        return result
+
+    def save(self, path: str) -> None:
+        """
+        Sauvegarde l'index (tableaux numpy, sans pickle) dans un fichier .npz.
+        """
+        counts = self.dtm.matrix.tocsr()
+        np.savez_compressed(
+            path,
+            names=np.array(self.names, dtype=str),
+            vocabulary=np.array(self.dtm.vocabulary, dtype=str),
+            films=self.films.to_json(orient='split'),
+            counts_data=counts.data, counts_indices=counts.indices,
+            counts_indptr=counts.indptr, counts_shape=np.array(counts.shape),
+            **{f'turn_{key}': values for key, values in self.turns.items()},
+            **{f'speaker_{key}': values for key, values in self.speakers.items()}
+        )
+
+    @classmethod
+    def load(cls, path: str, df: Optional[pd.DataFrame] = None,
+             text_column: str = 'clean_text') -> 'SpeakerIndex':
+        """
+        Recharge un index sauvegardé par save().
+
+        Args:
+            path: Fichier .npz
+            df: DataFrame des scripts (mêmes lignes qu'à la construction), pour relire
+                les répliques avec dialogue()
+            text_column: Colonne du texte nettoyé
+
+        Returns:
+            SpeakerIndex
+        """
+        from io import StringIO
+
+        with np.load(path, allow_pickle=False) as data:
+            turns = {key[len('turn_'):]: data[key] for key in data.files if key.startswith('turn_')}
+            speakers = {key[len('speaker_'):]: data[key]
+                        for key in data.files if key.startswith('speaker_')}
+            counts = sparse.csr_matrix(
+                (data['counts_data'], data['counts_indices'], data['counts_indptr']),
+                shape=tuple(data['counts_shape']))
+            films = pd.read_json(StringIO(str(data['films'])), orient='split')
+            names = data['names'].tolist()
+            vocabulary = data['vocabulary'].tolist()
+
+        get_text = df[text_column].tolist().__getitem__ if df is not None else None
+        return cls(films, names, turns, speakers, counts, vocabulary, get_text)
+
+
+if __name__ == "__main__":
+    df = pd.DataFrame({
+        'title': ['Film A', 'Film B'],
+        'release_year': [1965, 1992],
+        'decade': [1960, 1990],
+        'clean_text': [
+            "JOHN: She is so emotional.\n\nMRS PARKER: He is my husband.\nA good man.\n\n"
+            "JOHN: Pretty, isn't she?",
+            "MR SMITH\nThe girl left.\n\nMARY: Her brother stayed."
+        ]
+    })
+    index = SpeakerIndex.build(df)
+    print(index.speakers_frame()[['title', 'character', 'gender', 'num_turns', 'total_words',
+                                  'female_count', 'male_count', 'sexism_count']])
+    print(index.speech_by_decade())
@@ -5,11 +5,41 @@ Analyse l'évolution des biais par décennie
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from collections import Counter
-import re
 
+from matcher import LexiconMatcher, relative_frequency
+from counts import SCRIPT_COUNTS, ScriptCountCache, group_count_vectors
+from instrumentation import instrumented
 
+
+# Matchers compilés réutilisés entre appels (clé: tuple de mots)
+_MATCHER_CACHE: Dict[Tuple[str, ...], LexiconMatcher] = {}
+
+
+def _num_scripts(args: Tuple, kwargs: Dict, result: pd.DataFrame) -> Optional[int]:
+    """
+    Nombre de scripts analysés (instrumentation des analyses par décennie).
+    None si le résultat est vide et l'entrée un flux (sans longueur).
+    """
+    if 'num_scripts' in result.columns:
+        return int(result['num_scripts'].sum())
+    data = args[0] if args else kwargs.get('df')
+    return len(data) if hasattr(data, '__len__') else None
+
+
+def _get_matcher(word_list: Tuple[str, ...]) -> LexiconMatcher:
+    """
+    Retourne (et met en cache) un matcher pour une liste de mots.
+    """
+    matcher = _MATCHER_CACHE.get(word_list)
+    if matcher is None:
+        matcher = LexiconMatcher({'words': list(word_list)})
+        _MATCHER_CACHE[word_list] = matcher
+    return matcher
+
+
+@instrumented('stats_analysis.calculate_word_frequency', items=lambda args, kwargs, result: 1)
 def calculate_word_frequency(text: str, word_list: List[str]) -> Dict[str, int]:
     """
     Calcule la fréquence d'apparition de chaque mot d'une liste dans un texte.
@@ -24,18 +54,12 @@ def calculate_word_frequency(text: str, word_list: List[str]) -> Dict[str, int]:
     if not isinstance(text, str):
         return {word: 0 for word in word_list}
     
-    text_lower = text.lower()
-    frequencies = {}
-    
-    for word in word_list:
-        # Utiliser \b pour les limites de mots (éviter les faux positifs)
-        pattern = r'\b' + re.escape(word.lower()) + r'\b'
-        count = len(re.findall(pattern, text_lower))
-        frequencies[word] = count
-    
-    return frequencies
+    # Un seul parcours du texte pour toute la liste (limites de mots \b conservées)
+    matcher = _get_matcher(tuple(word_list))
+    return matcher.word_frequency(matcher.count_words(text), word_list)
 
 
+@instrumented('stats_analysis.calculate_relative_frequency', items=lambda args, kwargs, result: 1)
 def calculate_relative_frequency(text: str, word_list: List[str]) -> float:
     """
     Calcule la fréquence relative (pour 1000 mots) d'une liste de mots.
@@ -61,11 +85,157 @@ def calculate_relative_frequency(text: str, word_list: List[str]) -> float:
     total_occurrences = sum(frequencies.values())
     
     # Fréquence relative pour 1000 mots
-    relative_freq = (total_occurrences / total_words) * 1000
+    return relative_frequency(total_occurrences, total_words)
+
+
+def _gender_categories() -> Dict[str, List[str]]:
+    """
+    Catégories des mentions de genre et des stéréotypes genrés.
+    """
+    from dictionaries import GENDER_WORDS, GENDER_STEREOTYPES
+    
+    return {**GENDER_WORDS, **GENDER_STEREOTYPES}
+
+
+def _racial_categories() -> Dict[str, List[str]]:
+    """
+    Catégories des groupes ethniques et des stéréotypes raciaux
+    (nommées comme les colonnes de résultats).
+    """
+    from dictionaries import ETHNICITY_WORDS, RACIAL_STEREOTYPES
+    
+    categories = {f'{ethnicity}_freq': words for ethnicity, words in ETHNICITY_WORDS.items()}
+    categories.update({f'stereotype_{stereotype}_freq': words
+                       for stereotype, words in RACIAL_STEREOTYPES.items()})
+    return categories
+
+
+def _grouped_counts(df: pd.DataFrame,
+                    text_column: str,
+                    groups: pd.Series,
+                    word_categories: Dict[str, List[str]],
+                    cache: Optional[ScriptCountCache] = None) -> List[Tuple]:
+    """
+    Comptes par groupe obtenus en sommant les vecteurs (mis en cache) de chaque script.
+    
+    Args:
+        df: DataFrame contenant les textes
+        text_column: Nom de la colonne contenant le texte
+        groups: Clé de groupe de chaque ligne (ex: df['decade'])
+        word_categories: Dict {nom_catégorie: liste_de_mots}
+        cache: Cache des vecteurs de comptes (par défaut le cache partagé)
+        
+    Returns:
+        Liste de (groupe, nombre de scripts, {'category_counts', 'total_words'})
+    """
+    if cache is None:
+        cache = SCRIPT_COUNTS
+    
+    indices = cache.category_indices(word_categories)
+    matrix, totals = cache.count_matrix(df[text_column])
+    keys, group_matrix, group_totals, num_scripts = group_count_vectors(matrix, totals, groups)
+    
+    results = []
+    for i, key in enumerate(keys):
+        category_counts = {name: int(group_matrix[i, idx].sum()) for name, idx in indices.items()}
+        counts = {'category_counts': category_counts, 'total_words': int(group_totals[i])}
+        results.append((key, int(num_scripts[i]), counts))
+    
+    return results
+
+
+def _corpus_row(group, num_scripts: int, counts: Dict,
+                word_categories: Dict[str, List[str]],
+                group_column: str = 'decade') -> Dict:
+    """
+    Ligne de résultats de analyze_corpus_by_decade à partir des comptes agrégés.
+    """
+    total_words = counts['total_words']
+    decade_result = {
+        group_column: group,
+        'num_scripts': num_scripts,
+        'total_words': total_words
+    }
+    
+    # Fréquence relative et occurrences brutes pour chaque catégorie
+    for category_name in word_categories:
+        occurrences = counts['category_counts'][category_name]
+        decade_result[f'{category_name}_freq'] = relative_frequency(occurrences, total_words)
+        decade_result[f'{category_name}_count'] = occurrences
     
-    return relative_freq
+    return decade_result
 
 
+def _gender_row(decade, num_scripts: int, counts: Dict) -> Dict:
+    """
+    Ligne de résultats de analyze_gender_bias_by_decade à partir des comptes agrégés.
+    """
+    category_counts = counts['category_counts']
+    total_words = counts['total_words']
+    
+    # Fréquences des mentions de genre
+    female_freq = relative_frequency(category_counts['female'], total_words)
+    male_freq = relative_frequency(category_counts['male'], total_words)
+    
+    # Ratio femmes/hommes
+    gender_ratio = female_freq / male_freq if male_freq > 0 else 0
+    
+    return {
+        'decade': decade,
+        'num_scripts': num_scripts,
+        'female_mentions_freq': female_freq,
+        'male_mentions_freq': male_freq,
+        'gender_ratio': gender_ratio,
+        # Stéréotypes
+        'female_negative_stereotypes': relative_frequency(category_counts['female_negative'], total_words),
+        'female_objectification': relative_frequency(category_counts['female_objectification'], total_words),
+        'male_stereotypes': relative_frequency(category_counts['male_stereotypes'], total_words)
+    }
+
+
+def _racial_row(decade, num_scripts: int, counts: Dict) -> Dict:
+    """
+    Ligne de résultats de analyze_racial_bias_by_decade à partir des comptes agrégés.
+    """
+    decade_result = {
+        'decade': decade,
+        'num_scripts': num_scripts
+    }
+    
+    # Fréquences par groupe ethnique et par stéréotype racial
+    for column, occurrences in counts['category_counts'].items():
+        decade_result[column] = relative_frequency(occurrences, counts['total_words'])
+    
+    return decade_result
+
+
+@instrumented('stats_analysis.analyze_corpus_by_group', items=_num_scripts)
+def analyze_corpus_by_group(df: pd.DataFrame,
+                            text_column: str,
+                            group_column: str,
+                            word_categories: Dict[str, List[str]]) -> pd.DataFrame:
+    """
+    Analyse un corpus par groupe quelconque (année, tranche de 5 ans, genre...).
+    Les scripts déjà comptés ne sont pas reparcourus : seule la somme par groupe est recalculée.
+    
+    Args:
+        df: DataFrame contenant les textes
+        text_column: Nom de la colonne contenant le texte
+        group_column: Nom de la colonne de regroupement
+        word_categories: Dict {nom_catégorie: liste_de_mots}
+        
+    Returns:
+        DataFrame avec les fréquences relatives par groupe et catégorie
+    """
+    results = []
+    for group, num_scripts, counts in _grouped_counts(df, text_column, df[group_column],
+                                                      word_categories):
+        results.append(_corpus_row(group, num_scripts, counts, word_categories, group_column))
+    
+    return pd.DataFrame(results)
+
+
+@instrumented('stats_analysis.analyze_corpus_by_decade', items=_num_scripts)
 def analyze_corpus_by_decade(df: pd.DataFrame, 
                               text_column: str,
                               year_column: str,
@@ -86,34 +256,10 @@ def analyze_corpus_by_decade(df: pd.DataFrame,
     if 'decade' not in df.columns:
         df['decade'] = (df[year_column] // 10) * 10
     
-    results = []
-    
-    for decade in sorted(df['decade'].unique()):
-        decade_data = df[df['decade'] == decade]
-        
-        # Concaténer tous les textes de la décennie
-        all_text = ' '.join(decade_data[text_column].dropna().astype(str))
-        
-        decade_result = {
-            'decade': decade,
-            'num_scripts': len(decade_data),
-            'total_words': len(all_text.split())
-        }
-        
-        # Calculer la fréquence pour chaque catégorie
-        for category_name, word_list in word_categories.items():
-            freq = calculate_relative_frequency(all_text, word_list)
-            decade_result[f'{category_name}_freq'] = freq
-            
-            # Aussi compter les occurrences brutes
-            frequencies = calculate_word_frequency(all_text, word_list)
-            decade_result[f'{category_name}_count'] = sum(frequencies.values())
-        
-        results.append(decade_result)
-    
-    return pd.DataFrame(results)
+    return analyze_corpus_by_group(df, text_column, 'decade', word_categories)
 
 
+@instrumented('stats_analysis.analyze_gender_bias_by_decade', items=_num_scripts)
 def analyze_gender_bias_by_decade(df: pd.DataFrame,
                                    text_column: str,
                                    year_column: str) -> pd.DataFrame:
@@ -128,43 +274,17 @@ def analyze_gender_bias_by_decade(df: pd.DataFrame,
     Returns:
         DataFrame avec les métriques de biais de genre
     """
-    from dictionaries import GENDER_WORDS, GENDER_STEREOTYPES
-    
     if 'decade' not in df.columns:
         df['decade'] = (df[year_column] // 10) * 10
     
-    results = []
-    
-    for decade in sorted(df['decade'].unique()):
-        decade_data = df[df['decade'] == decade]
-        all_text = ' '.join(decade_data[text_column].dropna().astype(str))
-        
-        # Fréquences des mentions de genre
-        female_freq = calculate_relative_frequency(all_text, GENDER_WORDS['female'])
-        male_freq = calculate_relative_frequency(all_text, GENDER_WORDS['male'])
-        
-        # Ratio femmes/hommes
-        gender_ratio = female_freq / male_freq if male_freq > 0 else 0
-        
-        # Stéréotypes
-        female_neg_freq = calculate_relative_frequency(all_text, GENDER_STEREOTYPES['female_negative'])
-        female_obj_freq = calculate_relative_frequency(all_text, GENDER_STEREOTYPES['female_objectification'])
-        male_stereo_freq = calculate_relative_frequency(all_text, GENDER_STEREOTYPES['male_stereotypes'])
-        
-        results.append({
-            'decade': decade,
-            'num_scripts': len(decade_data),
-            'female_mentions_freq': female_freq,
-            'male_mentions_freq': male_freq,
-            'gender_ratio': gender_ratio,
-            'female_negative_stereotypes': female_neg_freq,
-            'female_objectification': female_obj_freq,
-            'male_stereotypes': male_stereo_freq
-        })
-    
-    return pd.DataFrame(results)
+    return pd.DataFrame([
+        _gender_row(decade, num_scripts, counts)
+        for decade, num_scripts, counts in _grouped_counts(df, text_column, df['decade'],
+                                                           _gender_categories())
+    ])
 
 
+@instrumented('stats_analysis.analyze_racial_bias_by_decade', items=_num_scripts)
 def analyze_racial_bias_by_decade(df: pd.DataFrame,
                                    text_column: str,
                                    year_column: str) -> pd.DataFrame:
@@ -179,35 +299,134 @@ def analyze_racial_bias_by_decade(df: pd.DataFrame,
     Returns:
         DataFrame avec les métriques de biais racial
     """
-    from dictionaries import ETHNICITY_WORDS, RACIAL_STEREOTYPES
-    
     if 'decade' not in df.columns:
         df['decade'] = (df[year_column] // 10) * 10
     
-    results = []
+    return pd.DataFrame([
+        _racial_row(decade, num_scripts, counts)
+        for decade, num_scripts, counts in _grouped_counts(df, text_column, df['decade'],
+                                                           _racial_categories())
+    ])
+
+
+# ===== ANALYSE EN FLUX (sans matérialiser le corpus) =====
+
+def aggregate_stream_by_decade(scripts: Iterable[Dict],
+                               matcher: LexiconMatcher,
+                               text_key: str = 'clean_text',
+                               year_key: str = 'release_year') -> Dict:
+    """
+    Consomme un flux de scripts et ne garde que des compteurs par décennie.
+    
+    Chaque script est compté puis libéré : la mémoire ne dépend que du nombre
+    de décennies et de catégories, pas de la taille du corpus.
     
-    for decade in sorted(df['decade'].unique()):
-        decade_data = df[df['decade'] == decade]
-        all_text = ' '.join(decade_data[text_column].dropna().astype(str))
+    Args:
+        scripts: Itérable de dictionnaires (ex: parser.iter_parsed_scripts)
+        matcher: LexiconMatcher des catégories à compter
+        text_key: Clé du texte dans chaque script
+        year_key: Clé de l'année (utilisée si 'decade' est absent)
         
-        decade_result = {
-            'decade': decade,
-            'num_scripts': len(decade_data)
-        }
+    Returns:
+        Dict {décennie: {'num_scripts', 'total_words', 'category_counts'}}
+    """
+    aggregates = {}
+    
+    for script in scripts:
+        decade = script.get('decade')
+        if decade is None or pd.isna(decade):
+            year = script.get(year_key)
+            if year is None or pd.isna(year):
+                continue
+            decade = (year // 10) * 10
         
-        # Fréquences par groupe ethnique
-        for ethnicity, words in ETHNICITY_WORDS.items():
-            freq = calculate_relative_frequency(all_text, words)
-            decade_result[f'{ethnicity}_freq'] = freq
+        aggregate = aggregates.setdefault(decade, {
+            'num_scripts': 0,
+            'total_words': 0,
+            'category_counts': Counter({name: 0 for name in matcher.categories})
+        })
+        aggregate['num_scripts'] += 1
         
-        # Stéréotypes raciaux
-        for stereotype, words in RACIAL_STEREOTYPES.items():
-            freq = calculate_relative_frequency(all_text, words)
-            decade_result[f'stereotype_{stereotype}_freq'] = freq
+        text = script.get(text_key)
+        if not isinstance(text, str):
+            continue
         
-        results.append(decade_result)
+        counts = matcher.count(text)
+        aggregate['total_words'] += counts['total_words']
+        aggregate['category_counts'].update(counts['category_counts'])
     
-    return pd.DataFrame(results)
+    return aggregates
+
+
+@instrumented('stats_analysis.analyze_stream_by_decade', items=_num_scripts)
+def analyze_stream_by_decade(scripts: Iterable[Dict],
+                             word_categories: Dict[str, List[str]],
+                             text_key: str = 'clean_text',
+                             year_key: str = 'release_year') -> pd.DataFrame:
+    """
+    Équivalent en flux de analyze_corpus_by_decade.
+    
+    Args:
+        scripts: Itérable de scripts parsés avec leur année
+        word_categories: Dict {nom_catégorie: liste_de_mots}
+        text_key: Clé du texte dans chaque script
+        year_key: Clé de l'année
+        
+    Returns:
+        DataFrame avec les fréquences relatives par décennie et catégorie
+    """
+    aggregates = aggregate_stream_by_decade(scripts, LexiconMatcher(word_categories),
+                                            text_key, year_key)
+    return pd.DataFrame([
+        _corpus_row(decade, agg['num_scripts'], agg, word_categories)
+        for decade, agg in sorted(aggregates.items())
+    ])
+
+
+@instrumented('stats_analysis.analyze_gender_bias_stream', items=_num_scripts)
+def analyze_gender_bias_stream(scripts: Iterable[Dict],
+                               text_key: str = 'clean_text',
+                               year_key: str = 'release_year') -> pd.DataFrame:
+    """
+    Équivalent en flux de analyze_gender_bias_by_decade.
+    
+    Args:
+        scripts: Itérable de scripts parsés avec leur année
+        text_key: Clé du texte dans chaque script
+        year_key: Clé de l'année
+        
+    Returns:
+        DataFrame avec les métriques de biais de genre
+    """
+    aggregates = aggregate_stream_by_decade(scripts, LexiconMatcher(_gender_categories()),
+                                            text_key, year_key)
+    return pd.DataFrame([
+        _gender_row(decade, agg['num_scripts'], agg)
+        for decade, agg in sorted(aggregates.items())
+    ])
+
+
+@instrumented('stats_analysis.analyze_racial_bias_stream', items=_num_scripts)
+def analyze_racial_bias_stream(scripts: Iterable[Dict],
+                               text_key: str = 'clean_text',
+                               year_key: str = 'release_year') -> pd.DataFrame:
+    """
+    Équivalent en flux de analyze_racial_bias_by_decade.
+    
+    Args:
+        scripts: Itérable de scripts parsés avec leur année
+        text_key: Clé du texte dans chaque script
+        year_key: Clé de l'année
+        
+    Returns:
+        DataFrame avec les métriques de biais racial
+    """
+    aggregates = aggregate_stream_by_decade(scripts, LexiconMatcher(_racial_categories()),
+                                            text_key, year_key)
+    return pd.DataFrame([
+        _racial_row(decade, agg['num_scripts'], agg)
+        for decade, agg in sorted(aggregates.items())
+    ])
 
 
 def compare_decades(df_stats: pd.DataFrame, metric: str) -> Dict:
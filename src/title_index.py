@@ -0,0 +1,269 @@
+"""
+title_index.py - Association titre de film -> fichier de script
+Le répertoire est listé une seule fois ; les fichiers (ex: "A Night at the
+Roxbury_0120770_anno.txt") sont indexés par titre normalisé et par identifiant
+IMDb. Les titres sans correspondance exacte passent par une recherche
+approximative : blocage par trigrammes de caractères, puis similarité de
+chaînes sur quelques candidats seulement. Les suites ('Scream 2' / 'Scream 3')
+ne sont jamais confondues, et un film dont l'identifiant IMDb est connu mais
+absent du répertoire n'est pas associé par approximation.
+"""
+
+import os
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# Nom de fichier du corpus : <titre>_<id IMDb>[_<suffixe>].txt
+_FILENAME_PATTERN = re.compile(r'^(?P<title>.+?)_(?P<imdb>\d{6,8})(?:_[^_]*)?\.txt$')
+_NON_ALPHANUMERIC = re.compile(r'[^a-z0-9]+')
+_APOSTROPHES = re.compile(r"['’`]")
+_TRAILING_ARTICLE = re.compile(r'^(?P<rest>.+) (?P<article>the|a|an)$')
+# Numéros de suite : chiffres ou chiffres romains jusqu'à XXXIX
+_SEQUEL_NUMBER = re.compile(r'^(?:\d+|(?=[ivx])x{0,3}(?:ix|iv|v?i{0,3}))$')
+
+
+def normalize_title(title: str) -> str:
+    """
+    Clé de comparaison d'un titre : minuscules sans accents ni ponctuation,
+    '&' -> 'and', article final replacé en tête ("Matrix, The" -> "the matrix").
+
+    Args:
+        title: Titre du film ou partie titre d'un nom de fichier
+
+    Returns:
+        Titre normalisé (chaîne vide si le titre est invalide)
+    """
+    if not isinstance(title, str):
+        return ''
+    title = unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode('ascii')
+    title = _APOSTROPHES.sub('', title.lower().replace('&', ' and '))
+    title = _NON_ALPHANUMERIC.sub(' ', title).strip()
+    match = _TRAILING_ARTICLE.match(title)
+    if match:
+        title = f"{match.group('article')} {match.group('rest')}"
+    return title
+
+
+def normalize_imdb_id(imdb_id) -> Optional[int]:
+    """
+    Identifiant IMDb sous forme d'entier ('tt0120770', '0120770', 120770 -> 120770).
+    """
+    if imdb_id is None or (not isinstance(imdb_id, str) and pd.isna(imdb_id)):
+        return None
+    digits = re.sub(r'\D', '', str(imdb_id).split('.')[0])
+    return int(digits) if digits else None
+
+
+def _sequel_numbers(key: str) -> tuple:
+    """
+    Numéros (chiffres, chiffres romains) d'un titre normalisé : 'rocky ii' -> ('ii',).
+    """
+    return tuple(word for word in key.split() if _SEQUEL_NUMBER.match(word))
+
+
+def _trigrams(key: str) -> List[str]:
+    padded = f'  {key} '
+    return list({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+class ScriptFileIndex:
+    """
+    Index des fichiers de scripts d'un répertoire, construit une fois.
+    """
+
+    def __init__(self, filenames: Sequence[str], directory: str = '',
+                 fuzzy_threshold: float = 0.85,
+                 max_candidates: int = 10):
+        """
+        Args:
+            filenames: Noms des fichiers .txt
+            directory: Dossier des fichiers (préfixe des chemins retournés)
+            fuzzy_threshold: Similarité minimale (0-1) d'une correspondance approximative
+            max_candidates: Candidats vérifiés par similarité après le blocage par trigrammes
+        """
+        self.directory = directory
+        self.filenames = sorted(f for f in filenames if f.endswith('.txt'))
+        self.fuzzy_threshold = fuzzy_threshold
+        self.max_candidates = max_candidates
+
+        self.keys: List[str] = []
+        self.imdb_ids: List[Optional[int]] = []
+        self._by_key: Dict[str, List[int]] = {}
+        self._by_imdb: Dict[int, List[int]] = {}
+        for i, filename in enumerate(self.filenames):
+            match = _FILENAME_PATTERN.match(filename)
+            title = match.group('title') if match else filename[:-len('.txt')]
+            imdb_id = int(match.group('imdb')) if match else None
+            key = normalize_title(title)
+            self.keys.append(key)
+            self.imdb_ids.append(imdb_id)
+            self._by_key.setdefault(key, []).append(i)
+            if imdb_id is not None:
+                self._by_imdb.setdefault(imdb_id, []).append(i)
+
+        # Index inversé trigramme -> fichiers (blocage de la recherche approximative)
+        postings: Dict[str, List[int]] = {}
+        self._num_trigrams = np.zeros(len(self.filenames), dtype=np.int32)
+        for i, key in enumerate(self.keys):
+            grams = _trigrams(key)
+            self._num_trigrams[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self._postings = {gram: np.array(files, dtype=np.int32) for gram, files in postings.items()}
+
+    @classmethod
+    def from_directory(cls, directory: str, **kwargs) -> 'ScriptFileIndex':
+        """
+        Construit l'index à partir d'un seul listage du répertoire.
+        """
+        return cls(os.listdir(directory), directory, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.filenames)
+
+    def _path(self, i: int) -> str:
+        return os.path.join(self.directory, self.filenames[i])
+
+    def _fuzzy(self, key: str) -> List[tuple]:
+        """
+        Candidats approximatifs triés par similarité décroissante : [(similarité, fichier)].
+        Les candidats dont les numéros de suite diffèrent sont écartés.
+        """
+        grams = _trigrams(key)
+        shared = np.zeros(len(self.filenames), dtype=np.int32)
+        for gram in grams:
+            files = self._postings.get(gram)
+            if files is not None:
+                shared[files] += 1
+        if not shared.any():
+            return []
+
+        # Coefficient de Dice sur les trigrammes, puis vérification des meilleurs candidats
+        dice = 2 * shared / (self._num_trigrams + len(grams))
+        top = np.argsort(-dice, kind='stable')[:self.max_candidates]
+        numbers = _sequel_numbers(key)
+        scored = [(SequenceMatcher(None, key, self.keys[i]).ratio(), int(i))
+                  for i in top.tolist()
+                  if shared[i] > 0 and _sequel_numbers(self.keys[i]) == numbers]
+        return sorted(scored, key=lambda item: (-item[0], item[1]))
+
+    def match(self, title: str, imdb_id=None) -> Dict:
+        """
+        Fichier d'un film : par identifiant IMDb, puis titre normalisé, puis recherche approximative.
+        Si l'identifiant IMDb est fourni mais absent du répertoire, seuls les fichiers
+        de même titre sans identifiant sont acceptés (pas de recherche approximative).
+
+        Args:
+            title: Titre du film
+            imdb_id: Identifiant IMDb (optionnel, prioritaire)
+
+        Returns:
+            Dict {'filepath', 'method' ('imdb', 'exact', 'fuzzy' ou None), 'score',
+                  'status' ('matched', 'ambiguous', 'unmatched'), 'candidates'}
+        """
+        imdb = normalize_imdb_id(imdb_id)
+        if imdb is not None and imdb in self._by_imdb:
+            files = self._by_imdb[imdb]
+            return self._result(files, 'imdb', 1.0, ambiguous=len(files) > 1)
+
+        key = normalize_title(title)
+        if not key:
+            return self._result([], None, 0.0)
+
+        files = self._by_key.get(key)
+        if imdb is not None:
+            # Le film cherché n'est pas dans le répertoire : un fichier d'un autre id
+            # (remake, suite, homonyme) serait le script d'un autre film
+            files = [i for i in files or [] if self.imdb_ids[i] is None]
+            return self._result(files, 'exact' if files else None, 1.0 if files else 0.0,
+                                ambiguous=len(files) > 1)
+        if files:
+            # Même titre, plusieurs films (remakes) : ambigu sans identifiant IMDb
+            distinct = {self.imdb_ids[i] for i in files}
+            return self._result(files, 'exact', 1.0, ambiguous=len(distinct) > 1)
+
+        scored = [(score, i) for score, i in self._fuzzy(key) if score >= self.fuzzy_threshold]
+        if not scored:
+            return self._result([], None, 0.0)
+        best = scored[0][0]
+        tied = [i for score, i in scored if best - score < 0.02 and self.keys[i] != self.keys[scored[0][1]]]
+        return self._result([i for _, i in scored], 'fuzzy', best, ambiguous=bool(tied))
+
+    def _result(self, files: List[int], method: Optional[str], score: float,
+                ambiguous: bool = False) -> Dict:
+        if not files:
+            status = 'unmatched'
+        else:
+            status = 'ambiguous' if ambiguous else 'matched'
+        return {
+            'filepath': self._path(files[0]) if files else None,
+            'method': method,
+            'score': score,
+            'status': status,
+            'candidates': [self.filenames[i] for i in files]
+        }
+
+    def match_frame(self, df: pd.DataFrame, title_column: str = 'title',
+                    imdb_column: Optional[str] = None) -> pd.DataFrame:
+        """
+        Associe chaque ligne de métadonnées à un fichier.
+
+        Args:
+            df: Métadonnées des films
+            title_column: Colonne du titre
+            imdb_column: Colonne de l'identifiant IMDb (optionnelle)
+
+        Returns:
+            Copie de df avec les colonnes filepath, match_method, match_score,
+            match_status et match_candidates
+        """
+        imdb_ids = df[imdb_column].tolist() if imdb_column else [None] * len(df)
+        results = [self.match(title, imdb_id)
+                   for title, imdb_id in zip(df[title_column].tolist(), imdb_ids)]
+
+        matched = df.copy()
+        matched['filepath'] = [r['filepath'] for r in results]
+        matched['match_method'] = [r['method'] for r in results]
+        matched['match_score'] = [r['score'] for r in results]
+        matched['match_status'] = [r['status'] for r in results]
+        matched['match_candidates'] = ['|'.join(r['candidates']) for r in results]
+        return matched
+
+
+def matching_report(matched: pd.DataFrame) -> pd.DataFrame:
+    """
+    Films sans fichier, associés de façon ambiguë ou par recherche approximative
+    (sortie de match_frame).
+
+    Args:
+        matched: DataFrame retourné par ScriptFileIndex.match_frame
+
+    Returns:
+        Lignes à vérifier, triées par statut
+    """
+    report = matched[(matched['match_status'] != 'matched') | (matched['match_method'] == 'fuzzy')]
+    return report.sort_values('match_status', kind='stable')
+
+
+if __name__ == "__main__":
+    index = ScriptFileIndex([
+        'A Night at the Roxbury_0120770_anno.txt',
+        'Alien_0078748_anno.txt',
+        'Aliens_0090605_anno.txt',
+        'Psycho_0054215_anno.txt',
+        'Psycho_0155975_anno.txt',
+        'Matrix, The_0133093_anno.txt',
+        'Scream 3_0134084_anno.txt'
+    ])
+    for title, imdb_id in [('A Night at the Roxbury', None), ('Night at the Roxbury', None),
+                           ('Alien', None), ('The Matrix', None), ('Psycho', None),
+                           ('Psycho', 'tt0155975'), ('Aliens', 'tt0000001'), ('Scream 2', None),
+                           ('Casablanca', None)]:
+        result = index.match(title, imdb_id)
+        print(f"{title!r:28} -> {result['status']:9} {result['method']!s:6} {result['candidates']}")
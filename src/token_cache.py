@@ -0,0 +1,249 @@
+"""
+token_cache.py - Cache disque des scripts tokenisés, adressé par contenu
+Les tokens sont stockés en tableaux d'identifiants int32 (.npy, lisibles en
+memory-map) associés à un vocabulaire commun. La clé de cache dépend du
+contenu du texte et des paramètres du nettoyage et du tokeniseur : modifier
+clean_script_text ou le tokeniseur (y compris les motifs de leur module)
+invalide automatiquement le cache.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import re
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from parser import _code_digest, clean_script_text
+
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+def preprocess_tokens(text: str) -> List[str]:
+    """
+    Tokenisation et nettoyage (Niveau Morphologique - Boritchev).
+    Identique à la fonction du notebook 4 : word_tokenize puis mots alphabétiques.
+    """
+    from nltk import word_tokenize
+
+    if not isinstance(text, str):
+        return []
+
+    return [t for t in word_tokenize(text.lower()) if t.isalpha()]
+
+
+def regex_tokens(text: str) -> List[str]:
+    """
+    Tokenisation rapide par expression régulière (mots alphabétiques en minuscules).
+    """
+    if not isinstance(text, str):
+        return []
+
+    return [t for t in _WORD_PATTERN.findall(text.lower()) if t.isalpha()]
+
+
+TOKENIZERS: Dict[str, Callable[[str], List[str]]] = {
+    'nltk': preprocess_tokens,
+    'regex': regex_tokens
+}
+
+
+def _source_hash(func: Callable) -> str:
+    """
+    Empreinte du code source du module d'une fonction : change si la fonction ou
+    ce qu'elle utilise au niveau du module (motifs compilés...) est modifié.
+    """
+    try:
+        source = inspect.getsource(inspect.getmodule(func))
+    except (OSError, TypeError):
+        source = f"{func.__module__}.{func.__qualname__}"
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+
+
+class TokenCache:
+    """
+    Cache des tokens par script.
+
+    Arborescence :
+        cache_dir/<empreinte>/vocab.txt         vocabulaire (un token par ligne, id = numéro de ligne)
+        cache_dir/<empreinte>/tokens/<clé>.npy   identifiants int32 d'un script
+
+    L'empreinte combine le code du tokeniseur et celui du parser (clean_script_text
+    et ses motifs, parser._code_digest) : chaque version
+    des paramètres a son propre espace, les anciens peuvent être supprimés
+    avec prune(). Le cache suppose un seul processus écrivain.
+    """
+
+    def __init__(self, cache_dir: str,
+                 tokenizer: str = 'nltk',
+                 remove_stage_directions: bool = True):
+        """
+        Args:
+            cache_dir: Dossier racine du cache
+            tokenizer: Nom du tokeniseur ('nltk' ou 'regex')
+            remove_stage_directions: Paramètre transmis à clean_script_text
+        """
+        if tokenizer not in TOKENIZERS:
+            raise ValueError(f"Tokeniseur inconnu : {tokenizer} (choix : {list(TOKENIZERS)})")
+
+        self.cache_dir = cache_dir
+        self.tokenizer_name = tokenizer
+        self.tokenizer = TOKENIZERS[tokenizer]
+        self.remove_stage_directions = remove_stage_directions
+
+        self.settings = {
+            'tokenizer': tokenizer,
+            'tokenizer_source': _source_hash(self.tokenizer),
+            'cleaner_source': _code_digest()[:16],
+            'remove_stage_directions': remove_stage_directions
+        }
+        self.fingerprint = hashlib.sha256(
+            json.dumps(self.settings, sort_keys=True).encode('utf-8')
+        ).hexdigest()[:16]
+
+        self.root = os.path.join(cache_dir, self.fingerprint)
+        self.tokens_dir = os.path.join(self.root, 'tokens')
+        os.makedirs(self.tokens_dir, exist_ok=True)
+
+        settings_path = os.path.join(self.root, 'settings.json')
+        if not os.path.exists(settings_path):
+            with open(settings_path, 'w', encoding='utf-8') as f:
+                json.dump(self.settings, f, indent=2)
+
+        self.vocab_path = os.path.join(self.root, 'vocab.txt')
+        self.vocabulary: List[str] = []
+        self.token_ids: Dict[str, int] = {}
+        if os.path.exists(self.vocab_path):
+            with open(self.vocab_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self._register(line.rstrip('\n'))
+
+    def _register(self, token: str) -> int:
+        token_id = len(self.vocabulary)
+        self.vocabulary.append(token)
+        self.token_ids[token] = token_id
+        return token_id
+
+    def key(self, text: str, raw: bool = False) -> str:
+        """
+        Clé de cache d'un texte.
+
+        Args:
+            text: Texte brut ou déjà nettoyé
+            raw: True si le texte doit d'abord passer par clean_script_text
+
+        Returns:
+            Empreinte hexadécimale
+        """
+        h = hashlib.sha256(b'raw:' if raw else b'clean:')
+        h.update(text.encode('utf-8', errors='surrogatepass'))
+        return h.hexdigest()[:32]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.tokens_dir, f"{key}.npy")
+
+    def encode(self, tokens: List[str]) -> np.ndarray:
+        """
+        Convertit des tokens en identifiants (le vocabulaire est complété et sauvegardé).
+        """
+        new_tokens = []
+        ids = np.empty(len(tokens), dtype=np.int32)
+        for i, token in enumerate(tokens):
+            token_id = self.token_ids.get(token)
+            if token_id is None:
+                token_id = self._register(token)
+                new_tokens.append(token)
+            ids[i] = token_id
+
+        if new_tokens:
+            with open(self.vocab_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(t + '\n' for t in new_tokens))
+
+        return ids
+
+    def decode(self, ids: np.ndarray) -> List[str]:
+        """
+        Convertit des identifiants en tokens.
+        """
+        vocabulary = self.vocabulary
+        return [vocabulary[i] for i in ids.tolist()]
+
+    def get_ids(self, text: str, raw: bool = False) -> Optional[np.ndarray]:
+        """
+        Identifiants en cache d'un texte (memory-map), ou None s'ils sont absents.
+        """
+        path = self._path(self.key(text, raw))
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode='r')
+
+    def ids(self, text: str, raw: bool = False) -> np.ndarray:
+        """
+        Identifiants des tokens d'un texte, calculés et stockés si nécessaire.
+
+        Args:
+            text: Texte brut (raw=True) ou nettoyé (ex: colonne clean_text)
+            raw: True pour appliquer clean_script_text avant la tokenisation
+
+        Returns:
+            Tableau int32 d'identifiants
+        """
+        if not isinstance(text, str):
+            return np.empty(0, dtype=np.int32)
+
+        cached = self.get_ids(text, raw)
+        if cached is not None:
+            return cached
+
+        clean = clean_script_text(text, self.remove_stage_directions) if raw else text
+        ids = self.encode(self.tokenizer(clean))
+
+        path = self._path(self.key(text, raw))
+        tmp_path = path + '.tmp.npy'
+        np.save(tmp_path, ids)
+        os.replace(tmp_path, path)
+
+        return ids
+
+    def tokens(self, text: str, raw: bool = False) -> List[str]:
+        """
+        Tokens d'un texte (remplace preprocess_tokens dans les notebooks).
+        """
+        return self.decode(self.ids(text, raw))
+
+    def file_ids(self, filepath: str) -> np.ndarray:
+        """
+        Identifiants des tokens d'un fichier de script brut.
+        """
+        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+            return self.ids(f.read(), raw=True)
+
+    def prune(self) -> List[str]:
+        """
+        Supprime les espaces de cache des anciennes versions des paramètres.
+
+        Returns:
+            Liste des empreintes supprimées
+        """
+        import shutil
+
+        removed = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name != self.fingerprint and os.path.isdir(path) and \
+                    os.path.exists(os.path.join(path, 'settings.json')):
+                shutil.rmtree(path)
+                removed.append(name)
+        return removed
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    cache = TokenCache(tempfile.mkdtemp(), tokenizer='regex')
+    text = "JOHN: Hello, how are you?\n\nMARY: I'm fine (smiles)."
+    print(cache.tokens(text, raw=True))
+    print(cache.get_ids(text, raw=True))